@@ -0,0 +1,482 @@
+"""
+Offline crawl benchmark.
+
+Serves synthetic sites from a local HTTP server and runs every crawl strategy
+against them, reporting pages/sec, p50/p95 page latency, peak RSS and export
+time as JSON. Compare against a previous run with --baseline to fail on
+regressions.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.25
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import threading
+import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+WORDS = (
+    "crawler python frontier latency browser render markdown export queue score "
+    "page link depth budget cache host robots sitemap feed token index content"
+).split()
+
+
+def paragraph(rng: random.Random, words: int = 80) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def static_page(rng: random.Random, title: str, links: List[str]) -> str:
+    body = "".join(f"<p>{paragraph(rng)}</p>" for _ in range(4))
+    anchors = "".join(f'<li><a href="{href}">{href.strip("/")}</a></li>' for href in links)
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        f"<article><h1>{title}</h1>{body}</article><nav><ul>{anchors}</ul></nav>"
+        "</body></html>"
+    )
+
+
+def js_page(rng: random.Random, title: str, links: List[str]) -> str:
+    content = json.dumps({"title": title, "paragraphs": [paragraph(rng) for _ in range(4)], "links": links})
+    return (
+        f"<html><head><title>{title}</title></head><body><div id=\"root\"></div>"
+        "<script>setTimeout(function () {"
+        f"var data = {content}; var root = document.getElementById('root');"
+        "var html = '<article><h1>' + data.title + '</h1>';"
+        "data.paragraphs.forEach(function (p) { html += '<p>' + p + '</p>'; });"
+        "html += '</article><nav><ul>';"
+        "data.links.forEach(function (l) { html += '<li><a href=\"' + l + '\">' + l + '</a></li>'; });"
+        "root.innerHTML = html + '</ul></nav>';"
+        "}, 50);</script></body></html>"
+    )
+
+
+def deep_tree(rng: random.Random, depth: int = 5, branching: int = 2) -> Dict[str, str]:
+    pages = {}
+
+    def build(path: str, level: int):
+        children = [f"{path}/{'python' if i == 0 else 'node'}-{i}" for i in range(branching)] if level < depth else []
+        parent = path.rsplit("/", 1)[0] or "/deep"
+        pages[path] = static_page(rng, path, children + [parent])
+        for child in children:
+            build(child, level + 1)
+
+    build("/deep", 0)
+    return pages
+
+
+def wide_fanout(rng: random.Random, width: int = 150) -> Dict[str, str]:
+    items = [f"/wide/{'crawler' if i % 10 == 0 else 'item'}-{i}" for i in range(width)]
+    pages = {"/wide": static_page(rng, "wide", items)}
+    for item in items:
+        pages[item] = static_page(rng, item, ["/wide"])
+    return pages
+
+
+def link_cycles(rng: random.Random, size: int = 40) -> Dict[str, str]:
+    pages = {}
+    for i in range(size):
+        links = [f"/cycle/page-{(i + 1) % size}", f"/cycle/page-{(i + 7) % size}", "/cycle/page-0"]
+        pages[f"/cycle/page-{i}"] = static_page(rng, f"cycle {i}", links)
+    pages["/cycle"] = pages["/cycle/page-0"]
+    return pages
+
+
+def duplicate_variants(rng: random.Random, size: int = 20) -> Dict[str, str]:
+    pages = {}
+    for i in range(size):
+        target = f"/dup/page-{(i + 1) % size}"
+        variants = [
+            target,
+            f"{target}/",
+            f"{target}?utm_source=bench",
+            f"{target}#section-{i}",
+            f"{target}?utm_campaign=bench&utm_medium=link",
+        ]
+        pages[f"/dup/page-{i}"] = static_page(rng, f"duplicate {i}", variants)
+    pages["/dup"] = pages["/dup/page-0"]
+    return pages
+
+
+def js_rendered(rng: random.Random, size: int = 20) -> Dict[str, str]:
+    pages = {}
+    for i in range(size):
+        links = [f"/js/page-{(i * 2 + 1) % size}", f"/js/page-{(i * 2 + 2) % size}"]
+        pages[f"/js/page-{i}"] = js_page(rng, f"js {i}", links)
+    pages["/js"] = pages["/js/page-0"]
+    return pages
+
+
+# name -> (site builder, start path, crawl depth)
+SCENARIOS = {
+    "deep_tree": (deep_tree, "/deep", 5),
+    "wide_fanout": (wide_fanout, "/wide", 1),
+    "link_cycles": (link_cycles, "/cycle", 3),
+    "duplicate_variants": (duplicate_variants, "/dup", 3),
+    "js_rendered": (js_rendered, "/js", 3),
+}
+
+BENCHMARK_KEYWORDS = ["python", "crawler"]
+
+
+def fixture_path(url: str) -> str:
+    path = urlsplit(url).path.rstrip("/")
+    return path or "/"
+
+
+class FixtureServer:
+    """Serves the synthetic sites and records when each page was first requested."""
+
+    def __init__(self, pages: Dict[str, str], latency_ms: float = 0.0):
+        self.pages = pages
+        self.latency = latency_ms / 1000
+        self.requested_at: Dict[str, float] = {}
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset(self):
+        with self._lock:
+            self.requested_at.clear()
+            self.request_count = 0
+
+    def record(self, path: str):
+        with self._lock:
+            self.request_count += 1
+            self.requested_at.setdefault(path, time.perf_counter())
+
+    def start(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/robots.txt":
+                    return self.respond(200, "User-agent: *\nAllow: /\n", "text/plain")
+                path = fixture_path(self.path)
+                html = fixture.pages.get(path)
+                if html is None:
+                    return self.respond(404, "<html><body>Not found</body></html>")
+                fixture.record(path)
+                if fixture.latency:
+                    time.sleep(fixture.latency)
+                self.respond(200, html)
+
+            def respond(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class RssSampler:
+    """
+    Tracks peak resident memory while a run is in progress. With psutil the
+    browser processes are included; otherwise only this process is measured.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self.scope = "process_tree" if psutil else "python_process"
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def current() -> Optional[int]:
+        if psutil is not None:
+            process = psutil.Process()
+            total = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+        return None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.current() or 0)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current() or 0)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def stream_pages(strategy: str, url: str, depth: int, render_mode: str, concurrency: int, render_profile: str):
+    from crawl_engine import STRATEGY_BEST_FIRST, CrawlOptions, get_crawl_engine
+
+    options = CrawlOptions(render_mode=render_mode, max_concurrency=concurrency, render_profile=render_profile)
+    keywords = BENCHMARK_KEYWORDS if strategy == STRATEGY_BEST_FIRST else None
+    return get_crawl_engine().stream(url, strategy, depth, options, keywords=keywords)
+
+
+def export_pages(pages: List[dict], export_format: str, directory: str) -> Tuple[float, int]:
+    from exporters import EXPORT_WRITERS
+
+    writer_class = EXPORT_WRITERS[export_format]
+    path = os.path.join(directory, f"benchmark.{writer_class.extension}")
+    started = time.perf_counter()
+    with writer_class(path) as writer:
+        for page in pages:
+            writer.write(page)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(path)
+    os.remove(path)
+    return elapsed, size
+
+
+async def run_case(
+    server: FixtureServer,
+    strategy: str,
+    scenario: str,
+    render_mode: str,
+    render_profile: str,
+    concurrency: int,
+    export_format: str,
+    export_dir: str,
+) -> dict:
+    _, start_path, depth = SCENARIOS[scenario]
+    server.reset()
+    pages: List[dict] = []
+    latencies: List[float] = []
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        async for page in stream_pages(
+            strategy, server.base_url + start_path, depth, render_mode, concurrency, render_profile
+        ):
+            requested = server.requested_at.get(fixture_path(page["url"]))
+            if requested is not None:
+                latencies.append(time.perf_counter() - requested)
+            pages.append(page)
+        crawl_seconds = time.perf_counter() - started
+        export_seconds, export_bytes = await asyncio.to_thread(export_pages, pages, export_format, export_dir)
+
+    unique_urls = len({fixture_path(page["url"]) for page in pages})
+    p50, p95 = percentile(latencies, 0.5), percentile(latencies, 0.95)
+    return {
+        "strategy": strategy,
+        "scenario": scenario,
+        "pages": len(pages),
+        "unique_pages": unique_urls,
+        "server_requests": server.request_count,
+        "duplicate_fetches": server.request_count - len(server.requested_at),
+        "crawl_seconds": round(crawl_seconds, 4),
+        "pages_per_sec": round(len(pages) / crawl_seconds, 3) if crawl_seconds else None,
+        "latency_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+        "latency_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1) if rss.peak else None,
+        "rss_scope": rss.scope,
+        "export_format": export_format,
+        "export_seconds": round(export_seconds, 4),
+        "export_bytes": export_bytes,
+    }
+
+
+# metric -> True when higher is better
+COMPARED_METRICS = {
+    "pages_per_sec": True,
+    "latency_p95_ms": False,
+    "peak_rss_mb": False,
+    "export_seconds": False,
+}
+
+
+def find_regressions(results: List[dict], baseline: dict, tolerance: float) -> List[dict]:
+    previous = {(item["strategy"], item["scenario"]): item for item in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get((result["strategy"], result["scenario"]))
+        if before is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (higher_is_better and change < -tolerance) or (not higher_is_better and change > tolerance):
+                regressions.append({
+                    "strategy": result["strategy"],
+                    "scenario": result["scenario"],
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": round(change, 3),
+                })
+    return regressions
+
+
+async def run_benchmark(args) -> dict:
+    from browser_pool import get_browser_pool
+    from content_cache import get_content_cache
+    from politeness import get_host_scheduler
+
+    rng = random.Random(args.seed)
+    pages: Dict[str, str] = {}
+    for scenario in args.scenarios:
+        pages.update(SCENARIOS[scenario][0](rng))
+
+    server = FixtureServer(pages, latency_ms=args.latency_ms)
+    server.start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as export_dir:
+            for scenario in args.scenarios:
+                for strategy in args.strategies:
+                    for _ in range(args.repeat):
+                        result = await run_case(
+                            server, strategy, scenario, args.render_mode, args.render_profile, args.concurrency,
+                            args.export_format, export_dir,
+                        )
+                        logger.info(
+                            f"{strategy:13} {scenario:18} {result['pages']:4} pages "
+                            f"{result['pages_per_sec']} pages/s p95 {result['latency_p95_ms']} ms "
+                            f"export {result['export_seconds']} s"
+                        )
+                        results.append(result)
+    finally:
+        server.close()
+        await get_browser_pool().close()
+        await get_content_cache().close()
+        await get_host_scheduler().close()
+
+    return {
+        "generated_at": datetime.datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "render_mode": args.render_mode,
+        "render_profile": args.render_profile,
+        "concurrency": args.concurrency,
+        "latency_ms": args.latency_ms,
+        "seed": args.seed,
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    from crawl_engine import strategy_names
+
+    # Every registered strategy, including those of CRAWLER_STRATEGY_PLUGINS
+    strategies = list(strategy_names())
+    parser = argparse.ArgumentParser(description="Run the crawl strategies against local synthetic sites.")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--strategies", nargs="+", choices=strategies, default=strategies)
+    parser.add_argument("--render-mode", choices=["browser", "http", "auto"], default="browser")
+    parser.add_argument("--render-profile", choices=["full", "balanced", "text", "minimal"], default="balanced")
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--export-format", choices=["docx", "markdown", "jsonl", "jsonl.gz"], default="docx")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Artificial server latency per page")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative change before failing")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    # Keep the run self-contained: throwaway cache and checkpoints (never the
+    # configured ones, which would be removed afterwards or warm the cache),
+    # and politeness limits that do not throttle the local server.
+    workdir = tempfile.mkdtemp(prefix="crawler-benchmark-")
+    os.environ["CRAWLER_CACHE_DIR"] = workdir
+    os.environ["CRAWLER_CHECKPOINT_DIR"] = os.path.join(workdir, "checkpoints")
+    os.environ.setdefault("CRAWLER_HOST_RATE", "10000")
+    os.environ.setdefault("CRAWLER_HOST_BURST", "10000")
+    os.environ.setdefault("CRAWLER_HOST_CONCURRENCY", str(max(args.concurrency, 1)))
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
+    try:
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = find_regressions(report["results"], json.load(f), args.tolerance)
+        for regression in report["regressions"]:
+            logger.error(
+                f"Regression in {regression['strategy']} / {regression['scenario']}: {regression['metric']} "
+                f"{regression['baseline']} -> {regression['current']}"
+            )
+        status = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,958 @@
+"""
+Concurrent best-first crawling on top of crawl4ai's deep crawl strategy:
+a deduplicating frontier that can spill to disk, compact visited sets,
+checkpoints, a shared multi-worker frontier, fan-out limits and adaptive
+early stopping.
+"""
+import asyncio
+import base64
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import os
+import sqlite3
+import tempfile
+from array import array
+from contextlib import nullcontext
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncGenerator, Awaitable, Callable, ContextManager, Iterable, Optional, Set, Dict, List, Tuple
+from urllib.parse import urlparse
+
+from crawl4ai.deep_crawling import BestFirstCrawlingStrategy as BaseBestFirstCrawlingStrategy
+from crawl4ai.deep_crawling.filters import FilterChain
+from crawl4ai.deep_crawling.scorers import URLScorer
+from crawl4ai.types import AsyncWebCrawler, CrawlerRunConfig, CrawlResult, RunManyReturn
+from budgets import STOP_MIN_SCORE, STOP_PAGES, STOP_PLATEAU
+
+from math import inf as infinity
+
+# Default number of page fetches the scheduler keeps in flight at once
+MAX_CONCURRENCY = 5
+
+# Upper bound on cached URL validation/filter decisions before the cache is reset
+URL_DECISION_CACHE_SIZE = 100000
+
+# Seconds an idle worker of a shared crawl waits before asking the shared frontier again
+SHARED_POLL_SECONDS = 0.5
+
+FrontierItem = Tuple[float, int, str, Optional[str]]
+
+VISITED_EXACT = "exact"
+VISITED_BLOOM = "bloom"
+VISITED_MODES = (VISITED_EXACT, VISITED_BLOOM)
+
+# Default false-positive rate of the bloom visited set
+VISITED_ERROR_RATE = 0.001
+
+
+class BestFirstFrontier:
+    """
+    Priority frontier for best-first crawling.
+
+    Entries are deduplicated by URL at enqueue time: pushing a URL that is
+    already queued only updates its priority when the new score is better
+    (decrease-key via lazy invalidation of the old heap entry). When the
+    in-memory frontier grows beyond max_size, the lowest priority half is
+    either spilled to a temporary SQLite file or dropped.
+    """
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        spill_to_disk: bool = False,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.max_size = max_size
+        self.spill_to_disk = spill_to_disk
+        self.logger = logger or logging.getLogger(__name__)
+        self._heap: List[list] = []
+        self._index: Dict[str, list] = {}
+        self._counter = itertools.count()
+        self._spill: Optional[sqlite3.Connection] = None
+        self._spill_path: Optional[str] = None
+        self._spilled = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._index) + self._spilled
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index or self._spill_priority(url) is not None
+
+    def push(self, priority: float, depth: int, url: str, parent_url: Optional[str]) -> bool:
+        """
+        Add a URL or improve the priority of a queued one.
+        Returns False when the URL was already queued with an equal or better priority.
+        """
+        entry = self._index.get(url)
+        if entry is not None:
+            if priority >= entry[0]:
+                return False
+            entry[-1] = False
+        else:
+            spilled_priority = self._spill_priority(url)
+            if spilled_priority is not None:
+                if priority >= spilled_priority:
+                    return False
+                self._spill.execute("DELETE FROM frontier WHERE url = ?", (url,))
+                self._spilled -= 1
+
+        entry = [priority, next(self._counter), depth, url, parent_url, True]
+        self._index[url] = entry
+        heapq.heappush(self._heap, entry)
+        if self.max_size is not None and len(self._index) > self.max_size:
+            self._shrink()
+        return True
+
+    def peek(self) -> Optional[FrontierItem]:
+        self._settle()
+        if not self._heap:
+            return None
+        priority, _, depth, url, parent_url, _ = self._heap[0]
+        return priority, depth, url, parent_url
+
+    def pop(self) -> Optional[FrontierItem]:
+        item = self.peek()
+        if item is not None:
+            heapq.heappop(self._heap)
+            del self._index[item[2]]
+        return item
+
+    def snapshot(self) -> List[FrontierItem]:
+        """Return every queued item, including spilled ones, e.g. for checkpointing."""
+        items = [(entry[0], entry[2], entry[3], entry[4]) for entry in self._heap if entry[-1]]
+        if self._spilled:
+            items += [
+                (priority, depth, url, parent_url)
+                for url, priority, depth, parent_url in self._spill.execute(
+                    "SELECT url, priority, depth, parent_url FROM frontier"
+                )
+            ]
+        return items
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            os.remove(self._spill_path)
+
+    def _settle(self):
+        """Drop invalidated heap entries and pull spilled URLs back when they outrank memory."""
+        while self._heap and not self._heap[0][-1]:
+            heapq.heappop(self._heap)
+        if not self._spilled:
+            return
+        best_spilled = self._spill.execute("SELECT MIN(priority) FROM frontier").fetchone()[0]
+        if not self._heap or best_spilled < self._heap[0][0]:
+            self._reload()
+
+    def _shrink(self):
+        entries = sorted(entry for entry in self._heap if entry[-1])
+        keep = max(1, self.max_size // 2)
+        evicted = entries[keep:]
+        for entry in evicted:
+            del self._index[entry[3]]
+        self._heap = entries[:keep]
+        heapq.heapify(self._heap)
+
+        if not self.spill_to_disk:
+            self.dropped += len(evicted)
+            self.logger.info(f"Frontier limit ({self.max_size}) reached, dropped {len(evicted)} low priority URLs")
+            return
+
+        if self._spill is None:
+            fd, self._spill_path = tempfile.mkstemp(prefix="frontier_", suffix=".sqlite")
+            os.close(fd)
+            self._spill = sqlite3.connect(self._spill_path)
+            self._spill.execute(
+                "CREATE TABLE frontier (url TEXT PRIMARY KEY, priority REAL, depth INTEGER, parent_url TEXT)"
+            )
+            self._spill.execute("CREATE INDEX idx_frontier_priority ON frontier(priority)")
+        self._spill.executemany(
+            "INSERT OR REPLACE INTO frontier VALUES (?, ?, ?, ?)",
+            [(entry[3], entry[0], entry[2], entry[4]) for entry in evicted],
+        )
+        self._spilled += len(evicted)
+        self.logger.debug(f"Spilled {len(evicted)} frontier URLs to disk")
+
+    def _reload(self):
+        limit = max(1, (self.max_size or 0) // 2)
+        rows = self._spill.execute(
+            "SELECT url, priority, depth, parent_url FROM frontier ORDER BY priority LIMIT ?", (limit,)
+        ).fetchall()
+        self._spill.executemany("DELETE FROM frontier WHERE url = ?", [(row[0],) for row in rows])
+        self._spilled -= len(rows)
+        for url, priority, depth, parent_url in rows:
+            entry = [priority, next(self._counter), depth, url, parent_url, True]
+            self._index[url] = entry
+            heapq.heappush(self._heap, entry)
+
+    def _spill_priority(self, url: str) -> Optional[float]:
+        if not self._spilled:
+            return None
+        row = self._spill.execute("SELECT priority FROM frontier WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+
+def _url_digest(url: str, size: int) -> bytes:
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=size).digest()
+
+
+class FingerprintVisitedSet:
+    """
+    Exact visited set for large crawls. Each URL is kept as a 64-bit hash in
+    an open-addressing table backed by an array: about 16 bytes per URL,
+    against well over 100 for a set of strings. Two URLs sharing a 64-bit
+    hash is not a practical concern below billions of URLs.
+    """
+    mode = VISITED_EXACT
+
+    def __init__(self, capacity: int = 1024):
+        size = 1 << max(4, math.ceil(math.log2(max(capacity, 1) * 2)))
+        self._slots = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, url: str) -> bool:
+        fingerprint = self._fingerprint(url)
+        return self._slots[self._find(fingerprint)] == fingerprint
+
+    @staticmethod
+    def _fingerprint(url: str) -> int:
+        # 0 marks an empty slot
+        return int.from_bytes(_url_digest(url, 8), "little") or 1
+
+    def _find(self, fingerprint: int) -> int:
+        slots, mask = self._slots, self._mask
+        index = fingerprint & mask
+        while slots[index] and slots[index] != fingerprint:
+            index = (index + 1) & mask
+        return index
+
+    def _insert(self, fingerprint: int) -> bool:
+        index = self._find(fingerprint)
+        if self._slots[index]:
+            return False
+        self._slots[index] = fingerprint
+        self._count += 1
+        if self._count * 2 > len(self._slots):
+            self._grow()
+        return True
+
+    def _grow(self):
+        slots = self._slots
+        self._slots = array("Q", bytes(16 * len(slots)))
+        self._mask = len(self._slots) - 1
+        for fingerprint in slots:
+            if fingerprint:
+                self._slots[self._find(fingerprint)] = fingerprint
+
+    def add(self, url: str) -> bool:
+        """Record a URL; returns False when it was already visited."""
+        return self._insert(self._fingerprint(url))
+
+    def update(self, urls: Iterable[str]):
+        for url in urls:
+            self.add(url)
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "fingerprints": base64.b64encode(array("Q", filter(None, self._slots)).tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "FingerprintVisitedSet":
+        fingerprints = array("Q")
+        fingerprints.frombytes(base64.b64decode(state["fingerprints"]))
+        visited = cls(len(fingerprints))
+        for fingerprint in fingerprints:
+            visited._insert(fingerprint)
+        return visited
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytes] = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    @staticmethod
+    def hash_pair(url: str) -> Tuple[int, int]:
+        digest = _url_digest(url, 16)
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def _positions(self, hashes: Tuple[int, int]) -> Iterable[int]:
+        # Double hashing: the k positions are first + i * second (mod size)
+        first, second = hashes
+        size = self.size
+        return (((first + i * second) % size) for i in range(self.hashes))
+
+    def contains(self, hashes: Tuple[int, int]) -> bool:
+        bits = self.bits
+        for position in self._positions(hashes):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def add(self, hashes: Tuple[int, int]):
+        bits = self.bits
+        for position in self._positions(hashes):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class ScalableBloomVisitedSet:
+    """
+    Probabilistic visited set: a scalable bloom filter that adds a larger,
+    stricter filter whenever the newest one is full, so memory follows the
+    crawl size while the overall false-positive rate stays below error_rate.
+    A false positive means a link is taken as already visited and skipped.
+    """
+    mode = VISITED_BLOOM
+
+    def __init__(
+        self,
+        error_rate: float = VISITED_ERROR_RATE,
+        initial_capacity: int = 1 << 16,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self.growth = growth
+        self.tightening = tightening
+        # The per-filter rates form a geometric series summing to error_rate
+        self._filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self._filters)
+
+    def __contains__(self, url: str) -> bool:
+        hashes = BloomFilter.hash_pair(url)
+        return any(bloom.contains(hashes) for bloom in self._filters)
+
+    def add(self, url: str) -> bool:
+        hashes = BloomFilter.hash_pair(url)
+        if any(bloom.contains(hashes) for bloom in self._filters):
+            return False
+        current = self._filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.growth, current.error_rate * self.tightening)
+            self._filters.append(current)
+        current.add(hashes)
+        return True
+
+    def update(self, urls: Iterable[str]):
+        for url in urls:
+            self.add(url)
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "error_rate": self.error_rate,
+            "growth": self.growth,
+            "tightening": self.tightening,
+            "filters": [
+                {
+                    "capacity": bloom.capacity,
+                    "error_rate": bloom.error_rate,
+                    "count": bloom.count,
+                    "bits": base64.b64encode(bytes(bloom.bits)).decode("ascii"),
+                }
+                for bloom in self._filters
+            ],
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ScalableBloomVisitedSet":
+        visited = cls(state["error_rate"], growth=state["growth"], tightening=state["tightening"])
+        visited._filters = [
+            BloomFilter(bloom["capacity"], bloom["error_rate"], base64.b64decode(bloom["bits"]), bloom["count"])
+            for bloom in state["filters"]
+        ]
+        return visited
+
+
+def create_visited_set(mode: str = VISITED_EXACT, error_rate: float = VISITED_ERROR_RATE):
+    if mode == VISITED_EXACT:
+        return FingerprintVisitedSet()
+    if mode == VISITED_BLOOM:
+        return ScalableBloomVisitedSet(error_rate)
+    raise ValueError(f"Unsupported visited set mode: {mode}")
+
+
+def restore_visited_set(state: Any, mode: str = VISITED_EXACT, error_rate: float = VISITED_ERROR_RATE):
+    """Rebuild a visited set from a checkpoint; older checkpoints hold a plain list of URLs."""
+    if isinstance(state, dict):
+        if state["mode"] == VISITED_BLOOM:
+            return ScalableBloomVisitedSet.from_state(state)
+        return FingerprintVisitedSet.from_state(state)
+    visited = create_visited_set(mode, error_rate)
+    visited.update(state)
+    return visited
+
+
+class BestFirstCrawlingStrategy(BaseBestFirstCrawlingStrategy):
+    """
+    Best-First Crawling Strategy using a priority queue.
+    
+    This strategy prioritizes URLs based on their score, ensuring that higher-value
+    pages are crawled first. It reimplements the core traversal loop to use a priority
+    queue while keeping URL validation and link discovery consistent with our design.
+    
+    Core methods:
+      - arun: Returns either a list (batch mode) or an async generator (stream mode).
+      - _arun_best_first: Core generator that uses a priority queue to yield CrawlResults.
+      - can_process_url: Validates URLs and applies filtering (inherited behavior).
+      - link_discovery: Extracts and validates links from a CrawlResult.
+    """
+    def __init__(
+        self,
+        max_depth: int,
+        filter_chain: FilterChain = FilterChain(),
+        url_scorer: Optional[URLScorer] = None,
+        include_external: bool = False,
+        max_pages: int = infinity,
+        logger: Optional[logging.Logger] = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        score_drift: float = infinity,
+        max_frontier_size: Optional[int] = None,
+        spill_frontier_to_disk: bool = False,
+        url_normalizer: Optional[Callable[[str], str]] = None,
+        resume_state: Optional[Dict[str, Any]] = None,
+        checkpoint_callback: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        checkpoint_interval: int = 25,
+        phase_timer: Optional[Callable[[str], ContextManager]] = None,
+        shared_frontier: Optional[Any] = None,
+        visited_mode: str = VISITED_EXACT,
+        visited_error_rate: float = VISITED_ERROR_RATE,
+        fanout_per_depth: Optional[Dict[int, int]] = None,
+        min_score: float = -infinity,
+        plateau_window: int = 0,
+        plateau_ratio: float = 0.1,
+        seed_urls: Optional[List[str]] = None,
+    ):
+        super().__init__(
+            max_depth,
+            filter_chain=filter_chain,
+            url_scorer=url_scorer,
+            include_external=include_external,
+            max_pages=max_pages,
+            logger=logger,
+        )
+        self.max_concurrency = max(1, max_concurrency)
+        self.score_drift = score_drift
+        self.max_frontier_size = max_frontier_size
+        self.spill_frontier_to_disk = spill_frontier_to_disk
+        self.url_normalizer = url_normalizer
+        self._url_decisions: Dict[str, bool] = {}
+        self.resume_state = resume_state
+        self.checkpoint_callback = checkpoint_callback
+        self.checkpoint_interval = max(1, checkpoint_interval)
+        self.phase_timer = phase_timer
+        self.shared_frontier = shared_frontier
+        self.visited_mode = visited_mode
+        self.visited_error_rate = visited_error_rate
+        self.fanout_per_depth = fanout_per_depth or {}
+        self.min_score = min_score
+        self.plateau_window = plateau_window
+        self.plateau_ratio = plateau_ratio
+        self.seed_urls = seed_urls or []
+        self._recent_scores: deque = deque(maxlen=max(1, plateau_window))
+        self._best_window_score = 0.0
+        self._links_below_min_score = 0
+        self.stop_reason: Optional[str] = None
+        self._frontier: Optional[BestFirstFrontier] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._frontier) if self._frontier is not None else 0
+
+    def _timed(self, phase: str) -> ContextManager:
+        return self.phase_timer(phase) if self.phase_timer else nullcontext()
+
+    async def can_process_url(self, url: str, depth: int) -> bool:
+        """
+        Validate the URL format and apply filtering.
+        For the starting URL (depth 0), filtering is bypassed.
+        Decisions for discovered links are cached, so a URL linked from many
+        pages is only parsed and filtered once.
+        """
+        if depth == 0:
+            return await self._evaluate_url(url, depth)
+
+        decision = self._url_decisions.get(url)
+        if decision is None:
+            decision = await self._evaluate_url(url, depth)
+            if len(self._url_decisions) >= URL_DECISION_CACHE_SIZE:
+                self._url_decisions.clear()
+            self._url_decisions[url] = decision
+        return decision
+
+    async def _evaluate_url(self, url: str, depth: int) -> bool:
+        try:
+            parsed = urlparse(url)
+            if not parsed.scheme or not parsed.netloc:
+                raise ValueError("Missing scheme or netloc")
+            if parsed.scheme not in ("http", "https"):
+                raise ValueError("Invalid scheme")
+            if "." not in parsed.netloc:
+                raise ValueError("Invalid domain")
+        except Exception as e:
+            self.logger.warning(f"Invalid URL: {url}, error: {e}")
+            return False
+
+        if depth != 0 and not await self.filter_chain.apply(url):
+            return False
+
+        return True
+
+    async def link_discovery(
+        self,
+        result: CrawlResult,
+        source_url: str,
+        current_depth: int,
+        visited: Set[str],
+        next_links: List[Tuple[str, Optional[str]]],
+        depths: Dict[str, int],
+    ) -> None:
+        """
+        Extract links from the crawl result, validate them, and append new URLs
+        (with their parent references) to next_links.
+        Also updates the depths dictionary.
+
+        Links are canonicalized with url_normalizer (when set) and checked
+        against the visited set before any parsing or filtering happens.
+        """
+        new_depth = current_depth + 1
+        if new_depth > self.max_depth:
+            return
+            
+        
+        remaining_capacity = self.max_pages - self._pages_crawled
+        if remaining_capacity <= 0:
+            self.logger.info(f"Max pages limit ({self.max_pages}) reached, stopping link discovery")
+            return
+
+       
+        links = list(result.links.get("internal", []))
+        if self.include_external:
+            links += result.links.get("external", [])
+
+        
+        valid_links = []
+        seen: Set[str] = set()
+        for link in links:
+            url = link.get("href")
+            if not url:
+                continue
+            if self.url_normalizer:
+                url = self.url_normalizer(url)
+            if url in visited or url in seen:
+                continue
+            seen.add(url)
+            if not await self.can_process_url(url, new_depth):
+                self.stats.urls_skipped += 1
+                continue
+                
+            valid_links.append(url)
+            
+        # If we have more valid links than capacity, limit them
+        if len(valid_links) > remaining_capacity:
+            valid_links = valid_links[:remaining_capacity]
+            self.logger.info(f"Limiting to {remaining_capacity} URLs due to max_pages limit")
+            
+        # Record the new depths and add to next_links
+        for url in valid_links:
+            depths[url] = new_depth
+            next_links.append((url, source_url))
+
+    def _score_many(self, urls: List[str], result: Optional[CrawlResult] = None, parent_score: float = 0) -> List[float]:
+        """
+        Score all links of one page in a single call. Scorers offering
+        score_links also see the page itself (anchor text, content, the
+        parent's score); score_many is batched and memoized; anything else
+        is scored one URL at a time.
+        """
+        if not self.url_scorer:
+            return [0] * len(urls)
+        score_links = getattr(self.url_scorer, "score_links", None)
+        if score_links is not None and result is not None:
+            return score_links(result, urls, parent_score)
+        score_many = getattr(self.url_scorer, "score_many", None)
+        if score_many is not None:
+            return score_many(urls)
+        return [self.url_scorer.score(url) for url in urls]
+
+    def _select_links(
+        self, new_links: List[Tuple[str, Optional[str]]], new_scores: List[float], depth: int
+    ) -> List[Tuple[Tuple[str, Optional[str]], float]]:
+        """
+        Pair links with their scores, dropping those below min_score and
+        keeping only the best fanout_per_depth[depth] of the rest. The start
+        URL and seeds never pass through here, so min_score only ever applies
+        to discovered links; a dropped link is queued after all if another
+        page links to it with a better score.
+        """
+        scored = [(link, score) for link, score in zip(new_links, new_scores) if score >= self.min_score]
+        if len(scored) < len(new_links):
+            self._links_below_min_score += len(new_links) - len(scored)
+            self.stats.urls_skipped += len(new_links) - len(scored)
+        limit = self.fanout_per_depth.get(depth)
+        if limit is not None and len(scored) > limit:
+            self.stats.urls_skipped += len(scored) - limit
+            scored = heapq.nlargest(limit, scored, key=lambda link: link[1])
+        return scored
+
+    async def _seed_items(self, start_url: str, start_score: float = 0) -> List[FrontierItem]:
+        """
+        Frontier items for URLs found without rendering (sitemaps, feeds).
+        They are queued as links of the start page and ranked by the scorer
+        before the first fetch; scorers offering score_seeds rank them on the
+        same scale as links found on the start page itself.
+        """
+        if not self.seed_urls or self.max_depth < 1:
+            return []
+        urls: List[str] = []
+        seen: Set[str] = {start_url}
+        for url in self.seed_urls:
+            if self.url_normalizer:
+                url = self.url_normalizer(url)
+            if url in seen:
+                continue
+            seen.add(url)
+            if not await self.can_process_url(url, 1):
+                self.stats.urls_skipped += 1
+                continue
+            urls.append(url)
+        with self._timed("scoring"):
+            score_seeds = getattr(self.url_scorer, "score_seeds", None)
+            scores = score_seeds(start_url, urls, start_score) if score_seeds is not None else self._score_many(urls)
+        self.logger.info(f"Seeding the frontier with {len(urls)} URLs")
+        return [(-score, 1, url, start_url) for url, score in zip(urls, scores)]
+
+    def _observe_relevance(self, score: float):
+        """
+        Adaptive stop: once the average score of the last plateau_window pages
+        falls below plateau_ratio of the best window so far, further pages add
+        little relevance and the crawl winds down.
+        """
+        if not self.plateau_window:
+            return
+        self._recent_scores.append(score)
+        if len(self._recent_scores) < self.plateau_window:
+            return
+        average = sum(self._recent_scores) / self.plateau_window
+        self._best_window_score = max(self._best_window_score, average)
+        if self.stop_reason is None and average < self.plateau_ratio * self._best_window_score:
+            self.logger.info(
+                f"Relevance levelled off ({average:.3f} over the last {self.plateau_window} pages, "
+                f"best {self._best_window_score:.3f}), stopping crawl"
+            )
+            self.stop_reason = STOP_PLATEAU
+
+    def _can_dispatch(self, score: float, in_flight: Dict[asyncio.Task, FrontierItem]) -> bool:
+        """
+        Decide whether the head of the queue may start while other fetches are
+        still running. A fetch is only started early if its score is within
+        score_drift of the best page currently in flight; otherwise we wait for
+        the running pages, which may discover better links.
+        """
+        if not in_flight:
+            return True
+        best_in_flight = min(item[0] for item in in_flight.values())
+        return score - best_in_flight <= self.score_drift
+
+    async def _arun_best_first(
+        self,
+        start_url: str,
+        crawler: AsyncWebCrawler,
+        config: CrawlerRunConfig,
+    ) -> AsyncGenerator[CrawlResult, None]:
+        """
+        Core best-first crawl method using a priority queue.
+        
+        Frontier items are tuples of (score, depth, url, parent_url). Lower scores
+        are treated as higher priority. Up to max_concurrency pages are fetched at
+        once, and a new URL is taken from the queue as soon as any fetch finishes.
+        """
+        if self.shared_frontier is not None:
+            async for result in self._arun_shared(start_url, crawler, config):
+                yield result
+            return
+
+        if self.url_normalizer:
+            start_url = self.url_normalizer(start_url)
+        frontier = BestFirstFrontier(
+            max_size=self.max_frontier_size,
+            spill_to_disk=self.spill_frontier_to_disk,
+            logger=self.logger,
+        )
+        self._frontier = frontier
+        if self.resume_state:
+            for priority, depth, url, parent_url in self.resume_state["frontier"]:
+                frontier.push(priority, depth, url, parent_url)
+            visited = restore_visited_set(self.resume_state["visited"], self.visited_mode, self.visited_error_rate)
+            self._pages_crawled = self.resume_state["pages_crawled"]
+            self.logger.info(f"Resuming crawl with {len(frontier)} queued and {len(visited)} visited URLs")
+        else:
+            visited = create_visited_set(self.visited_mode, self.visited_error_rate)
+            start_score = self.url_scorer.score(start_url) if self.url_scorer else 0
+            frontier.push(-start_score, 0, start_url, None)
+            for item in await self._seed_items(start_url, start_score):
+                frontier.push(*item)
+        in_flight: Dict[asyncio.Task, FrontierItem] = {}
+        last_checkpoint = self._pages_crawled
+        page_config = config.clone(deep_crawl_strategy=None, stream=False)
+
+        try:
+            while not self._cancel_event.is_set():
+                while len(in_flight) < self.max_concurrency and len(frontier) and self.stop_reason is None:
+                    if self._pages_crawled + len(in_flight) >= self.max_pages:
+                        break
+                    score, depth, url, parent_url = frontier.peek()
+                    if not self._can_dispatch(score, in_flight):
+                        break
+                    item = frontier.pop()
+                    visited.add(url)
+                    in_flight[asyncio.create_task(crawler.arun(url, config=page_config))] = item
+
+                if not in_flight:
+                    if self._pages_crawled >= self.max_pages:
+                        self.logger.info(f"Max pages limit ({self.max_pages}) reached, stopping crawl")
+                        self.stop_reason = self.stop_reason or STOP_PAGES
+                    elif self._links_below_min_score and self.stop_reason is None:
+                        self.logger.info(f"No further links score above {self.min_score}, stopping crawl")
+                        self.stop_reason = STOP_MIN_SCORE
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    score, depth, url, parent_url = in_flight.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        self.logger.warning(f"Failed to crawl {url}: {e}")
+                        self.stats.urls_failed += 1
+                        continue
+
+                    self._prepare_result(result, (score, depth, url, parent_url))
+
+                    if result.success:
+                        self._pages_crawled += 1
+                        self._observe_relevance(-score)
+
+                    yield result
+
+                    if result.success:
+                        # Depths of this page's links only; queued URLs carry their depth in the frontier
+                        new_links: List[Tuple[str, Optional[str]]] = []
+                        depths: Dict[str, int] = {}
+                        with self._timed("link_discovery"):
+                            await self.link_discovery(result, result.url, depth, visited, new_links, depths)
+
+                        with self._timed("scoring"):
+                            new_scores = self._score_many([new_url for new_url, _ in new_links], result, -score)
+                            for (new_url, new_parent), new_score in self._select_links(new_links, new_scores, depth):
+                                new_depth = depths.get(new_url, depth + 1)
+                                frontier.push(-new_score, new_depth, new_url, new_parent)
+
+                    if self.checkpoint_callback and self._pages_crawled - last_checkpoint >= self.checkpoint_interval:
+                        last_checkpoint = self._pages_crawled
+                        await self.checkpoint_callback(self._checkpoint_state(frontier, visited, in_flight))
+        finally:
+            for task in in_flight:
+                task.cancel()
+            frontier.close()
+            self._frontier = None
+
+        # End of crawl.
+
+    def _prepare_result(self, result: CrawlResult, item: FrontierItem) -> CrawlResult:
+        score, depth, _, parent_url = item
+        result.metadata = result.metadata or {}
+        result.metadata["depth"] = depth
+        result.metadata["parent_url"] = parent_url
+        result.metadata["score"] = -score
+        return result
+
+    async def _arun_shared(
+        self,
+        start_url: str,
+        crawler: AsyncWebCrawler,
+        config: CrawlerRunConfig,
+    ) -> AsyncGenerator[CrawlResult, None]:
+        """
+        Best-first crawl cooperating with other workers through a shared
+        frontier. URLs are claimed in priority order from the partitions this
+        worker owns, discovered links go back to the shared frontier, and the
+        crawl ends once no worker has URLs queued or leased.
+
+        Every claim is already the best URL available, so score_drift does not
+        apply here; max_pages counts the pages of all workers together.
+        """
+        shared = self.shared_frontier
+        if self.url_normalizer:
+            start_url = self.url_normalizer(start_url)
+        await shared.heartbeat()
+        start_score = self.url_scorer.score(start_url) if self.url_scorer else 0
+        # Only the first worker of the crawl actually queues the start URL
+        await shared.add([(-start_score, 0, start_url, None)] + await self._seed_items(start_url, start_score))
+
+        # URLs this worker claimed; the shared frontier knows about everyone else's
+        known = create_visited_set(self.visited_mode, self.visited_error_rate)
+        known.add(start_url)
+        in_flight: Dict[asyncio.Task, FrontierItem] = {}
+        page_config = config.clone(deep_crawl_strategy=None, stream=False)
+
+        try:
+            while not self._cancel_event.is_set():
+                leased = [item[2] for item in in_flight.values()]
+                # Slow fetches must not outlive their leases, even while no slot is free
+                await shared.keep_alive(leased)
+                free = self.max_concurrency - len(in_flight)
+                if free > 0 and self._pages_crawled + len(in_flight) < self.max_pages and self.stop_reason is None:
+                    for item in await shared.claim(free, leased):
+                        known.add(item[2])
+                        in_flight[asyncio.create_task(crawler.arun(item[2], config=page_config))] = item
+
+                if not in_flight:
+                    if self._pages_crawled >= self.max_pages:
+                        self.logger.info(f"Max pages limit ({self.max_pages}) reached, stopping crawl")
+                        self.stop_reason = self.stop_reason or STOP_PAGES
+                        break
+                    if self.stop_reason is not None:
+                        break
+                    if await shared.finished():
+                        if self._links_below_min_score:
+                            self.logger.info(f"No further links score above {self.min_score}, stopping crawl")
+                            self.stop_reason = STOP_MIN_SCORE
+                        break
+                    await asyncio.sleep(SHARED_POLL_SECONDS)
+                    continue
+
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=SHARED_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    item = in_flight.pop(task)
+                    score, depth, url, _ = item
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        self.logger.warning(f"Failed to crawl {url}: {e}")
+                        self.stats.urls_failed += 1
+                        await shared.complete(url, False)
+                        continue
+
+                    pages_crawled = await shared.complete(url, result.success)
+                    if pages_crawled is None:
+                        # The lease ran out and the URL went back to the frontier
+                        self.logger.info(f"Lease on {url} expired before it was crawled, leaving it to the frontier")
+                        continue
+                    self._pages_crawled = pages_crawled
+                    self._prepare_result(result, item)
+                    if result.success:
+                        self._observe_relevance(-score)
+
+                    yield result
+
+                    if result.success:
+                        new_links: List[Tuple[str, Optional[str]]] = []
+                        depths: Dict[str, int] = {}
+                        with self._timed("link_discovery"):
+                            await self.link_discovery(result, result.url, depth, known, new_links, depths)
+
+                        with self._timed("scoring"):
+                            new_scores = self._score_many([new_url for new_url, _ in new_links], result, -score)
+                        await shared.add([
+                            (-new_score, depths.get(new_url, depth + 1), new_url, new_parent)
+                            for (new_url, new_parent), new_score in self._select_links(new_links, new_scores, depth)
+                        ])
+        finally:
+            for task in in_flight:
+                task.cancel()
+            # Unfinished URLs go back to the shared frontier for the other workers
+            await shared.leave([item[2] for item in in_flight.values()])
+
+    def _checkpoint_state(
+        self,
+        frontier: BestFirstFrontier,
+        visited: Any,
+        in_flight: Dict[asyncio.Task, FrontierItem],
+    ) -> Dict[str, Any]:
+        """
+        Capture the traversal state. Pages still in flight are put back into the
+        frontier so a resumed crawl fetches them again; they stay in the visited
+        set, which only keeps rediscovered links from being queued twice.
+        """
+        return {
+            "frontier": frontier.snapshot() + list(in_flight.values()),
+            "visited": visited.state(),
+            "pages_crawled": self._pages_crawled,
+        }
+
+    async def _arun_batch(
+        self,
+        start_url: str,
+        crawler: AsyncWebCrawler,
+        config: CrawlerRunConfig,
+    ) -> List[CrawlResult]:
+        """
+        Best-first crawl in batch mode.
+        
+        Aggregates all CrawlResults into a list.
+        """
+        results: List[CrawlResult] = []
+        async for result in self._arun_best_first(start_url, crawler, config):
+            results.append(result)
+        return results
+
+    async def _arun_stream(
+        self,
+        start_url: str,
+        crawler: AsyncWebCrawler,
+        config: CrawlerRunConfig,
+    ) -> AsyncGenerator[CrawlResult, None]:
+        """
+        Best-first crawl in streaming mode.
+        
+        Yields CrawlResults as they become available.
+        """
+        async for result in self._arun_best_first(start_url, crawler, config):
+            yield result
+
+    async def arun(
+        self,
+        start_url: str,
+        crawler: AsyncWebCrawler,
+        config: Optional[CrawlerRunConfig] = None,
+    ) -> "RunManyReturn":
+        """
+        Main entry point for best-first crawling.
+        
+        Returns either a list (batch mode) or an async generator (stream mode)
+        of CrawlResults.
+        """
+        if config is None:
+            raise ValueError("CrawlerRunConfig must be provided")
+        if config.stream:
+            return self._arun_stream(start_url, crawler, config)
+        else:
+            return await self._arun_batch(start_url, crawler, config)
+
+    async def shutdown(self) -> None:
+        """
+        Signal cancellation and clean up resources.
+        """
+        self._cancel_event.set()
+        self.stats.end_time = datetime.now()
\ No newline at end of file
@@ -0,0 +1,214 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional, List
+from crawl4ai import AsyncWebCrawler, BrowserConfig, HTTPCrawlerConfig
+from crawl4ai.async_crawler_strategy import AsyncHTTPCrawlerStrategy
+from metrics import instrument_browser, time_phase
+from rendering import install_render_profiles
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+
+class BrowserSlot:
+    def __init__(self, slot_id: int, browser_config: BrowserConfig):
+        self.slot_id = slot_id
+        self.browser_config = browser_config
+        self.crawler: Optional[AsyncWebCrawler] = None
+        self.pages_served = 0
+        self.active = 0
+        self.draining = False
+        self.ready = asyncio.Event()
+        self._restart_lock = asyncio.Lock()
+
+    @property
+    def browser(self):
+        return self.crawler.crawler_strategy.browser_manager.browser
+
+    def is_healthy(self) -> bool:
+        try:
+            return self.crawler is not None and self.browser is not None and self.browser.is_connected()
+        except Exception:
+            return False
+
+    async def start(self):
+        self.crawler = AsyncWebCrawler(config=self.browser_config)
+        instrument_browser(self.crawler.crawler_strategy)
+        install_render_profiles(self.crawler.crawler_strategy)
+        try:
+            with time_phase("browser_launch"):
+                await self.crawler.start()
+        except Exception:
+            # Leave the slot unhealthy but usable so the next lease retries the launch
+            self.crawler = None
+            self.ready.set()
+            raise
+        self.pages_served = 0
+        self.draining = False
+        self.ready.set()
+        logger.info(f"Browser slot {self.slot_id} started")
+
+    async def close(self):
+        self.ready.clear()
+        try:
+            if self.crawler is not None:
+                await self.crawler.close()
+        except Exception:
+            logger.exception(f"Error while closing browser slot {self.slot_id}")
+        self.crawler = None
+
+    async def restart(self):
+        async with self._restart_lock:
+            await self.close()
+            await self.start()
+
+    async def ensure_started(self):
+        """Launch the browser again after a failed start; raises if it fails again."""
+        async with self._restart_lock:
+            if self.crawler is None:
+                await self.start()
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = 2,
+        recycle_after_pages: int = 200,
+        health_check_interval: float = 30.0,
+        headless: bool = True,
+    ):
+        self.size = max(1, size)
+        self.recycle_after_pages = recycle_after_pages
+        self.health_check_interval = health_check_interval
+        self.browser_config = BrowserConfig(headless=headless)
+        self._slots: List[BrowserSlot] = []
+        self.http_crawler: Optional[AsyncWebCrawler] = None
+        self._lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self._started = False
+
+    async def start(self):
+        async with self._lock:
+            if self._started:
+                return
+            self._slots = [BrowserSlot(i, self.browser_config) for i in range(self.size)]
+            outcomes = await asyncio.gather(*(slot.start() for slot in self._slots), return_exceptions=True)
+            for slot, outcome in zip(self._slots, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Browser slot {slot.slot_id} failed to launch: {outcome}")
+            self.http_crawler = AsyncWebCrawler(
+                crawler_strategy=AsyncHTTPCrawlerStrategy(browser_config=HTTPCrawlerConfig())
+            )
+            try:
+                await self.http_crawler.start()
+            except Exception:
+                # Do not leave the browsers just launched running behind a pool that never started
+                await asyncio.gather(*(slot.close() for slot in self._slots))
+                self._slots = []
+                self.http_crawler = None
+                raise
+            self._health_task = asyncio.create_task(self._health_loop())
+            self._started = True
+            logger.info(f"Browser pool started with {self.size} browsers")
+
+    async def close(self):
+        async with self._lock:
+            if not self._started:
+                return
+            if self._health_task is not None:
+                self._health_task.cancel()
+                try:
+                    await self._health_task
+                except asyncio.CancelledError:
+                    pass
+                self._health_task = None
+            await asyncio.gather(*(slot.close() for slot in self._slots))
+            self._slots = []
+            if self.http_crawler is not None:
+                await self.http_crawler.close()
+                self.http_crawler = None
+            self._started = False
+            logger.info("Browser pool closed")
+
+    def _pick_slot(self) -> BrowserSlot:
+        candidates = [slot for slot in self._slots if not slot.draining] or self._slots
+        return min(candidates, key=lambda slot: (slot.active, slot.pages_served))
+
+    @asynccontextmanager
+    async def acquire(self):
+        """
+        Lease the least busy browser of the pool. Browsers are shared between
+        concurrent crawls; a browser is only restarted once nobody holds it.
+        """
+        await self.start()
+        slot = await self._lease()
+        try:
+            yield slot
+        finally:
+            await self._release(slot)
+
+    async def _lease(self) -> BrowserSlot:
+        for _ in range(len(self._slots)):
+            slot = self._pick_slot()
+            slot.active += 1
+            try:
+                await slot.ready.wait()
+                if slot.crawler is None:
+                    # An earlier launch failed, so nobody is using the slot's browser
+                    logger.warning(f"Browser slot {slot.slot_id} has no browser, launching it")
+                    await slot.ensure_started()
+                elif not slot.is_healthy():
+                    if slot.active > 1:
+                        # Other crawls still hold the browser; it is replaced once they let go
+                        logger.warning(f"Browser slot {slot.slot_id} is unhealthy and in use, draining it")
+                        slot.draining = True
+                        await self._release(slot)
+                        continue
+                    logger.warning(f"Browser slot {slot.slot_id} is unhealthy, replacing it")
+                    await slot.restart()
+            except BaseException:
+                await self._release(slot)
+                raise
+            return slot
+        # Every browser is draining; share the least busy one until they are replaced
+        slot = self._pick_slot()
+        slot.active += 1
+        return slot
+
+    async def _release(self, slot: BrowserSlot):
+        slot.active -= 1
+        if slot.pages_served >= self.recycle_after_pages:
+            slot.draining = True
+        if slot.draining and slot.active == 0:
+            logger.info(f"Recycling browser slot {slot.slot_id} after {slot.pages_served} pages")
+            try:
+                await slot.restart()
+            except Exception:
+                # The next lease of the slot launches it again
+                logger.exception(f"Could not restart browser slot {slot.slot_id}")
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for slot in self._slots:
+                if slot.active == 0 and not slot.is_healthy():
+                    logger.warning(f"Health check failed for browser slot {slot.slot_id}, replacing it")
+                    try:
+                        await slot.restart()
+                    except Exception:
+                        logger.exception(f"Could not restart browser slot {slot.slot_id}")
+
+
+_browser_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool() -> BrowserPool:
+    global _browser_pool
+    if _browser_pool is None:
+        _browser_pool = BrowserPool(
+            size=int(os.getenv("CRAWLER_POOL_SIZE", "2")),
+            recycle_after_pages=int(os.getenv("CRAWLER_POOL_RECYCLE_AFTER_PAGES", "200")),
+            health_check_interval=float(os.getenv("CRAWLER_POOL_HEALTH_CHECK_INTERVAL", "30")),
+        )
+    return _browser_pool
@@ -0,0 +1,138 @@
+import os
+import time
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Dict, Optional, TypeVar
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+STOP_PAGES = "max_pages"
+STOP_TIME = "max_seconds"
+STOP_BYTES = "max_bytes"
+# Set by the best-first strategy (best_first_strategy.py) when it stops early
+STOP_MIN_SCORE = "min_score"
+STOP_PLATEAU = "relevance_plateau"
+
+T = TypeVar("T")
+
+
+def _env_limit(name: str, cast):
+    value = os.getenv(name)
+    return cast(value) if value else None
+
+
+class CrawlBudget:
+    """
+    Limits of one crawl, shared by the crawl wrapper, its gateway and its
+    strategy. Once a limit is reached the gateway stops fetching and the
+    crawl ends with the pages it already has.
+    """
+
+    def __init__(
+        self,
+        max_pages: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+        max_fanout_per_depth: Optional[Dict[int, int]] = None,
+    ):
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.max_fanout_per_depth = max_fanout_per_depth or {}
+        self.started = time.monotonic()
+        self.pages = 0
+        self.bytes = 0
+        self.stop_reason: Optional[str] = None
+
+    @classmethod
+    def with_defaults(cls, **limits) -> "CrawlBudget":
+        """Fill unset page, time and byte limits from CRAWLER_DEFAULT_MAX_* variables."""
+        defaults = {
+            "max_pages": _env_limit("CRAWLER_DEFAULT_MAX_PAGES", int),
+            "max_seconds": _env_limit("CRAWLER_DEFAULT_MAX_SECONDS", float),
+            "max_bytes": _env_limit("CRAWLER_DEFAULT_MAX_BYTES", int),
+        }
+        return cls(**{**defaults, **{key: value for key, value in limits.items() if value is not None}})
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self.max_seconds is None:
+            return None
+        return max(0.0, self.max_seconds - self.elapsed)
+
+    def fanout(self, depth: int) -> Optional[int]:
+        """Most links followed from one page at this depth, or None for no limit."""
+        return self.max_fanout_per_depth.get(depth)
+
+    def add_page(self):
+        self.pages += 1
+
+    def add_bytes(self, count: int):
+        self.bytes += count
+
+    def stop(self, reason: str):
+        if self.stop_reason is None:
+            self.stop_reason = reason
+            logger.info(f"Stopping crawl ({reason}) after {self.pages} pages, {self.bytes} bytes, {self.elapsed:.1f}s")
+
+    def exhausted(self) -> bool:
+        if self.stop_reason is None:
+            if self.max_pages is not None and self.pages >= self.max_pages:
+                self.stop(STOP_PAGES)
+            elif self.max_seconds is not None and self.elapsed >= self.max_seconds:
+                self.stop(STOP_TIME)
+            elif self.max_bytes is not None and self.bytes >= self.max_bytes:
+                self.stop(STOP_BYTES)
+        return self.stop_reason is not None
+
+    def summary(self) -> dict:
+        return {
+            "stop_reason": self.stop_reason,
+            "pages_fetched": self.pages,
+            "bytes_downloaded": self.bytes,
+            "elapsed_seconds": round(self.elapsed, 3),
+        }
+
+
+async def within_budget(results: AsyncIterable[T], budget: Optional[CrawlBudget]) -> AsyncIterator[T]:
+    """
+    Pass results through until the budget runs out. The time limit also
+    interrupts a fetch that is still pending; the source generator is closed
+    either way, which cancels whatever it still has in flight.
+    """
+    iterator = results.__aiter__()
+    try:
+        while budget is None or not budget.exhausted():
+            try:
+                timeout = budget.remaining_seconds() if budget is not None else None
+                result = await asyncio.wait_for(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                budget.stop(STOP_TIME)
+                return
+            yield result
+    finally:
+        aclose = getattr(iterator, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+class FanoutLimitMixin:
+    """
+    For crawl4ai's BFS/DFS strategies: keep at most budget.fanout(depth) of
+    the links discovered on a page at that depth.
+    """
+
+    budget: Optional[CrawlBudget] = None
+
+    async def link_discovery(self, result, source_url, current_depth, visited, next_level, depths):
+        start = len(next_level)
+        await super().link_discovery(result, source_url, current_depth, visited, next_level, depths)
+        limit = self.budget.fanout(current_depth) if self.budget is not None else None
+        if limit is not None and len(next_level) - start > limit:
+            self.stats.urls_skipped += len(next_level) - start - limit
+            del next_level[start + limit:]
@@ -0,0 +1,137 @@
+import os
+import glob
+import gzip
+import json
+import time
+import uuid
+from typing import Optional, List, Dict, Any
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+
+class CrawlCheckpoint:
+    def __init__(
+        self,
+        job_id: str,
+        request: Dict[str, Any],
+        started_at: Optional[float] = None,
+        completed: Optional[List[dict]] = None,
+        strategy_state: Optional[Dict[str, Any]] = None,
+        log_id: Optional[str] = None,
+    ):
+        self.job_id = job_id
+        self.request = request
+        self.started_at = started_at or time.time()
+        self.completed = completed or []
+        self.strategy_state = strategy_state
+        # Each run of a job logs its completed pages to its own file, so a
+        # resumed run never overwrites the log its resume state points to
+        self.log_id = log_id or uuid.uuid4().hex[:8]
+        self.saved_pages = len(self.completed)
+
+    def record_page(self, page: dict):
+        self.completed.append({key: value for key, value in page.items() if key != "fit_markdown"})
+
+    def to_dict(self) -> dict:
+        """Everything but the completed pages, which the store appends to a separate log."""
+        return {
+            "job_id": self.job_id,
+            "request": self.request,
+            "started_at": self.started_at,
+            "log_id": self.log_id,
+            "pages": len(self.completed),
+            "strategy_state": self.strategy_state,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, completed: Optional[List[dict]] = None) -> "CrawlCheckpoint":
+        return cls(
+            job_id=data["job_id"],
+            request=data["request"],
+            started_at=data.get("started_at"),
+            completed=data.get("completed", completed),
+            strategy_state=data.get("strategy_state"),
+            log_id=data.get("log_id"),
+        )
+
+
+class CheckpointStore:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{os.path.basename(job_id)}.json.gz")
+
+    def pages_path(self, job_id: str, log_id: str) -> str:
+        return os.path.join(self.directory, f"{os.path.basename(job_id)}.{log_id}.pages.jsonl")
+
+    def load(self, job_id: str) -> Optional[CrawlCheckpoint]:
+        path = self.path(job_id)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        pages = self._load_pages(job_id, data["log_id"], data["pages"]) if "log_id" in data else None
+        return CrawlCheckpoint.from_dict(data, pages)
+
+    def _load_pages(self, job_id: str, log_id: str, count: int) -> List[dict]:
+        # Pages logged after the last state was written belong to no checkpoint yet
+        pages = []
+        path = self.pages_path(job_id, log_id)
+        if count and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if len(pages) >= count:
+                        break
+                    pages.append(json.loads(line))
+        return pages
+
+    def save(self, checkpoint: CrawlCheckpoint):
+        """Append the pages completed since the last save to the page log, then rewrite the small state file."""
+        new_pages = checkpoint.completed[checkpoint.saved_pages:]
+        first_save = checkpoint.saved_pages == 0
+        pages_path = self.pages_path(checkpoint.job_id, checkpoint.log_id)
+        with open(pages_path, "a" if not first_save else "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(page) + "\n" for page in new_pages)
+        checkpoint.saved_pages = len(checkpoint.completed)
+
+        path = self.path(checkpoint.job_id)
+        temp_path = f"{path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(checkpoint.to_dict(), f)
+        os.replace(temp_path, path)
+        if first_save:
+            # The state file no longer points to the logs of earlier runs
+            self._remove_logs(checkpoint.job_id, keep=pages_path)
+        logger.debug(f"Checkpointed job {checkpoint.job_id} after {len(checkpoint.completed)} pages")
+
+    def _remove_logs(self, job_id: str, keep: Optional[str] = None):
+        pattern = os.path.join(glob.escape(self.directory), f"{glob.escape(os.path.basename(job_id))}.*.pages.jsonl")
+        for log_path in glob.glob(pattern):
+            if log_path != keep:
+                try:
+                    os.remove(log_path)
+                except FileNotFoundError:
+                    pass
+
+    def delete(self, job_id: str):
+        try:
+            os.remove(self.path(job_id))
+        except FileNotFoundError:
+            pass
+        self._remove_logs(job_id)
+
+
+_checkpoint_store: Optional[CheckpointStore] = None
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        _checkpoint_store = CheckpointStore(os.getenv(
+            "CRAWLER_CHECKPOINT_DIR",
+            os.path.join(os.path.expanduser("~"), ".web_crawler", "checkpoints"),
+        ))
+    return _checkpoint_store
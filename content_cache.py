@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import asyncio
+import threading
+from contextlib import nullcontext
+from typing import Optional
+import httpx
+from url_canonicalizer import default_canonicalizer
+from politeness import HostScheduler
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+READ_THROUGH = "read_through"
+REFRESH_STALE = "refresh_stale"
+BYPASS = "bypass"
+CACHE_MODES = (READ_THROUGH, REFRESH_STALE, BYPASS)
+
+
+def cache_key(url: str, variant: str = "") -> str:
+    """
+    Canonical URL, plus the fingerprint of the extraction settings the page
+    was processed with, so one strategy's markdown and links are never
+    served to another.
+    """
+    key = default_canonicalizer(url)
+    return f"{key}#{variant}" if variant else key
+
+
+class CachedPage:
+    def __init__(self, url, html, fit_markdown, links, etag, last_modified, fetched_at, variant=""):
+        self.url = url
+        self.variant = variant
+        self.html = html
+        self.fit_markdown = fit_markdown
+        self.links = links
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.time() - self.fetched_at < ttl_seconds
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class ContentCache:
+    def __init__(self, db_path: str, ttl_seconds: float = 86400, max_bytes: int = 512 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._http: Optional[httpx.AsyncClient] = None
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "url TEXT PRIMARY KEY, html BLOB, fit_markdown TEXT, links TEXT, "
+            "etag TEXT, last_modified TEXT, fetched_at REAL, last_access REAL, size INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_last_access ON pages(last_access)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def get(self, url: str, variant: str = "") -> Optional[CachedPage]:
+        key = cache_key(url, variant)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html, fit_markdown, links, etag, last_modified, fetched_at FROM pages WHERE url = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), key))
+            self._conn.commit()
+        html, fit_markdown, links, etag, last_modified, fetched_at = row
+        return CachedPage(
+            url=url,
+            html=zlib.decompress(html).decode("utf-8") if html else "",
+            fit_markdown=fit_markdown,
+            links=json.loads(links) if links else {},
+            etag=etag,
+            last_modified=last_modified,
+            fetched_at=fetched_at,
+            variant=variant,
+        )
+
+    def put(self, url: str, html: str, fit_markdown: Optional[str], links: dict,
+            etag: Optional[str] = None, last_modified: Optional[str] = None, variant: str = ""):
+        key = cache_key(url, variant)
+        compressed = zlib.compress((html or "").encode("utf-8"))
+        links_json = json.dumps(links or {})
+        size = len(compressed) + len(fit_markdown or "") + len(links_json)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM pages WHERE url = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, compressed, fit_markdown, links_json, etag, last_modified, now, now, size),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict()
+            self._conn.commit()
+
+    def touch(self, url: str, variant: str = ""):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET fetched_at = ?, last_access = ? WHERE url = ?", (now, now, cache_key(url, variant))
+            )
+            self._conn.commit()
+
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        rows = self._conn.execute("SELECT url, size FROM pages ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for url, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((url,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM pages WHERE url = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} pages from the content cache")
+
+    async def aget(self, url: str, variant: str = "") -> Optional[CachedPage]:
+        return await asyncio.to_thread(self.get, url, variant)
+
+    async def aput(self, url: str, html: str, fit_markdown: Optional[str], links: dict,
+                   etag: Optional[str] = None, last_modified: Optional[str] = None, variant: str = ""):
+        await asyncio.to_thread(self.put, url, html, fit_markdown, links, etag, last_modified, variant)
+
+    async def revalidate(self, page: CachedPage, scheduler: Optional[HostScheduler] = None) -> bool:
+        """
+        Send a conditional GET for a stale page. Returns True when the server
+        answers 304 and the cached copy is still valid. With a scheduler the
+        request honours robots.txt and takes a per-host slot like any fetch.
+        """
+        if not page.has_validators:
+            return False
+        if scheduler is not None and not await scheduler.allowed(page.url):
+            return False
+        headers = {}
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+        if self._http is None:
+            self._http = httpx.AsyncClient(follow_redirects=True, timeout=15.0)
+        try:
+            async with scheduler.slot(page.url) if scheduler is not None else nullcontext():
+                response = await self._http.get(page.url, headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning(f"Revalidation of {page.url} failed: {e}")
+            return False
+        if scheduler is not None:
+            scheduler.record_response(page.url, response.status_code, dict(response.headers))
+        if response.status_code != 304:
+            return False
+        await asyncio.to_thread(self.touch, page.url, page.variant)
+        return True
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        with self._lock:
+            self._conn.close()
+
+
+_content_cache: Optional[ContentCache] = None
+
+
+def get_content_cache() -> ContentCache:
+    global _content_cache
+    if _content_cache is None:
+        cache_dir = os.getenv("CRAWLER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".web_crawler"))
+        _content_cache = ContentCache(
+            db_path=os.path.join(cache_dir, "content_cache.sqlite"),
+            ttl_seconds=float(os.getenv("CRAWLER_CACHE_TTL_SECONDS", "86400")),
+            max_bytes=int(os.getenv("CRAWLER_CACHE_MAX_MB", "512")) * 1024 * 1024,
+        )
+    return _content_cache
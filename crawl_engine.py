@@ -0,0 +1,402 @@
+import os
+import asyncio
+import importlib
+import math
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from crawl4ai import CrawlerRunConfig, CacheMode
+from crawl4ai.deep_crawling import BFSDeepCrawlStrategy, DFSDeepCrawlStrategy
+from crawl4ai.models import CrawlResult
+from log_manager import LoggerUtility
+from best_first_strategy import VISITED_ERROR_RATE, VISITED_EXACT, BestFirstCrawlingStrategy
+from budgets import CrawlBudget, FanoutLimitMixin, within_budget
+from browser_pool import BrowserPool, BrowserSlot, get_browser_pool
+from content_cache import BYPASS, get_content_cache
+from crawl_gateway import CrawlGateway
+from extraction import config_fingerprint, get_extraction_pool
+from incremental import IncrementalCrawl
+from metrics import (
+    FRONTIER_SIZE, URLS_SKIPPED, TimedMarkdownGenerator, TimedPruningContentFilter, TimedScrapingStrategy, time_phase,
+)
+from near_duplicates import DEDUP_OFF
+from politeness import get_host_scheduler
+from scoring import SCORING_CONTENT, PriorityBoostScorer, create_scorer
+from shared_frontier import SharedFrontier
+from rendering import PROFILE_BALANCED, RENDER_BROWSER, WAIT_DOM_STABLE, readiness_config, render_profile_config
+from url_canonicalizer import URLCanonicalizer, default_canonicalizer
+
+logger = LoggerUtility().get_logger()
+
+STRATEGY_BEST_FIRST = "best first"
+STRATEGY_BREADTH_FIRST = "breadth first"
+STRATEGY_DEPTH_FIRST = "depth first"
+
+# Depth limit for strategies that keep crawl4ai's in-memory visited sets
+MAX_IN_MEMORY_CRAWL_DEPTH = 3
+
+# Browser interaction used by the breadth and depth first crawls
+INTERACTIVE_CONFIG = {
+    "excluded_tags": ["nav", "footer", "header", "script", "style", "aside"],
+    "only_text": True,
+    "exclude_external_links": True,
+    "magic": True,
+    "verbose": True,
+    "override_navigator": True,
+    "scan_full_page": True,
+    "wait_for_images": True,
+    "simulate_user": True,
+    "adjust_viewport_to_content": True,
+    "remove_overlay_elements": True,
+    "user_agent_mode": "random",
+}
+
+
+class CrawlOptions:
+    """Per-request settings of a crawl; browsers and page configs are shared by the engine."""
+
+    def __init__(
+        self,
+        cache_mode: str = BYPASS,
+        cache_ttl: Optional[float] = None,
+        max_concurrency: int = 5,
+        render_mode: str = RENDER_BROWSER,
+        wait_strategy: str = WAIT_DOM_STABLE,
+        wait_selector: Optional[str] = None,
+        render_profile: str = PROFILE_BALANCED,
+        replay_since: Optional[float] = None,
+        near_duplicates: str = DEDUP_OFF,
+        fetch_budget: Optional[asyncio.Semaphore] = None,
+        budget: Optional[CrawlBudget] = None,
+        incremental: Optional[IncrementalCrawl] = None,
+    ):
+        self.cache_mode = cache_mode
+        self.cache_ttl = cache_ttl
+        self.max_concurrency = max_concurrency
+        self.render_mode = render_mode
+        self.wait_strategy = wait_strategy
+        self.wait_selector = wait_selector
+        self.render_profile = render_profile
+        self.replay_since = replay_since
+        self.near_duplicates = near_duplicates
+        self.fetch_budget = fetch_budget
+        self.budget = budget
+        self.incremental = incremental
+
+    @property
+    def max_pages(self) -> float:
+        return self.budget.max_pages if self.budget and self.budget.max_pages else math.inf
+
+
+class CrawlStrategy:
+    """
+    A registered crawl strategy: builds the crawl4ai deep crawl strategy for
+    one request and turns its results into page records. Subclasses in plug-in
+    modules are added with register_strategy().
+    """
+
+    name = ""
+    requires_keywords = False
+    accepts_keywords = True
+    max_depth: Optional[int] = None
+    markdown_options = {"ignore_links": True}
+    config_options: dict = {}
+
+    def create(self, engine: "CrawlEngine", options: CrawlOptions, depth: int, **params):
+        raise NotImplementedError
+
+    async def track(self, deep_strategy, results: AsyncIterator[CrawlResult], options: CrawlOptions):
+        """Hook around the result stream, e.g. for strategy-specific metrics."""
+        async for result in results:
+            yield result
+
+    def page_record(self, result: CrawlResult) -> dict:
+        return {
+            "url": result.url,
+            "fit_markdown": result.markdown.fit_markdown if result.markdown else None,
+        }
+
+
+class SeedLinksMixin:
+    """
+    For crawl4ai's BFS/DFS strategies: URLs found without rendering
+    (sitemaps, feeds) join the start page's links, so the first level
+    already covers them.
+    """
+
+    seed_urls: List[str] = []
+
+    async def link_discovery(self, result, source_url, current_depth, visited, next_level, depths):
+        if current_depth != 0 or not self.seed_urls:
+            return await super().link_discovery(result, source_url, current_depth, visited, next_level, depths)
+        links = result.links or {}
+        result.links = {**links, "internal": list(links.get("internal", [])) + [{"href": url} for url in self.seed_urls]}
+        try:
+            await super().link_discovery(result, source_url, current_depth, visited, next_level, depths)
+        finally:
+            result.links = links
+
+
+class BudgetedBFSStrategy(FanoutLimitMixin, SeedLinksMixin, BFSDeepCrawlStrategy):
+    def __init__(self, *args, budget: Optional[CrawlBudget] = None, seed_urls: Optional[List[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+        self.seed_urls = seed_urls or []
+
+
+class BudgetedDFSStrategy(FanoutLimitMixin, SeedLinksMixin, DFSDeepCrawlStrategy):
+    def __init__(self, *args, budget: Optional[CrawlBudget] = None, seed_urls: Optional[List[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+        self.seed_urls = seed_urls or []
+
+
+class BreadthFirstStrategy(CrawlStrategy):
+    name = STRATEGY_BREADTH_FIRST
+    accepts_keywords = False
+    max_depth = MAX_IN_MEMORY_CRAWL_DEPTH
+    markdown_options = {"ignore_links": True, "skip_internal_links": True}
+    config_options = INTERACTIVE_CONFIG
+    deep_strategy_class = BudgetedBFSStrategy
+
+    def create(
+        self,
+        engine: "CrawlEngine",
+        options: CrawlOptions,
+        depth: int,
+        seed_urls: Optional[List[str]] = None,
+        **params,
+    ):
+        return self.deep_strategy_class(
+            max_depth=depth,
+            include_external=False,
+            max_pages=options.max_pages,
+            budget=options.budget,
+            seed_urls=seed_urls,
+        )
+
+
+class DepthFirstStrategy(BreadthFirstStrategy):
+    name = STRATEGY_DEPTH_FIRST
+    markdown_options = {"ignore_links": True}
+    deep_strategy_class = BudgetedDFSStrategy
+
+
+class BestFirstStrategy(CrawlStrategy):
+    name = STRATEGY_BEST_FIRST
+    requires_keywords = True
+
+    def create(
+        self,
+        engine: "CrawlEngine",
+        options: CrawlOptions,
+        depth: int,
+        keywords: Optional[List[str]] = None,
+        score_drift: Optional[float] = None,
+        resume_state: Optional[dict] = None,
+        checkpoint_callback: Optional[Callable[[dict], Awaitable[None]]] = None,
+        scoring: str = SCORING_CONTENT,
+        shared_frontier: Optional[SharedFrontier] = None,
+        visited_set: str = VISITED_EXACT,
+        visited_error_rate: float = VISITED_ERROR_RATE,
+        min_score: Optional[float] = None,
+        plateau_window: Optional[int] = None,
+        plateau_ratio: float = 0.1,
+        seed_urls: Optional[List[str]] = None,
+        **params,
+    ):
+        scorer = create_scorer(
+            keywords=keywords,
+            scoring=scoring,
+            weight=0.7,
+            normalizer=engine.canonicalizer,
+        )
+        if options.incremental is not None:
+            scorer = PriorityBoostScorer(scorer, options.incremental.priority)
+        return BestFirstCrawlingStrategy(
+            max_depth=depth,
+            include_external=False,
+            url_scorer=scorer,
+            max_pages=options.max_pages,
+            max_concurrency=options.max_concurrency,
+            score_drift=score_drift if score_drift is not None else math.inf,
+            max_frontier_size=int(os.getenv("CRAWLER_MAX_FRONTIER_SIZE", "100000")),
+            spill_frontier_to_disk=True,
+            url_normalizer=engine.canonicalizer,
+            resume_state=resume_state,
+            checkpoint_callback=checkpoint_callback,
+            phase_timer=time_phase,
+            shared_frontier=shared_frontier,
+            visited_mode=visited_set,
+            visited_error_rate=visited_error_rate,
+            fanout_per_depth=options.budget.max_fanout_per_depth if options.budget else None,
+            min_score=min_score if min_score is not None else -math.inf,
+            plateau_window=plateau_window or 0,
+            plateau_ratio=plateau_ratio,
+            seed_urls=seed_urls,
+        )
+
+    async def track(self, deep_strategy, results: AsyncIterator[CrawlResult], options: CrawlOptions):
+        queue_depth = 0
+        urls_skipped = 0
+        try:
+            async for result in results:
+                FRONTIER_SIZE.inc(deep_strategy.queue_depth - queue_depth)
+                URLS_SKIPPED.inc(deep_strategy.stats.urls_skipped - urls_skipped, reason="filtered")
+                queue_depth = deep_strategy.queue_depth
+                urls_skipped = deep_strategy.stats.urls_skipped
+                yield result
+            if deep_strategy.stop_reason and options.budget is not None:
+                options.budget.stop(deep_strategy.stop_reason)
+        finally:
+            FRONTIER_SIZE.dec(queue_depth)
+
+    def page_record(self, result: CrawlResult) -> dict:
+        return {
+            "url": result.url,
+            "depth": result.metadata.get("depth", 0),
+            "score": result.metadata.get("score", 0),
+            "fit_markdown": result.markdown.fit_markdown if result.markdown else None,
+        }
+
+
+CRAWL_STRATEGIES: Dict[str, CrawlStrategy] = {}
+
+_plugins_loaded = False
+
+
+def register_strategy(strategy: CrawlStrategy) -> CrawlStrategy:
+    if strategy.name in CRAWL_STRATEGIES:
+        raise ValueError(f"Crawl strategy {strategy.name} is already registered")
+    CRAWL_STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+def load_strategy_plugins():
+    """Import the modules listed in CRAWLER_STRATEGY_PLUGINS; they register their strategies on import."""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for module_name in os.getenv("CRAWLER_STRATEGY_PLUGINS", "").split(","):
+        if module_name.strip():
+            importlib.import_module(module_name.strip())
+            logger.info(f"Loaded crawl strategy plug-in {module_name.strip()}")
+
+
+def get_strategy(name: str) -> CrawlStrategy:
+    load_strategy_plugins()
+    strategy = CRAWL_STRATEGIES.get(name.lower())
+    if strategy is None:
+        raise ValueError("Invalid strategy")
+    return strategy
+
+
+def strategy_names() -> Tuple[str, ...]:
+    load_strategy_plugins()
+    return tuple(CRAWL_STRATEGIES)
+
+
+register_strategy(BestFirstStrategy())
+register_strategy(BreadthFirstStrategy())
+register_strategy(DepthFirstStrategy())
+
+
+class CrawlEngine:
+    """
+    Runs every registered strategy over the shared browser pool. Page configs,
+    markdown generators and scraping strategies are built once per strategy
+    and render settings, then reused by all crawls.
+    """
+
+    def __init__(self, pool: Optional[BrowserPool] = None, canonicalizer: Optional[URLCanonicalizer] = None):
+        self.pool = pool or get_browser_pool()
+        self.canonicalizer = canonicalizer or default_canonicalizer
+        self.scraping_strategy = TimedScrapingStrategy()
+        self.prune_filter = TimedPruningContentFilter(threshold=0.7, threshold_type="dynamic")
+        self._markdown_generators: Dict[tuple, TimedMarkdownGenerator] = {}
+        self._page_configs: Dict[tuple, CrawlerRunConfig] = {}
+
+    def markdown_generator(self, markdown_options: dict) -> TimedMarkdownGenerator:
+        key = tuple(sorted(markdown_options.items()))
+        generator = self._markdown_generators.get(key)
+        if generator is None:
+            generator = TimedMarkdownGenerator(content_filter=self.prune_filter, options=dict(markdown_options))
+            self._markdown_generators[key] = generator
+        return generator
+
+    def page_config(self, strategy: CrawlStrategy, options: CrawlOptions) -> CrawlerRunConfig:
+        key = (strategy.name, options.wait_strategy, options.wait_selector, options.render_profile)
+        config = self._page_configs.get(key)
+        if config is None:
+            config = CrawlerRunConfig(
+                markdown_generator=self.markdown_generator(strategy.markdown_options),
+                scraping_strategy=self.scraping_strategy,
+                cache_mode=CacheMode.BYPASS,
+                **strategy.config_options,
+                **readiness_config(options.wait_strategy, options.wait_selector),
+                **render_profile_config(options.render_profile),
+            )
+            self._page_configs[key] = config
+        return config
+
+    def cache_variant(self, strategy_name: str, options: CrawlOptions) -> str:
+        """Content cache variant of the pages a strategy produces."""
+        return config_fingerprint(self.page_config(get_strategy(strategy_name), options))
+
+    def create_gateway(self, slot: BrowserSlot, options: CrawlOptions) -> CrawlGateway:
+        return CrawlGateway(
+            slot.crawler,
+            cache=get_content_cache(),
+            cache_mode=options.cache_mode,
+            cache_ttl=options.cache_ttl,
+            max_concurrency=options.max_concurrency,
+            scheduler=get_host_scheduler(),
+            http_crawler=self.pool.http_crawler,
+            render_mode=options.render_mode,
+            replay_since=options.replay_since,
+            near_duplicates=options.near_duplicates,
+            extraction_pool=get_extraction_pool(),
+            fetch_budget=options.fetch_budget,
+            budget=options.budget,
+            incremental=options.incremental,
+        )
+
+    async def crawl_page(self, url: str, strategy_name: str, options: CrawlOptions) -> List[dict]:
+        config = self.page_config(get_strategy(strategy_name), options)
+        async with self.pool.acquire() as slot:
+            result = await self.create_gateway(slot, options).arun(url, config=config)
+            slot.pages_served += 1
+            return [{
+                "url": result.url,
+                "fit_markdown": result.markdown.fit_markdown if result.markdown else None
+            }]
+
+    async def stream(self, url: str, strategy_name: str, depth: int, options: CrawlOptions, **params):
+        strategy = get_strategy(strategy_name)
+        try:
+            deep_strategy = strategy.create(self, options, depth, **params)
+            config = self.page_config(strategy, options).clone(deep_crawl_strategy=deep_strategy, stream=True)
+
+            async with self.pool.acquire() as slot:
+                results = await self.create_gateway(slot, options).arun(url=url, config=config)
+                async for result in strategy.track(deep_strategy, within_budget(results, options.budget), options):
+                    slot.pages_served += 1
+                    if (result.metadata or {}).get("duplicate_of"):
+                        continue
+                    yield strategy.page_record(result)
+
+        except Exception:
+            logger.exception(f"Error during {strategy.name} crawl of {url}")
+            raise RuntimeError(f"Crawling failed for {url}")
+
+    async def crawl(self, url: str, strategy_name: str, depth: int, options: CrawlOptions, **params) -> List[dict]:
+        return [item async for item in self.stream(url, strategy_name, depth, options, **params)]
+
+
+_crawl_engine: Optional[CrawlEngine] = None
+
+
+def get_crawl_engine() -> CrawlEngine:
+    global _crawl_engine
+    if _crawl_engine is None:
+        _crawl_engine = CrawlEngine()
+    return _crawl_engine
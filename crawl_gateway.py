@@ -0,0 +1,289 @@
+import asyncio
+from contextlib import nullcontext
+from typing import Optional, List
+from crawl4ai import AsyncWebCrawler, CrawlerRunConfig
+from crawl4ai.models import CrawlResult, MarkdownGenerationResult
+from budgets import CrawlBudget
+from content_cache import ContentCache, CachedPage, REFRESH_STALE, BYPASS
+from incremental import IncrementalCrawl
+from metrics import (
+    BYTES_DOWNLOADED, NEAR_DUPLICATES, PAGE_FAILURES, PAGES_FETCHED, PAGES_IN_FLIGHT, PAGES_PER_SECOND, URLS_SKIPPED, time_phase,
+)
+from extraction import ExtractionPool, config_fingerprint, extraction_spec, offload_config
+from near_duplicates import DEDUP_OFF, DEDUP_PRUNE, NearDuplicateIndex
+from politeness import HostScheduler
+from rendering import RENDER_BROWSER, RENDER_HTTP, looks_js_dependent
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+
+class CrawlGateway:
+    """
+    Stands in for AsyncWebCrawler underneath the deep crawl strategies, so
+    every page fetched by BFS, DFS or best-first goes through one place.
+    """
+
+    def __init__(
+        self,
+        crawler: AsyncWebCrawler,
+        cache: Optional[ContentCache] = None,
+        cache_mode: str = BYPASS,
+        cache_ttl: Optional[float] = None,
+        max_concurrency: int = 5,
+        scheduler: Optional[HostScheduler] = None,
+        http_crawler: Optional[AsyncWebCrawler] = None,
+        render_mode: str = RENDER_BROWSER,
+        replay_since: Optional[float] = None,
+        near_duplicates: str = DEDUP_OFF,
+        extraction_pool: Optional[ExtractionPool] = None,
+        fetch_budget: Optional[asyncio.Semaphore] = None,
+        budget: Optional[CrawlBudget] = None,
+        incremental: Optional[IncrementalCrawl] = None,
+    ):
+        self.crawler = crawler
+        self.scheduler = scheduler
+        self.http_crawler = http_crawler
+        self.render_mode = render_mode if http_crawler is not None else RENDER_BROWSER
+        self.replay_since = replay_since
+        self.near_duplicates = near_duplicates
+        self.extraction_pool = extraction_pool
+        self.fetch_budget = fetch_budget
+        self.budget = budget
+        self.incremental = incremental
+        self.duplicate_index: Optional[NearDuplicateIndex] = None
+        if near_duplicates != DEDUP_OFF:
+            self.duplicate_index = NearDuplicateIndex()
+        self.cache = cache
+        self.cache_mode = cache_mode
+        self.cache_ttl = cache_ttl if cache_ttl is not None else (cache.ttl_seconds if cache else 0)
+        self.max_concurrency = max(1, max_concurrency)
+
+    def __getattr__(self, name):
+        return getattr(self.crawler, name)
+
+    async def arun(self, url: str, config: Optional[CrawlerRunConfig] = None, **kwargs):
+        if config is not None and config.deep_crawl_strategy is not None:
+            return await config.deep_crawl_strategy.arun(start_url=url, crawler=self, config=config)
+        return await self._fetch(url, config, **kwargs)
+
+    async def arun_many(self, urls: List[str], config: Optional[CrawlerRunConfig] = None, **kwargs):
+        if config is not None and config.stream:
+            return self._stream_many(urls, config, **kwargs)
+        return [result async for result in self._stream_many(urls, config, **kwargs)]
+
+    async def _stream_many(self, urls: List[str], config: Optional[CrawlerRunConfig], **kwargs):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def fetch(url):
+            return await self._fetch(url, config, limiter=semaphore, **kwargs)
+
+        tasks = [asyncio.create_task(fetch(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch(
+        self,
+        url: str,
+        config: Optional[CrawlerRunConfig],
+        limiter: Optional[asyncio.Semaphore] = None,
+        **kwargs,
+    ) -> CrawlResult:
+        if self.budget is not None and self.budget.exhausted():
+            result = CrawlResult(
+                url=url,
+                html="",
+                success=False,
+                error_message=f"Crawl budget exhausted ({self.budget.stop_reason})",
+                metadata={"skip_reason": "budget"},
+            )
+            self._record(result)
+            if self.incremental is not None:
+                self.incremental.observe(result)
+            return result
+
+        PAGES_IN_FLIGHT.inc()
+        try:
+            result = await self._fetch_page(url, config, limiter, **kwargs)
+        except Exception:
+            PAGE_FAILURES.inc(reason="exception")
+            raise
+        finally:
+            PAGES_IN_FLIGHT.dec()
+        if self.duplicate_index is not None and result.success:
+            self._flag_duplicate(result)
+        self._record(result)
+        if self.incremental is not None:
+            self.incremental.observe(result)
+        return result
+
+    def _flag_duplicate(self, result: CrawlResult):
+        fit_markdown = result.markdown.fit_markdown if result.markdown else None
+        original = self.duplicate_index.check(result.url, fit_markdown or "")
+        if original is None:
+            return
+        logger.debug(f"{result.url} is a near-duplicate of {original}")
+        NEAR_DUPLICATES.inc()
+        result.metadata = result.metadata or {}
+        result.metadata["duplicate_of"] = original
+        if self.near_duplicates == DEDUP_PRUNE:
+            # Deep crawl strategies expand links from result.links only
+            result.links = {"internal": [], "external": []}
+
+    def _record(self, result: CrawlResult):
+        metadata = result.metadata or {}
+        if result.success:
+            if self.budget is not None:
+                self.budget.add_page()
+            PAGES_FETCHED.inc(
+                render_mode=metadata.get("render_mode", "cache"),
+                cache_status=metadata.get("cache_status", "miss"),
+            )
+            PAGES_PER_SECOND.mark()
+        elif metadata.get("skip_reason"):
+            URLS_SKIPPED.inc(reason=metadata["skip_reason"])
+        elif result.status_code:
+            PAGE_FAILURES.inc(reason=f"http_{result.status_code // 100}xx")
+        else:
+            PAGE_FAILURES.inc(reason="error")
+
+    async def _fetch_page(
+        self,
+        url: str,
+        config: Optional[CrawlerRunConfig],
+        limiter: Optional[asyncio.Semaphore] = None,
+        **kwargs,
+    ) -> CrawlResult:
+        variant = config_fingerprint(config)
+        if self.cache is not None and (self.cache_mode != BYPASS or self.replay_since):
+            cached = await self.cache.aget(url, variant)
+            if cached is not None and self.replay_since and cached.fetched_at >= self.replay_since:
+                # Fetched by the interrupted run this crawl resumes
+                return self._from_cache(cached, status="replayed")
+            if self.cache_mode == BYPASS:
+                cached = None
+            if cached is not None and cached.is_fresh(self.cache_ttl):
+                return self._from_cache(cached)
+            if cached is not None and self.incremental is not None and self.incremental.unmodified(url):
+                return self._from_cache(cached, status="unmodified")
+            if cached is not None and self.cache_mode == REFRESH_STALE and await self.cache.revalidate(cached, self.scheduler):
+                return self._from_cache(cached, status="revalidated")
+
+        result = await self._polite_crawl(url, config, limiter, **kwargs)
+        if self.cache is not None and result.success:
+            await self._store(result, variant)
+        result.metadata = result.metadata or {}
+        result.metadata["cache_status"] = "miss"
+        return result
+
+    async def _polite_crawl(
+        self,
+        url: str,
+        config: Optional[CrawlerRunConfig],
+        limiter: Optional[asyncio.Semaphore],
+        **kwargs,
+    ) -> CrawlResult:
+        if self.scheduler is None:
+            return await self._crawl(url, config, limiter, **kwargs)
+
+        if not await self.scheduler.allowed(url):
+            logger.info(f"Skipping {url}, disallowed by robots.txt")
+            return CrawlResult(
+                url=url,
+                html="",
+                success=False,
+                error_message="Disallowed by robots.txt",
+                metadata={"skip_reason": "robots"},
+            )
+
+        for attempt in range(self.scheduler.max_retries + 1):
+            async with self.scheduler.slot(url):
+                result = await self._crawl(url, config, limiter, **kwargs)
+            throttled = self.scheduler.record_response(url, result.status_code, result.response_headers)
+            if not throttled:
+                break
+        return result
+
+    async def _crawl(
+        self,
+        url: str,
+        config: Optional[CrawlerRunConfig],
+        limiter: Optional[asyncio.Semaphore],
+        **kwargs,
+    ) -> CrawlResult:
+        # The crawl's own limit first, so a waiting crawl does not hold a
+        # slot of the budget shared with other crawls
+        async with limiter or nullcontext():
+            async with self.fetch_budget or nullcontext():
+                return await self._render(url, config, **kwargs)
+
+    async def _render(self, url: str, config: Optional[CrawlerRunConfig], **kwargs) -> CrawlResult:
+        if self.extraction_pool is None or config is None:
+            return await self._fetch_html(url, config, **kwargs)
+
+        # crawl4ai only fetches; scraping and markdown run in the process pool
+        spec = extraction_spec(config)
+        result = await self._fetch_html(url, offload_config(config), **kwargs)
+        if result.success:
+            with time_phase("extraction"):
+                result = await self.extraction_pool.extract(result, spec)
+        return result
+
+    async def _fetch_html(self, url: str, config: Optional[CrawlerRunConfig], **kwargs) -> CrawlResult:
+        if self.render_mode != RENDER_BROWSER:
+            with time_phase("http_fetch"):
+                result = await self.http_crawler.arun(url, config=config)
+            self._count_bytes(result, RENDER_HTTP)
+            if self.render_mode == RENDER_HTTP or (result.success and not looks_js_dependent(result.html)):
+                result.metadata = result.metadata or {}
+                result.metadata["render_mode"] = RENDER_HTTP
+                return result
+            logger.debug(f"Static HTML of {url} looks JS-dependent, rendering it in the browser")
+
+        with time_phase("browser_fetch"):
+            result = await self.crawler.arun(url, config=config, **kwargs)
+        self._count_bytes(result, RENDER_BROWSER)
+        result.metadata = result.metadata or {}
+        result.metadata["render_mode"] = RENDER_BROWSER
+        return result
+
+    def _count_bytes(self, result: CrawlResult, render_mode: str):
+        size = len(result.html or "")
+        BYTES_DOWNLOADED.inc(size, render_mode=render_mode)
+        if self.budget is not None:
+            self.budget.add_bytes(size)
+
+    def _from_cache(self, cached: CachedPage, status: str = "hit") -> CrawlResult:
+        return CrawlResult(
+            url=cached.url,
+            html=cached.html,
+            success=True,
+            links=cached.links,
+            markdown=MarkdownGenerationResult(
+                raw_markdown=cached.fit_markdown or "",
+                markdown_with_citations="",
+                references_markdown="",
+                fit_markdown=cached.fit_markdown,
+            ),
+            metadata={"cache_status": status},
+            status_code=200,
+        )
+
+    async def _store(self, result: CrawlResult, variant: str = ""):
+        headers = {key.lower(): value for key, value in (result.response_headers or {}).items()}
+        try:
+            await self.cache.aput(
+                result.url,
+                result.html,
+                result.markdown.fit_markdown if result.markdown else None,
+                result.links,
+                etag=headers.get("etag"),
+                last_modified=headers.get("last-modified"),
+                variant=variant,
+            )
+        except Exception:
+            logger.exception(f"Could not cache {result.url}")
@@ -0,0 +1,116 @@
+import uuid
+import asyncio
+import datetime
+from collections import OrderedDict
+from typing import Optional, List, Callable, Awaitable, Any
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+QUEUED = "queued"
+RUNNING = "running"
+EXPORTING = "exporting"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class CrawlJob:
+    def __init__(self, request: Any, job_id: Optional[str] = None, resume_from: Optional[Any] = None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.request = request
+        self.resume_from = resume_from
+        self.status = QUEUED
+        self.pages_crawled = 0
+        self.created_at = datetime.datetime.now()
+        self.started_at: Optional[datetime.datetime] = None
+        self.finished_at: Optional[datetime.datetime] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "pages_crawled": self.pages_crawled,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "resumed": self.resume_from is not None,
+        }
+
+
+class CrawlJobManager:
+    def __init__(
+        self,
+        runner: Callable[[CrawlJob], Awaitable[dict]],
+        max_workers: int = 2,
+        max_finished_jobs: int = 500,
+    ):
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self.max_finished_jobs = max_finished_jobs
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._jobs: "OrderedDict[str, CrawlJob]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+
+    async def start(self):
+        if self._workers:
+            return
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_workers)]
+        logger.info(f"Crawl job manager started with {self.max_workers} workers")
+
+    async def close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, request: Any, job_id: Optional[str] = None, resume_from: Optional[Any] = None) -> CrawlJob:
+        job = CrawlJob(request, job_id=job_id, resume_from=resume_from)
+        self._jobs.pop(job.job_id, None)
+        self._jobs[job.job_id] = job
+        self._queue.put_nowait(job)
+        self._evict_finished()
+        return job
+
+    def get(self, job_id: str) -> Optional[CrawlJob]:
+        return self._jobs.get(job_id)
+
+    def count(self, status: str) -> int:
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def queue_position(self, job: CrawlJob) -> Optional[int]:
+        if job.status != QUEUED:
+            return None
+        queued = [j for j in self._jobs.values() if j.status == QUEUED]
+        return queued.index(job)
+
+    def _evict_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_jobs)]:
+            del self._jobs[job_id]
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self._queue.get()
+            job.status = RUNNING
+            job.started_at = datetime.datetime.now()
+            try:
+                job.result = await self.runner(job)
+                job.status = COMPLETED
+            except asyncio.CancelledError:
+                job.status = FAILED
+                job.error = "Cancelled during shutdown"
+                raise
+            except Exception as e:
+                logger.exception(f"Crawl job {job.job_id} failed on worker {worker_id}")
+                job.status = FAILED
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.datetime.now()
+                self._queue.task_done()
@@ -1,124 +1,545 @@
 import os
 import asyncio
-from typing import Optional, List
-import datetime
+import json
+from typing import Optional, List, Literal, Callable, Awaitable, Dict
 from fastapi import APIRouter, HTTPException
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from docx import Document
-from pydantic import BaseModel, Field, root_validator
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, root_validator
 from dotenv import load_dotenv
-from best_first import BestFirstCrawl
-from depth_first import DepthFirstCrawl
-from breadth_first import BreadthFirstCrawl
+from browser_pool import get_browser_pool
+from budgets import CrawlBudget
+from crawl_engine import CrawlOptions, CrawlStrategy, STRATEGY_BEST_FIRST, get_crawl_engine, get_strategy, strategy_names
+from checkpoints import CrawlCheckpoint, get_checkpoint_store
+from content_cache import REFRESH_STALE, get_content_cache
+from crawl_jobs import CrawlJob, CrawlJobManager, QUEUED, RUNNING, EXPORTING, FAILED
+from exporters import ExportWriter, create_export_writer
+from extraction import get_extraction_pool
+from metrics import JOBS, PAGES_EXPORTED, render_metrics, time_phase
+from incremental import IncrementalCrawl, open_incremental_crawl
+from politeness import get_host_scheduler
+from sitemaps import get_sitemap_reader
+from shared_frontier import SharedFrontier, close_frontier_store, get_frontier_store
+from log_manager import LoggerUtility
 
 load_dotenv()
 
+logger = LoggerUtility().get_logger()
+
 router = APIRouter()
 asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
+SUPPORTED_METHODS = ("single", "recursive")
+CHECKPOINT_INTERVAL = 25
+MAX_CRAWL_CONCURRENCY = 32
+# Best-first crawls track visited URLs compactly and can go deep; strategies
+# on crawl4ai's in-memory sets declare a lower max_depth
+MAX_CRAWL_DEPTH = int(os.getenv("CRAWLER_MAX_DEPTH", "10"))
+MAX_BATCH_SEEDS = 1000
+SEED_COMPLETED = "seed_completed"
+SEED_FAILED = "seed_failed"
+
+def registered_strategy(values: dict) -> Optional[CrawlStrategy]:
+    """The strategy named in raw request values; unknown names are rejected by the router."""
+    try:
+        return get_strategy(str(values.get("strategy", "")))
+    except ValueError:
+        return None
+
 class CrawlRequest(BaseModel):
     url: str
     strategy: str
     method: str
     keywords: Optional[List[str]] = None
-    depth: int = Field(..., ge=0, le=3)
+    depth: int = Field(..., ge=0, le=MAX_CRAWL_DEPTH)
+    stream: bool = False
+    stream_format: Literal["ndjson", "sse"] = "ndjson"
+    export_format: Literal["docx", "markdown", "jsonl", "jsonl.gz"] = "docx"
+    cache_mode: Literal["read_through", "refresh_stale", "bypass"] = "bypass"
+    cache_ttl_seconds: Optional[int] = Field(None, ge=0)
+    concurrency: int = Field(5, ge=1, le=MAX_CRAWL_CONCURRENCY)
+    score_drift: Optional[float] = Field(None, ge=0)
+    scoring: Literal["url", "content"] = "content"
+    near_duplicates: Literal["off", "skip", "prune"] = "skip"
+    render_mode: Literal["browser", "http", "auto"] = "browser"
+    wait_strategy: Literal["domcontentloaded", "networkidle", "selector", "dom_stable"] = "dom_stable"
+    wait_selector: Optional[str] = None
+    render_profile: Literal["full", "balanced", "text", "minimal"] = "balanced"
+    resume_job_id: Optional[str] = None
+    shared_crawl_id: Optional[str] = Field(None, min_length=1, max_length=128, pattern=r"^[\w.-]+$")
+    visited_set: Literal["exact", "bloom"] = "exact"
+    visited_error_rate: float = Field(0.001, gt=0, lt=0.5)
+    max_pages: Optional[int] = Field(None, ge=1)
+    max_seconds: Optional[float] = Field(None, gt=0)
+    max_bytes: Optional[int] = Field(None, ge=1)
+    max_fanout_per_depth: Optional[Dict[int, int]] = None
+    # Adaptive stopping, best first only
+    min_score: Optional[float] = Field(None, ge=0)
+    plateau_window: Optional[int] = Field(None, ge=2)
+    plateau_ratio: float = Field(0.1, gt=0, lt=1)
+    # Re-crawl against the previous run of the same request and output only the changes
+    incremental: bool = False
+    skip_unchanged_subtrees: bool = True
+    # Queue the site's sitemap and feed URLs before the first page is rendered
+    seed_from_sitemaps: bool = False
 
     @root_validator(pre=True)
     def validate_keywords_for_strategy(cls, values):
-        strategy = values.get("strategy", "").lower()
+        strategy = registered_strategy(values)
         keywords = values.get("keywords")
 
-        if strategy == "best first" and not keywords:
-            raise ValueError("Keywords must be provided for best first strategy.")
-        if strategy in ["depth first" , "breadth first"] and keywords:
-            raise ValueError("keywords must not be provided for breadth first and depth first strategy")
-            #print("Note: Keywords provided but will be ignored for depth first strategy.")
+        if strategy is None:
+            return values
+        if strategy.requires_keywords and not keywords:
+            raise ValueError(f"Keywords must be provided for {strategy.name} strategy.")
+        if not strategy.accepts_keywords and keywords:
+            raise ValueError(f"keywords must not be provided for {strategy.name} strategy")
         return values
 
-def save_results_to_docx(strategy, method, results: list[dict]) -> str:
-    local_storage_path = os.path.join(os.path.expanduser("~"), "Downloads", "crawl_exports")
-    os.makedirs(local_storage_path, exist_ok=True)
-    timestamp = datetime.datetime.now().strftime("%H%M%S")
-    file_path = os.path.join(local_storage_path, f"crawl_result_{strategy}_{method}_{timestamp}.docx")
-
-    doc = Document()
-    doc.add_heading("Crawled Content", level=1)
-
-    for i, item in enumerate(results, start=1):
-        doc.add_heading(f"{i}. {item['url']}", level=2)
-        text = item.get("fit_markdown")
-        if text:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=5000,
-                chunk_overlap=1000,
-                separators=["\n\n", "\n", " ", "", "."]
-            )
-            chunks = text_splitter.split_text(text)
-            for chunk in chunks:
-                doc.add_paragraph(chunk)
+    @root_validator(pre=True)
+    def validate_depth_for_strategy(cls, values):
+        strategy = registered_strategy(values)
+        depth = values.get("depth")
+        if strategy is not None and strategy.max_depth is not None and isinstance(depth, int) and depth > strategy.max_depth:
+            raise ValueError(f"depth must be at most {strategy.max_depth} for {strategy.name} strategy")
+        return values
+
+    @root_validator(pre=True)
+    def validate_wait_selector(cls, values):
+        if values.get("wait_strategy") == "selector" and not values.get("wait_selector"):
+            raise ValueError("wait_selector must be provided for the selector wait strategy.")
+        return values
+
+class BatchSeed(BaseModel):
+    url: str
+    strategy: str
+    method: str = "recursive"
+    keywords: Optional[List[str]] = None
+    depth: int = Field(..., ge=0, le=MAX_CRAWL_DEPTH)
+    score_drift: Optional[float] = Field(None, ge=0)
+    scoring: Optional[Literal["url", "content"]] = None
+
+class BatchCrawlRequest(BaseModel):
+    seeds: List[BatchSeed] = Field(..., min_length=1, max_length=MAX_BATCH_SEEDS)
+    stream: bool = False
+    stream_format: Literal["ndjson", "sse"] = "ndjson"
+    export_format: Literal["docx", "markdown", "jsonl", "jsonl.gz"] = "docx"
+    cache_mode: Literal["read_through", "refresh_stale", "bypass"] = "bypass"
+    cache_ttl_seconds: Optional[int] = Field(None, ge=0)
+    concurrency: int = Field(10, ge=1, le=128)
+    max_parallel_seeds: int = Field(4, ge=1, le=64)
+    scoring: Literal["url", "content"] = "content"
+    near_duplicates: Literal["off", "skip", "prune"] = "skip"
+    render_mode: Literal["browser", "http", "auto"] = "browser"
+    wait_strategy: Literal["domcontentloaded", "networkidle", "selector", "dom_stable"] = "dom_stable"
+    wait_selector: Optional[str] = None
+    render_profile: Literal["full", "balanced", "text", "minimal"] = "balanced"
+    seed_from_sitemaps: bool = False
+    # Applied to each seed separately
+    max_pages: Optional[int] = Field(None, ge=1)
+    max_seconds: Optional[float] = Field(None, gt=0)
+    max_bytes: Optional[int] = Field(None, ge=1)
+
+    def seed_requests(self) -> List[CrawlRequest]:
+        shared = self.model_dump(exclude={"seeds", "stream", "max_parallel_seeds"})
+        # concurrency is the budget of the whole batch; one seed never uses more than a single crawl may
+        shared["concurrency"] = min(self.concurrency, MAX_CRAWL_CONCURRENCY)
+        return [CrawlRequest(**{**shared, **seed.model_dump(exclude_none=True)}) for seed in self.seeds]
+
+async def replay_pages(records: List[dict], variant: str = ""):
+    cache = get_content_cache()
+    for record in records:
+        cached = await cache.aget(record["url"], variant)
+        if cached is None:
+            logger.warning(f"{record['url']} is no longer cached, exporting it without content")
+        yield {**record, "fit_markdown": cached.fit_markdown if cached else None}
+
+def request_budget(request: CrawlRequest) -> CrawlBudget:
+    return CrawlBudget.with_defaults(
+        max_pages=request.max_pages,
+        max_seconds=request.max_seconds,
+        max_bytes=request.max_bytes,
+        max_fanout_per_depth=request.max_fanout_per_depth,
+    )
+
+async def open_request_incremental(request: CrawlRequest, resume: Optional[CrawlCheckpoint] = None) -> IncrementalCrawl:
+    return await open_incremental_crawl(
+        request.model_dump(),
+        skip_unchanged_subtrees=request.skip_unchanged_subtrees,
+        resumed=resume is not None,
+    )
+
+async def stream_crawl(
+    request: CrawlRequest,
+    resume: Optional[CrawlCheckpoint] = None,
+    checkpoint_callback: Optional[Callable[[dict], Awaitable[None]]] = None,
+    fetch_budget: Optional[asyncio.Semaphore] = None,
+    budget: Optional[CrawlBudget] = None,
+    incremental: Optional[IncrementalCrawl] = None,
+):
+    url = request.url
+    method = request.method
+    strategy = request.strategy.lower()
+    depth = request.depth
+    keywords = request.keywords
+    if request.incremental and incremental is None:
+        incremental = await open_request_incremental(request, resume)
+    options = CrawlOptions(
+        # Incremental crawls revalidate every known page instead of trusting the TTL
+        cache_mode=REFRESH_STALE if incremental else request.cache_mode,
+        cache_ttl=0 if incremental else request.cache_ttl_seconds,
+        max_concurrency=request.concurrency,
+        render_mode=request.render_mode,
+        wait_strategy=request.wait_strategy,
+        wait_selector=request.wait_selector,
+        render_profile=request.render_profile,
+        replay_since=resume.started_at if resume else None,
+        near_duplicates=request.near_duplicates,
+        fetch_budget=fetch_budget,
+        budget=budget or request_budget(request),
+        incremental=incremental,
+    )
+    engine = get_crawl_engine()
+
+    seed_urls = None
+    if request.seed_from_sitemaps and method == "recursive" and resume is None:
+        # An incremental run may already have read the sitemaps for their lastmod values
+        sitemap = incremental.sitemap if incremental is not None and incremental.sitemap else None
+        seed_urls = list(sitemap or await get_sitemap_reader().entries(url))
+
+    if method == "single":
+        pages = await engine.crawl_page(url, strategy, options)
+    else:
+        pages = engine.stream(
+            url,
+            strategy,
+            depth,
+            options,
+            keywords=keywords,
+            seed_urls=seed_urls,
+            score_drift=request.score_drift,
+            resume_state=resume.strategy_state if resume else None,
+            # A shared crawl's state lives in the frontier store, not in checkpoints
+            checkpoint_callback=None if request.shared_crawl_id else checkpoint_callback,
+            scoring=request.scoring,
+            visited_set=request.visited_set,
+            visited_error_rate=request.visited_error_rate,
+            min_score=request.min_score,
+            plateau_window=request.plateau_window,
+            plateau_ratio=request.plateau_ratio,
+            shared_frontier=(
+                SharedFrontier(get_frontier_store(), request.shared_crawl_id) if request.shared_crawl_id else None
+            ),
+        )
+
+    async def crawled_pages():
+        if resume is not None and resume.strategy_state is not None:
+            # The strategy continues from its frontier, so pages done before the
+            # interruption are re-emitted from the content cache first.
+            async for page in replay_pages(resume.completed, engine.cache_variant(strategy, options)):
+                yield page
+
+        if isinstance(pages, list):
+            for page in pages:
+                yield page
         else:
-            doc.add_paragraph("No content available.")
+            async for page in pages:
+                yield page
 
-    print(f"Saving DOCX to: {file_path}")
-    doc.save(file_path)
-    return file_path
+    if incremental is None:
+        async for page in crawled_pages():
+            yield page
+    else:
+        async for page in incremental.diff(crawled_pages(), options.budget):
+            yield page
 
-@router.post("/")
-def start_crawling(request: CrawlRequest):
+async def export_page(writer: ExportWriter, page: dict, export_format: str):
+    extraction_pool = get_extraction_pool()
+    with time_phase("export"):
+        if extraction_pool is not None and writer.offload_rendering:
+            rendered = await extraction_pool.run(type(writer).render, writer.pages_written + 1, page)
+            await asyncio.to_thread(writer.write_rendered, rendered)
+        else:
+            await asyncio.to_thread(writer.write, page)
+    PAGES_EXPORTED.inc(export_format=export_format)
+
+async def close_export(writer: ExportWriter):
+    with time_phase("export_finalize"):
+        await asyncio.to_thread(writer.close)
+
+async def stream_batch(request: BatchCrawlRequest):
+    """
+    Crawl all seeds of a batch over the shared browser pool and host
+    scheduler, at most max_parallel_seeds at a time and with at most
+    concurrency page fetches in flight across the batch. Yields page
+    records tagged with their seed, plus one summary record per seed.
+    """
+    seed_requests = request.seed_requests()
+    fetch_budget = asyncio.Semaphore(request.concurrency)
+    seed_slots = asyncio.Semaphore(request.max_parallel_seeds)
+    records: asyncio.Queue = asyncio.Queue(maxsize=request.concurrency * 4)
+
+    async def run_seed(index: int, seed_request: CrawlRequest):
+        pages = 0
+        summary = {"seed": index, "seed_url": seed_request.url}
+        budget = request_budget(seed_request)
+        async with seed_slots:
+            try:
+                async for page in stream_crawl(seed_request, fetch_budget=fetch_budget, budget=budget):
+                    pages += 1
+                    await records.put({"seed": index, "seed_url": seed_request.url, **page})
+                summary.update(event=SEED_COMPLETED, pages=pages, stop_reason=budget.stop_reason)
+            except Exception as e:
+                logger.exception(f"Batch seed {seed_request.url} failed")
+                summary.update(event=SEED_FAILED, pages=pages, error=str(e))
+        await records.put(summary)
+
+    tasks = [asyncio.create_task(run_seed(index, seed)) for index, seed in enumerate(seed_requests)]
+    remaining = len(tasks)
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        url = request.url
-        method = request.method
-        strategy = request.strategy.lower()
-        depth = request.depth
-        keywords = request.keywords
-        results = []
-
-        if strategy == "best first":
-            if method == "single":
-                crawl_single_page_service = BestFirstCrawl()
-                crawl_single_page = crawl_single_page_service.crawl_single_page(url)
-                results = loop.run_until_complete(crawl_single_page)
-
-            elif method == "recursive":
-                best_first_crawl_service = BestFirstCrawl()
-                best_first_crawl = best_first_crawl_service.best_first_crawl(url, depth, keywords)
-                results = loop.run_until_complete(best_first_crawl)
-
-        elif strategy == "breadth first":
-            if method == "single":
-                crawl_single_page_service = BreadthFirstCrawl()
-                crawl_single_page = crawl_single_page_service.crawl_single_page(url)
-                results = loop.run_until_complete(crawl_single_page)
-
-            elif method == "recursive":
-                breadth_first_crawl_service = BreadthFirstCrawl()
-                breadth_first_crawl = breadth_first_crawl_service.breadth_first_crawl(url, depth)
-                results = loop.run_until_complete(breadth_first_crawl)
-
-        elif strategy == "depth first":
-            if method == "single":
-                crawl_single_page_service = DepthFirstCrawl()
-                crawl_single_page = crawl_single_page_service.crawl_single_page(url)
-                results = loop.run_until_complete(crawl_single_page)
-
-            elif method == "recursive":
-                depth_first_crawl_service = DepthFirstCrawl()
-                depth_first_crawl = depth_first_crawl_service.depth_first_crawl(url, depth)
-                results = loop.run_until_complete(depth_first_crawl)
+        while remaining:
+            record = await records.get()
+            if record.get("event") in (SEED_COMPLETED, SEED_FAILED):
+                remaining -= 1
+            yield record
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-        else:
-            raise HTTPException(status_code=400, detail="Invalid strategy")
+async def run_batch_job(job: CrawlJob) -> dict:
+    request = job.request
+    writer = create_export_writer(request.export_format, "batch", "multi seed", job.job_id)
+    seeds = []
+    try:
+        async for record in stream_batch(request):
+            if "event" in record:
+                seeds.append(record)
+                continue
+            await export_page(writer, record, request.export_format)
+            job.pages_crawled += 1
+        job.status = EXPORTING
+    finally:
+        await close_export(writer)
 
-        save_results_to_docx(strategy, method, results)
-        return {
-            "message": "Crawling completed and data stored successfully.",
-            "strategy": strategy,
-            "method": method,
-            "pages_crawled": len(results or [])
-        }
+    return {
+        "message": "Batch crawl completed and data stored successfully.",
+        "seeds": sorted(seeds, key=lambda seed: seed["seed"]),
+        "seeds_failed": sum(1 for seed in seeds if seed["event"] == SEED_FAILED),
+        "pages_crawled": job.pages_crawled,
+        "export_format": request.export_format,
+        "file_path": writer.file_path,
+    }
 
+async def run_crawl_job(job: CrawlJob) -> dict:
+    request = job.request
+    if isinstance(request, BatchCrawlRequest):
+        return await run_batch_job(job)
+    strategy = request.strategy.lower()
+    method = request.method
+    writer = create_export_writer(request.export_format, strategy, method, job.job_id)
+    store = get_checkpoint_store()
+    resume = job.resume_from
+    checkpoint = CrawlCheckpoint(
+        job.job_id,
+        request.model_dump(exclude={"resume_job_id"}),
+        started_at=resume.started_at if resume else None,
+    )
+
+    async def save_strategy_state(state: dict):
+        checkpoint.strategy_state = state
+        await asyncio.to_thread(store.save, checkpoint)
+
+    budget = request_budget(request)
+    incremental = await open_request_incremental(request, resume) if request.incremental else None
+    try:
+        async for page in stream_crawl(request, resume, save_strategy_state, budget=budget, incremental=incremental):
+            await export_page(writer, page, request.export_format)
+            job.pages_crawled += 1
+            checkpoint.record_page(page)
+            if strategy != STRATEGY_BEST_FIRST and job.pages_crawled % CHECKPOINT_INTERVAL == 0:
+                await asyncio.to_thread(store.save, checkpoint)
+        job.status = EXPORTING
+    finally:
+        await close_export(writer)
+
+    store.delete(job.job_id)
+
+    return {
+        "message": "Crawling completed and data stored successfully.",
+        "strategy": strategy,
+        "method": method,
+        "pages_crawled": job.pages_crawled,
+        "stop_reason": budget.stop_reason,
+        "budget": budget.summary(),
+        "changes": incremental.summary() if incremental else None,
+        "export_format": request.export_format,
+        "file_path": writer.file_path,
+    }
+
+def format_stream_record(page: dict, stream_format: str, event: str = "page") -> str:
+    payload = json.dumps(page, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {event}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+async def stream_crawl_response(request: CrawlRequest):
+    writer = create_export_writer(request.export_format, request.strategy.lower(), request.method)
+    try:
+        async for page in stream_crawl(request):
+            await export_page(writer, page, request.export_format)
+            yield format_stream_record(page, request.stream_format)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.exception(f"Streaming crawl of {request.url} failed")
+        yield format_stream_record({"error": str(e)}, request.stream_format, event="error")
+    finally:
+        await close_export(writer)
+
+async def stream_batch_response(request: BatchCrawlRequest):
+    writer = create_export_writer(request.export_format, "batch", "multi seed")
+    pages = 0
+    seeds_failed = 0
+    try:
+        async for record in stream_batch(request):
+            if "event" in record:
+                seeds_failed += record["event"] == SEED_FAILED
+                yield format_stream_record(record, request.stream_format, event="seed")
+                continue
+            await export_page(writer, record, request.export_format)
+            pages += 1
+            yield format_stream_record(record, request.stream_format)
+    except Exception as e:
+        logger.exception(f"Streaming batch crawl of {len(request.seeds)} seeds failed")
+        yield format_stream_record({"error": str(e)}, request.stream_format, event="error")
+        return
+    finally:
+        await close_export(writer)
+    summary = {
+        "event": "batch_completed",
+        "seeds": len(request.seeds),
+        "seeds_failed": seeds_failed,
+        "pages_crawled": pages,
+        "file_path": writer.file_path,
+    }
+    yield format_stream_record(summary, request.stream_format, event="summary")
+
+job_manager = CrawlJobManager(
+    runner=run_crawl_job,
+    max_workers=int(os.getenv("CRAWLER_MAX_CONCURRENT_JOBS", "2")),
+)
+
+for job_status in (QUEUED, RUNNING, EXPORTING):
+    JOBS.set_function(lambda job_status=job_status: job_manager.count(job_status), status=job_status)
+
+@router.post("/", status_code=202)
+async def start_crawling(request: CrawlRequest):
+    if request.strategy.lower() not in strategy_names():
+        raise HTTPException(status_code=400, detail="Invalid strategy")
+    if request.method not in SUPPORTED_METHODS:
+        raise HTTPException(status_code=400, detail="Invalid method")
+
+    if request.shared_crawl_id:
+        if request.strategy.lower() != STRATEGY_BEST_FIRST or request.method != "recursive":
+            raise HTTPException(status_code=400, detail="Shared crawls require a recursive best first crawl")
+        if request.resume_job_id:
+            raise HTTPException(status_code=400, detail="Shared crawls resume from their frontier store")
+        if request.incremental:
+            raise HTTPException(status_code=400, detail="Shared crawls cannot be incremental")
+
+    if request.resume_job_id:
+        return resume_crawl_job(request)
+
+    if request.stream:
+        media_type = "text/event-stream" if request.stream_format == "sse" else "application/x-ndjson"
+        return StreamingResponse(stream_crawl_response(request), media_type=media_type)
+
+    job = job_manager.submit(request)
+    return {
+        "message": "Crawl job accepted.",
+        "job_id": job.job_id,
+        "status": job.status,
+    }
+
+@router.post("/batch", status_code=202)
+async def start_batch_crawl(request: BatchCrawlRequest):
+    for seed in request.seeds:
+        if seed.strategy.lower() not in strategy_names():
+            raise HTTPException(status_code=400, detail=f"Invalid strategy for seed {seed.url}")
+        if seed.method not in SUPPORTED_METHODS:
+            raise HTTPException(status_code=400, detail=f"Invalid method for seed {seed.url}")
+    try:
+        request.seed_requests()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+    if request.stream:
+        media_type = "text/event-stream" if request.stream_format == "sse" else "application/x-ndjson"
+        return StreamingResponse(stream_batch_response(request), media_type=media_type)
+
+    job = job_manager.submit(request)
+    return {
+        "message": f"Batch crawl job with {len(request.seeds)} seeds accepted.",
+        "job_id": job.job_id,
+        "status": job.status,
+    }
+
+def resume_crawl_job(request: CrawlRequest) -> dict:
+    if request.stream:
+        raise HTTPException(status_code=400, detail="Streaming crawls cannot be resumed")
+    checkpoint = get_checkpoint_store().load(request.resume_job_id)
+    if checkpoint is None:
+        raise HTTPException(status_code=404, detail="No checkpoint found for this job")
+    existing = job_manager.get(request.resume_job_id)
+    if existing is not None and not existing.done:
+        raise HTTPException(status_code=409, detail=f"Job is still {existing.status}")
+
+    job = job_manager.submit(CrawlRequest(**checkpoint.request), job_id=checkpoint.job_id, resume_from=checkpoint)
+    return {
+        "message": f"Resuming crawl job after {len(checkpoint.completed)} pages.",
+        "job_id": job.job_id,
+        "status": job.status,
+    }
+
+def get_job_or_404(job_id: str) -> CrawlJob:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/jobs/{job_id}")
+async def get_crawl_job(job_id: str):
+    job = get_job_or_404(job_id)
+    status = job.to_dict()
+    status["queue_position"] = job_manager.queue_position(job)
+    return status
+
+@router.get("/jobs/{job_id}/results")
+async def get_crawl_job_results(job_id: str, download: bool = False):
+    job = get_job_or_404(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=500, detail=job.error)
+    if not job.done:
+        raise HTTPException(status_code=409, detail=f"Job is still {job.status}")
+    if download:
+        return FileResponse(job.result["file_path"], filename=os.path.basename(job.result["file_path"]))
+    return job.result
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@router.on_event("startup")
+async def start_crawl_services():
+    await get_browser_pool().start()
+    await job_manager.start()
+
+@router.on_event("shutdown")
+async def close_crawl_services():
+    await job_manager.close()
+    await get_browser_pool().close()
+    await get_content_cache().close()
+    await get_host_scheduler().close()
+    await get_sitemap_reader().close()
+    extraction_pool = get_extraction_pool()
+    if extraction_pool is not None:
+        extraction_pool.close()
+    await close_frontier_store()
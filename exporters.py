@@ -0,0 +1,216 @@
+import io
+import os
+import re
+import gzip
+import json
+import datetime
+import tempfile
+import zipfile
+import uuid
+from typing import Optional, List, TextIO
+from xml.sax.saxutils import escape
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from docx import Document
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+EXPORT_DIR = os.path.join(os.path.expanduser("~"), "Downloads", "crawl_exports")
+
+_INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_text_splitter: Optional[RecursiveCharacterTextSplitter] = None
+
+
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    global _text_splitter
+    if _text_splitter is None:
+        _text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=5000,
+            chunk_overlap=1000,
+            separators=["\n\n", "\n", " ", "", "."]
+        )
+    return _text_splitter
+
+
+def split_text(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return get_text_splitter().split_text(text)
+
+
+class ExportWriter:
+    extension = ""
+    # Writers whose per-page work can run in another process implement
+    # render() and write_rendered()
+    offload_rendering = False
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.pages_written = 0
+
+    def open(self):
+        pass
+
+    def write(self, item: dict):
+        raise NotImplementedError
+
+    def write_rendered(self, rendered: str):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class DocxExportWriter(ExportWriter):
+    """
+    Writes the document body to a temporary file page by page and assembles
+    the .docx archive on close, so the document tree is never held in memory.
+    """
+    extension = "docx"
+    offload_rendering = True
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self._body: Optional[TextIO] = None
+
+    def open(self):
+        self._body = tempfile.TemporaryFile("w+", encoding="utf-8")
+        self._body.write(self._paragraph("Crawled Content", style="Heading1"))
+
+    def write(self, item: dict):
+        self.write_rendered(self.render(self.pages_written + 1, item))
+
+    def write_rendered(self, rendered: str):
+        self.pages_written += 1
+        self._body.write(rendered)
+
+    @classmethod
+    def render(cls, index: int, item: dict) -> str:
+        """Body XML of one page: its heading and the split markdown chunks."""
+        paragraphs = [cls._paragraph(f"{index}. {item['url']}", style="Heading2")]
+        chunks = split_text(item.get("fit_markdown"))
+        if chunks:
+            paragraphs.extend(cls._paragraph(chunk) for chunk in chunks)
+        else:
+            paragraphs.append(cls._paragraph("No content available."))
+        return "".join(paragraphs)
+
+    def close(self):
+        if self._body is None:
+            return
+        template = io.BytesIO()
+        Document().save(template)
+        with zipfile.ZipFile(template) as source:
+            document_xml = source.read("word/document.xml").decode("utf-8")
+            body_start = document_xml.index("<w:body>") + len("<w:body>")
+            prefix = document_xml[:body_start]
+            suffix = document_xml[document_xml.rindex("<w:sectPr"):]
+
+            with zipfile.ZipFile(self.file_path, "w", zipfile.ZIP_DEFLATED) as target:
+                for info in source.infolist():
+                    if info.filename != "word/document.xml":
+                        target.writestr(info, source.read(info.filename))
+                        continue
+                    with target.open("word/document.xml", "w") as out:
+                        out.write(prefix.encode("utf-8"))
+                        self._body.seek(0)
+                        for block in iter(lambda: self._body.read(1 << 16), ""):
+                            out.write(block.encode("utf-8"))
+                        out.write(suffix.encode("utf-8"))
+
+        self._body.close()
+        self._body = None
+
+    @staticmethod
+    def _paragraph(text: str, style: Optional[str] = None) -> str:
+        # Mirrors python-docx's Run.text handling: newlines become <w:br/>
+        lines = [escape(_INVALID_XML_CHARS.sub("", line)) for line in text.split("\n")]
+        runs = '</w:t><w:br/><w:t xml:space="preserve">'.join(lines)
+        properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+        return f'<w:p>{properties}<w:r><w:t xml:space="preserve">{runs}</w:t></w:r></w:p>'
+
+
+class MarkdownExportWriter(ExportWriter):
+    extension = "md"
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self._file: Optional[TextIO] = None
+
+    def open(self):
+        self._file = open(self.file_path, "w", encoding="utf-8")
+        self._file.write("# Crawled Content\n\n")
+
+    def write(self, item: dict):
+        self.pages_written += 1
+        self._file.write(f"## {self.pages_written}. {item['url']}\n\n")
+        self._file.write(f"{item.get('fit_markdown') or 'No content available.'}\n\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class JsonlExportWriter(ExportWriter):
+    extension = "jsonl"
+
+    def __init__(self, file_path: str):
+        super().__init__(file_path)
+        self._file: Optional[TextIO] = None
+
+    def _open_file(self):
+        return open(self.file_path, "w", encoding="utf-8")
+
+    def open(self):
+        self._file = self._open_file()
+
+    def write(self, item: dict):
+        self.pages_written += 1
+        self._file.write(json.dumps(item, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class GzipJsonlExportWriter(JsonlExportWriter):
+    extension = "jsonl.gz"
+
+    def _open_file(self):
+        return gzip.open(self.file_path, "wt", encoding="utf-8")
+
+
+EXPORT_WRITERS = {
+    "docx": DocxExportWriter,
+    "markdown": MarkdownExportWriter,
+    "jsonl": JsonlExportWriter,
+    "jsonl.gz": GzipJsonlExportWriter,
+}
+
+
+def create_export_writer(export_format: str, strategy: str, method: str, run_id: Optional[str] = None) -> ExportWriter:
+    """run_id (a job id, or a random one) keeps crawls started in the same second apart."""
+    if export_format not in EXPORT_WRITERS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    writer_class = EXPORT_WRITERS[export_format]
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%H%M%S")
+    run_id = run_id or uuid.uuid4().hex
+    file_path = os.path.join(
+        EXPORT_DIR, f"crawl_result_{strategy}_{method}_{timestamp}_{run_id}.{writer_class.extension}"
+    )
+
+    logger.info(f"Exporting {export_format} to: {file_path}")
+    writer = writer_class(file_path)
+    writer.open()
+    return writer
@@ -0,0 +1,149 @@
+import os
+import json
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from crawl4ai import CrawlerRunConfig
+from crawl4ai.content_filter_strategy import PruningContentFilter
+from crawl4ai.content_scraping_strategy import ContentScrapingStrategy, LXMLWebScrapingStrategy
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator, MarkdownGenerationStrategy
+from crawl4ai.models import CrawlResult, MarkdownGenerationResult, ScrapingResult
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+
+class PassthroughScrapingStrategy(ContentScrapingStrategy):
+    """Leaves the raw HTML alone; scraping happens later in the extraction pool."""
+
+    def scrap(self, url: str, html: str, **kwargs) -> ScrapingResult:
+        return ScrapingResult(cleaned_html="", success=True)
+
+    async def ascrap(self, url: str, html: str, **kwargs) -> ScrapingResult:
+        return self.scrap(url, html, **kwargs)
+
+
+class PassthroughMarkdownGenerator(MarkdownGenerationStrategy):
+    def generate_markdown(self, cleaned_html: str, *args, **kwargs) -> MarkdownGenerationResult:
+        return MarkdownGenerationResult(raw_markdown="", markdown_with_citations="", references_markdown="")
+
+
+# Run config fields crawl4ai hands to the scraping strategy; the pool passes
+# the same ones, so offloading does not change what a page scrapes to
+SCRAPING_FIELDS = (
+    "word_count_threshold", "css_selector", "target_elements", "excluded_tags", "excluded_selector",
+    "only_text", "keep_data_attributes", "keep_attrs", "remove_forms", "prettiify", "parser_type",
+    "exclude_external_links", "exclude_social_media_links", "exclude_social_media_domains",
+    "exclude_domains", "exclude_internal_links", "exclude_external_images",
+    "image_description_min_word_threshold", "image_score_threshold",
+)
+
+
+def extraction_spec(config: CrawlerRunConfig) -> Dict[str, Any]:
+    """Picklable description of the scraping and markdown setup of a run config."""
+    generator = config.markdown_generator
+    content_filter = getattr(generator, "content_filter", None)
+    spec: Dict[str, Any] = {
+        "scraping": {field: getattr(config, field) for field in SCRAPING_FIELDS if hasattr(config, field)},
+        "options": dict(getattr(generator, "options", None) or {}),
+        "pruning": None,
+    }
+    if isinstance(content_filter, PruningContentFilter):
+        spec["pruning"] = {
+            "user_query": content_filter.user_query,
+            "min_word_threshold": content_filter.min_word_threshold,
+            "threshold_type": content_filter.threshold_type,
+            "threshold": content_filter.threshold,
+        }
+    return spec
+
+
+def config_fingerprint(config: Optional[CrawlerRunConfig]) -> str:
+    """Short hash of the settings that decide what a page scrapes to, for cache keys."""
+    if config is None:
+        return ""
+    spec = json.dumps(extraction_spec(config), sort_keys=True, default=str)
+    return hashlib.blake2b(spec.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def offload_config(config: CrawlerRunConfig) -> CrawlerRunConfig:
+    """Copy of config that makes crawl4ai return raw HTML without processing it."""
+    return config.clone(
+        scraping_strategy=PassthroughScrapingStrategy(),
+        markdown_generator=PassthroughMarkdownGenerator(),
+    )
+
+
+def extract_page(url: str, html: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Runs in a worker process: scrape the raw HTML, then generate (pruned)
+    markdown. Only the fields the crawlers use are sent back.
+    """
+    scraped = LXMLWebScrapingStrategy().scrap(url, html, **spec.get("scraping", {}))
+    content_filter = PruningContentFilter(**spec["pruning"]) if spec.get("pruning") else None
+    markdown = DefaultMarkdownGenerator(content_filter=content_filter, options=spec.get("options")).generate_markdown(
+        cleaned_html=scraped.cleaned_html, base_url=url
+    )
+    return {
+        "raw_markdown": markdown.raw_markdown,
+        "fit_markdown": markdown.fit_markdown,
+        "links": scraped.links.model_dump(),
+        "metadata": scraped.metadata or {},
+    }
+
+
+def apply_extraction(result: CrawlResult, extracted: Dict[str, Any]) -> CrawlResult:
+    result.markdown = MarkdownGenerationResult(
+        raw_markdown=extracted["raw_markdown"] or "",
+        markdown_with_citations="",
+        references_markdown="",
+        fit_markdown=extracted["fit_markdown"],
+    )
+    result.links = extracted["links"]
+    result.metadata = {**extracted["metadata"], **(result.metadata or {})}
+    return result
+
+
+class ExtractionPool:
+    """
+    Process pool for CPU-bound page work (scraping, pruning, markdown and
+    export chunking) so the event loop keeps fetching while it runs.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"Extraction pool started with {self.max_workers} processes")
+        return self._executor
+
+    async def run(self, function: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), function, *args)
+
+    async def extract(self, result: CrawlResult, spec: Dict[str, Any]) -> CrawlResult:
+        extracted = await self.run(extract_page, result.url, result.html or "", spec)
+        return apply_extraction(result, extracted)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+_extraction_pool: Optional[ExtractionPool] = None
+
+
+def get_extraction_pool() -> Optional[ExtractionPool]:
+    """The shared extraction pool, or None when CRAWLER_EXTRACTION_WORKERS is 0."""
+    global _extraction_pool
+    workers = int(os.getenv("CRAWLER_EXTRACTION_WORKERS", "0"))
+    if workers <= 0:
+        return None
+    if _extraction_pool is None:
+        _extraction_pool = ExtractionPool(workers)
+    return _extraction_pool
@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+from crawl4ai.models import CrawlResult
+from budgets import CrawlBudget
+from metrics import URLS_SKIPPED
+from sitemaps import SitemapEntries, get_sitemap_reader
+from url_canonicalizer import default_canonicalizer
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+CHANGE_ADDED = "added"
+CHANGE_CHANGED = "changed"
+CHANGE_REMOVED = "removed"
+
+# Request fields that identify "the same crawl" across runs
+SNAPSHOT_FIELDS = ("url", "strategy", "method", "depth", "keywords", "scoring")
+
+# Failed fetches with these statuses mean the page is gone; other failures keep it
+GONE_STATUS_CODES = (404, 410)
+
+# Canonical URL -> (content hash, canonical URL of the page it was first linked from)
+Snapshot = Dict[str, Tuple[str, Optional[str]]]
+
+
+def content_hash(text: Optional[str]) -> str:
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+
+def snapshot_key(request: dict) -> str:
+    fields = {name: request.get(name) for name in SNAPSHOT_FIELDS}
+    fields["url"] = default_canonicalizer(fields["url"])
+    fields["strategy"] = str(fields["strategy"]).lower()
+    fields["keywords"] = sorted(fields["keywords"] or [])
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class SnapshotStore:
+    """The pages seen by the last completed run of each incremental crawl."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS crawls (key TEXT PRIMARY KEY, started_at REAL, finished_at REAL, pages INTEGER)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (key TEXT, url TEXT, content_hash TEXT, parent TEXT, "
+            "PRIMARY KEY (key, url)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def load(self, key: str) -> Tuple[Optional[float], Snapshot]:
+        """Start time of the last completed run and its pages, or (None, {}) for a first run."""
+        with self._lock:
+            row = self._conn.execute("SELECT started_at FROM crawls WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None, {}
+            pages = self._conn.execute("SELECT url, content_hash, parent FROM pages WHERE key = ?", (key,)).fetchall()
+        return row[0], {url: (digest, parent) for url, digest, parent in pages}
+
+    def save(self, key: str, started_at: float, pages: Snapshot):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM pages WHERE key = ?", (key,))
+                self._conn.executemany(
+                    "INSERT INTO pages VALUES (?, ?, ?, ?)",
+                    ((key, url, digest, parent) for url, (digest, parent) in pages.items()),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO crawls VALUES (?, ?, ?, ?)", (key, started_at, time.time(), len(pages))
+                )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class IncrementalCrawl:
+    """
+    One run of an incremental crawl. The gateway asks it which pages can be
+    served from the cache without a request and reports every fetch back;
+    unchanged pages only have their links to new or sitemap-changed pages
+    followed, and the known pages below them are carried over untouched.
+    The page stream is then reduced to the added, changed and removed pages.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        previous: Snapshot,
+        previous_started_at: Optional[float],
+        sitemap: Optional[SitemapEntries] = None,
+        skip_unchanged_subtrees: bool = True,
+        resumed: bool = False,
+        store: Optional[SnapshotStore] = None,
+    ):
+        self.key = key
+        self.previous = previous
+        self.previous_started_at = previous_started_at
+        self.sitemap = sitemap or {}
+        self.skip_unchanged_subtrees = skip_unchanged_subtrees
+        # Pages skipped before an interruption were not recorded, so a resumed
+        # run cannot tell which known pages are gone
+        self.resumed = resumed
+        self.store = store or get_snapshot_store()
+        self.started_at = time.time()
+        self.pages: Snapshot = {}
+        self.parents: Dict[str, str] = {}
+        self.carried: Set[str] = set()
+        self.unreachable: Set[str] = set()
+        self.counts = {CHANGE_ADDED: 0, CHANGE_CHANGED: 0, "unchanged": 0, CHANGE_REMOVED: 0}
+        self.complete = False
+
+    def changed_in_sitemap(self, url: str) -> bool:
+        lastmod = self.sitemap.get(url)
+        return lastmod is not None and (self.previous_started_at is None or lastmod > self.previous_started_at)
+
+    def unmodified(self, url: str) -> bool:
+        """Known from the previous run and, according to the sitemap, not modified since."""
+        key = default_canonicalizer(url)
+        lastmod = self.sitemap.get(key)
+        return (
+            key in self.previous
+            and lastmod is not None
+            and self.previous_started_at is not None
+            and lastmod <= self.previous_started_at
+        )
+
+    def priority(self, url: str) -> float:
+        """Score boost for pages that are new or changed according to the sitemap."""
+        key = default_canonicalizer(url)
+        return 1.0 if key not in self.previous or self.changed_in_sitemap(key) else 0.0
+
+    def observe(self, result: CrawlResult):
+        key = default_canonicalizer(result.url)
+        if not result.success:
+            if result.status_code not in GONE_STATUS_CODES:
+                self.unreachable.add(key)
+            return
+
+        digest = content_hash(result.markdown.fit_markdown if result.markdown else None)
+        self.pages[key] = (digest, self.parents.get(key))
+        known = self.previous.get(key)
+        unchanged = known is not None and known[0] == digest and self.skip_unchanged_subtrees
+
+        links = result.links or {}
+        kept = []
+        for link in links.get("internal", []):
+            child = default_canonicalizer(link.get("href"))
+            if not child:
+                continue
+            if unchanged and child in self.previous and not self.changed_in_sitemap(child):
+                self.carried.add(child)
+                continue
+            self.parents.setdefault(child, key)
+            kept.append(link)
+        skipped = len(links.get("internal", [])) - len(kept)
+        if skipped:
+            # Deep crawl strategies expand links from result.links only
+            result.links = {**links, "internal": kept}
+            URLS_SKIPPED.inc(skipped, reason="unchanged")
+
+    def classify(self, page: dict) -> Optional[str]:
+        key = default_canonicalizer(page["url"])
+        if key not in self.pages:
+            # Replayed from a checkpoint, so never seen by the gateway in this run
+            self.pages[key] = (content_hash(page.get("fit_markdown")), None)
+        known = self.previous.get(key)
+        if known is None:
+            change = CHANGE_ADDED
+        elif known[0] != self.pages[key][0]:
+            change = CHANGE_CHANGED
+        else:
+            change = None
+        self.counts[change or "unchanged"] += 1
+        return change
+
+    def _carried_over(self) -> Set[str]:
+        """Known pages below unchanged pages that this run did not visit."""
+        children: Dict[str, List[str]] = {}
+        for url, (_, parent) in self.previous.items():
+            if parent:
+                children.setdefault(parent, []).append(url)
+        carried: Set[str] = set()
+        pending = [url for url in self.carried | self.unreachable if url not in self.pages]
+        while pending:
+            url = pending.pop()
+            if url in carried or url in self.pages:
+                continue
+            carried.add(url)
+            pending.extend(children.get(url, ()))
+        return carried
+
+    def removed(self) -> List[str]:
+        if not self.complete:
+            return []
+        carried = self._carried_over()
+        return sorted(url for url in self.previous if url not in self.pages and url not in carried)
+
+    async def diff(self, pages: AsyncIterator[dict], budget: Optional[CrawlBudget] = None):
+        """Yield only added and changed pages, then the removed ones, and store the new snapshot."""
+        async for page in pages:
+            change = self.classify(page)
+            if change is not None:
+                yield {**page, "change": change}
+
+        # A crawl cut short by a budget did not get to every page it would have
+        self.complete = not self.resumed and (budget is None or budget.stop_reason is None)
+        removed = self.removed()
+        for url in removed:
+            self.counts[CHANGE_REMOVED] += 1
+            yield {"url": url, "change": CHANGE_REMOVED, "fit_markdown": None}
+        await asyncio.to_thread(self.store.save, self.key, self.started_at, self.snapshot(removed))
+
+    def snapshot(self, removed: List[str]) -> Snapshot:
+        snapshot = dict(self.pages)
+        gone = set(removed)
+        for url, entry in self.previous.items():
+            if url not in gone:
+                snapshot.setdefault(url, entry)
+        return snapshot
+
+    def summary(self) -> dict:
+        return {
+            **self.counts,
+            "carried_over": len(self._carried_over()),
+            "complete": self.complete,
+            "previous_crawl_started_at": self.previous_started_at,
+        }
+
+
+async def open_incremental_crawl(request: dict, skip_unchanged_subtrees: bool = True, resumed: bool = False) -> IncrementalCrawl:
+    store = get_snapshot_store()
+    key = snapshot_key(request)
+    previous_started_at, previous = await asyncio.to_thread(store.load, key)
+    # On a first run every page is new, so lastmod values would not change anything
+    sitemap = await get_sitemap_reader().entries(request["url"]) if previous else {}
+    logger.info(f"Incremental crawl of {request['url']} against {len(previous)} known pages")
+    return IncrementalCrawl(
+        key,
+        previous,
+        previous_started_at,
+        sitemap=sitemap,
+        skip_unchanged_subtrees=skip_unchanged_subtrees,
+        resumed=resumed,
+        store=store,
+    )
+
+
+_snapshot_store: Optional[SnapshotStore] = None
+
+
+def get_snapshot_store() -> SnapshotStore:
+    global _snapshot_store
+    if _snapshot_store is None:
+        cache_dir = os.getenv("CRAWLER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".web_crawler"))
+        _snapshot_store = SnapshotStore(os.path.join(cache_dir, "crawl_snapshots.sqlite"))
+    return _snapshot_store
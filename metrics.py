@@ -0,0 +1,337 @@
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from crawl4ai.content_scraping_strategy import LXMLWebScrapingStrategy
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+from crawl4ai.content_filter_strategy import PruningContentFilter
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float, Tuple[str, ...]]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, values, value, extra_names in self.samples():
+            labels = _format_labels(self.labelnames + extra_names, values)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [("", key, value, ()) for key, value in self._values.items()]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels):
+        """Compute the value when the metrics are scraped instead of tracking it."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = function
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0.0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+            functions = dict(self._functions)
+        values.update({key: function() for key, function in functions.items()})
+        return [("", key, value, ()) for key, value in values.items()]
+
+
+class RateGauge(Gauge):
+    """Events per second over a sliding window, e.g. pages/sec."""
+
+    def __init__(self, name: str, documentation: str, window_seconds: float = 60.0):
+        super().__init__(name, documentation)
+        self.window_seconds = window_seconds
+        self._events: deque = deque()
+        self.set_function(self._rate)
+
+    def mark(self, count: int = 1):
+        now = time.monotonic()
+        with self._lock:
+            self._events.append((now, count))
+            self._expire(now)
+
+    def _expire(self, now: float):
+        while self._events and now - self._events[0][0] > self.window_seconds:
+            self._events.popleft()
+
+    def _rate(self) -> float:
+        with self._lock:
+            self._expire(time.monotonic())
+            return sum(count for _, count in self._events) / self.window_seconds
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0]
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append(("_bucket", key + (_format_value(bound),), cumulative, ("le",)))
+            samples.append(("_sum", key, total, ()))
+            samples.append(("_count", key, cumulative, ()))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    "crawler_phase_seconds",
+    "Time spent per crawl phase: browser_launch, navigation, render, scrape, markdown, pruning, "
+    "http_fetch, browser_fetch, extraction, link_discovery, scoring, export, export_finalize.",
+    ["phase"],
+))
+PAGES_FETCHED = REGISTRY.register(Counter(
+    "crawler_pages_fetched_total",
+    "Pages returned by the crawl gateway.",
+    ["render_mode", "cache_status"],
+))
+PAGE_FAILURES = REGISTRY.register(Counter(
+    "crawler_page_failures_total",
+    "Pages that could not be crawled, by reason.",
+    ["reason"],
+))
+URLS_SKIPPED = REGISTRY.register(Counter(
+    "crawler_urls_skipped_total",
+    "Discovered URLs that were not crawled, by reason.",
+    ["reason"],
+))
+BYTES_DOWNLOADED = REGISTRY.register(Counter(
+    "crawler_bytes_downloaded_total",
+    "HTML bytes fetched from the network (cache hits excluded).",
+    ["render_mode"],
+))
+NEAR_DUPLICATES = REGISTRY.register(Counter(
+    "crawler_near_duplicates_total",
+    "Pages whose content was a near-duplicate of a page already crawled.",
+))
+PAGES_EXPORTED = REGISTRY.register(Counter(
+    "crawler_pages_exported_total",
+    "Pages written to an export file.",
+    ["export_format"],
+))
+PAGES_PER_SECOND = REGISTRY.register(RateGauge(
+    "crawler_pages_per_second",
+    "Pages fetched per second over the last minute.",
+))
+PAGES_IN_FLIGHT = REGISTRY.register(Gauge(
+    "crawler_pages_in_flight",
+    "Page fetches currently running or waiting for a politeness slot.",
+))
+FRONTIER_SIZE = REGISTRY.register(Gauge(
+    "crawler_frontier_size",
+    "URLs queued in the frontiers of running best-first crawls.",
+))
+BROWSER_REQUESTS = REGISTRY.register(Counter(
+    "crawler_browser_requests_total",
+    "Subresource requests of browser-rendered pages, allowed or blocked by the render profile.",
+    ["outcome", "reason", "resource_type"],
+))
+JOBS = REGISTRY.register(Gauge(
+    "crawler_jobs",
+    "Background crawl jobs by status.",
+    ["status"],
+))
+
+
+def time_phase(phase: str):
+    return PHASE_SECONDS.time(phase=phase)
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+# crawl4ai runs navigation, scraping and markdown generation inside a single
+# arun() call. The classes and hooks below time those steps from the inside.
+
+class TimedScrapingStrategy(LXMLWebScrapingStrategy):
+    def scrap(self, url: str, html: str, **kwargs):
+        with time_phase("scrape"):
+            return super().scrap(url, html, **kwargs)
+
+
+class TimedMarkdownGenerator(DefaultMarkdownGenerator):
+    def generate_markdown(self, *args, **kwargs):
+        with time_phase("markdown"):
+            return super().generate_markdown(*args, **kwargs)
+
+
+class TimedPruningContentFilter(PruningContentFilter):
+    def filter_content(self, *args, **kwargs):
+        with time_phase("pruning"):
+            return super().filter_content(*args, **kwargs)
+
+
+_PHASE_MARK = "_crawler_phase_started"
+
+
+async def _before_goto(page, **kwargs):
+    setattr(page, _PHASE_MARK, time.perf_counter())
+    return page
+
+
+async def _after_goto(page, **kwargs):
+    started = getattr(page, _PHASE_MARK, None)
+    now = time.perf_counter()
+    if started is not None:
+        PHASE_SECONDS.observe(now - started, phase="navigation")
+    setattr(page, _PHASE_MARK, now)
+    return page
+
+
+async def _before_return_html(page, **kwargs):
+    started = getattr(page, _PHASE_MARK, None)
+    if started is not None:
+        PHASE_SECONDS.observe(time.perf_counter() - started, phase="render")
+        setattr(page, _PHASE_MARK, None)
+    return page
+
+
+def instrument_browser(crawler_strategy):
+    """
+    Time navigation (goto until wait_until) and rendering (readiness wait,
+    JS and overlay handling until the HTML is read) through crawl4ai's
+    Playwright hooks.
+    """
+    crawler_strategy.set_hook("before_goto", _before_goto)
+    crawler_strategy.set_hook("after_goto", _after_goto)
+    crawler_strategy.set_hook("before_return_html", _before_return_html)
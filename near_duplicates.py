@@ -0,0 +1,89 @@
+import os
+import re
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+DEDUP_OFF = "off"
+DEDUP_SKIP = "skip"
+DEDUP_PRUNE = "prune"
+DEDUP_MODES = (DEDUP_OFF, DEDUP_SKIP, DEDUP_PRUNE)
+
+FINGERPRINT_BITS = 64
+SHINGLE_SIZE = 3
+
+# Fingerprints at most this many bits apart are treated as the same content
+DEFAULT_MAX_DISTANCE = int(os.getenv("CRAWLER_NEAR_DUPLICATE_DISTANCE", "6"))
+
+# Pages with fewer words than this are too short to fingerprint reliably
+MIN_FINGERPRINT_WORDS = 30
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> Optional[int]:
+    """64-bit SimHash over word shingles, or None when the text is too short."""
+    words = _WORD.findall((text or "").lower())
+    if len(words) < MIN_FINGERPRINT_WORDS:
+        return None
+    shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    bits = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for shingle in shingles
+    ]
+    # Column-wise majority vote over the shingle hashes
+    threshold = len(bits) / 2
+    fingerprint = 0
+    for column in zip(*bits):
+        fingerprint = (fingerprint << 1) | (column.count("1") > threshold)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    In-memory LSH index over SimHash fingerprints. Fingerprints are split into
+    max_distance + 1 bands, so any two within max_distance bits share at least
+    one band and only those candidates are compared.
+    """
+
+    def __init__(self, max_distance: int = DEFAULT_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self._buckets: List[Dict[int, List[Tuple[int, str]]]] = [{} for _ in range(self.bands)]
+        self.pages = 0
+        self.duplicates = 0
+
+    def _band_values(self, fingerprint: int) -> List[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (band * self.band_bits)) & mask for band in range(self.bands)]
+
+    def find(self, fingerprint: int) -> Optional[str]:
+        for band, value in enumerate(self._band_values(fingerprint)):
+            for candidate, url in self._buckets[band].get(value, ()):
+                if hamming_distance(candidate, fingerprint) <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, fingerprint: int, url: str):
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._buckets[band].setdefault(value, []).append((fingerprint, url))
+        self.pages += 1
+
+    def check(self, url: str, text: str) -> Optional[str]:
+        """
+        Return the URL of an already indexed near-duplicate of text, or index
+        the page and return None.
+        """
+        fingerprint = simhash(text)
+        if fingerprint is None:
+            return None
+        original = self.find(fingerprint)
+        if original is not None:
+            self.duplicates += 1
+            return original
+        self.add(fingerprint, url)
+        return None
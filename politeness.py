@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, List, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+import httpx
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+# robots.txt answers meaning the host has no robots.txt (allow everything) and
+# refusing access to it (treat the whole host as off limits)
+ROBOTS_MISSING_STATUS_CODES = (404, 410)
+ROBOTS_FORBIDDEN_STATUS_CODES = (401, 403)
+
+# Seconds before a robots.txt that failed with any other error is asked for again
+ROBOTS_RETRY_SECONDS = 60.0
+
+
+class HostState:
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttle_count = 0
+        self.crawl_delay: Optional[float] = None
+        self.robots: Optional[RobotFileParser] = None
+        self.robots_expires = 0.0
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.token_lock = asyncio.Lock()
+        self.robots_lock = asyncio.Lock()
+
+    @property
+    def effective_rate(self) -> float:
+        if self.crawl_delay:
+            return min(self.rate, 1.0 / self.crawl_delay)
+        return self.rate
+
+    def refill(self, now: float):
+        capacity = 1 if self.crawl_delay else self.burst
+        self.tokens = min(capacity, self.tokens + (now - self.updated) * self.effective_rate)
+        self.updated = now
+
+
+class HostScheduler:
+    """
+    Per-host politeness shared by every crawl in the process: a token bucket
+    and a concurrency cap per host, backoff on 429/503 (honouring Retry-After)
+    and a cache of parsed robots.txt files including Crawl-delay.
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        burst: int = 4,
+        max_concurrency_per_host: int = 2,
+        respect_robots: bool = True,
+        robots_ttl: float = 3600,
+        user_agent: str = "*",
+        max_backoff: float = 300.0,
+        max_retries: int = 2,
+    ):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.max_concurrency_per_host = max(1, max_concurrency_per_host)
+        self.respect_robots = respect_robots
+        self.robots_ttl = robots_ttl
+        self.user_agent = user_agent
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self._hosts: Dict[str, HostState] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _host(self, url: str) -> HostState:
+        key = (urlsplit(url).hostname or "").lower()
+        state = self._hosts.get(key)
+        if state is None:
+            state = HostState(self.rate, self.burst, self.max_concurrency_per_host)
+            self._hosts[key] = state
+        return state
+
+    async def _robots(self, url: str) -> RobotFileParser:
+        state = self._host(url)
+        async with state.robots_lock:
+            if state.robots is None or time.monotonic() >= state.robots_expires:
+                state.robots, ttl = await self._fetch_robots(url)
+                state.robots_expires = time.monotonic() + ttl
+                delay = state.robots.crawl_delay(self.user_agent)
+                state.crawl_delay = float(delay) if delay and self.respect_robots else None
+        return state.robots
+
+    async def allowed(self, url: str) -> bool:
+        if not self.respect_robots:
+            return True
+        return (await self._robots(url)).can_fetch(self.user_agent, url)
+
+    async def sitemap_urls(self, url: str) -> List[str]:
+        """Sitemaps listed in the host's robots.txt."""
+        return (await self._robots(url)).site_maps() or []
+
+    async def _fetch_robots(self, url: str) -> Tuple[RobotFileParser, float]:
+        """The host's parsed robots.txt and how long to keep it."""
+        parts = urlsplit(url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        parser = RobotFileParser(robots_url)
+        if self._http is None:
+            self._http = httpx.AsyncClient(follow_redirects=True, timeout=10.0)
+        try:
+            response = await self._http.get(robots_url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch {robots_url}: {e}")
+            parser.allow_all = True
+            return parser, ROBOTS_RETRY_SECONDS
+        if response.status_code in ROBOTS_MISSING_STATUS_CODES:
+            parser.allow_all = True
+        elif response.status_code in ROBOTS_FORBIDDEN_STATUS_CODES:
+            parser.disallow_all = True
+        elif response.status_code >= 400:
+            # Throttled or failing: stay away from the host until robots.txt can be read
+            logger.warning(f"{robots_url} answered {response.status_code}, disallowing the host for now")
+            parser.disallow_all = True
+            return parser, ROBOTS_RETRY_SECONDS
+        else:
+            parser.parse(response.text.splitlines())
+        return parser, self.robots_ttl
+
+    async def _take_token(self, state: HostState):
+        async with state.token_lock:
+            while True:
+                now = time.monotonic()
+                wait = state.blocked_until - now
+                if wait <= 0:
+                    state.refill(now)
+                    if state.tokens >= 1:
+                        state.tokens -= 1
+                        return
+                    wait = (1 - state.tokens) / state.effective_rate
+                await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        state = self._host(url)
+        async with state.semaphore:
+            await self._take_token(state)
+            yield
+
+    def record_response(self, url: str, status_code: Optional[int], headers: Optional[dict] = None) -> bool:
+        """
+        Feed a response back into the host's backoff state.
+        Returns True when the host throttled us and the request should be retried.
+        """
+        state = self._host(url)
+        if status_code not in THROTTLE_STATUS_CODES:
+            state.throttle_count = 0
+            state.rate = min(state.base_rate, state.rate * 1.25)
+            return False
+
+        state.throttle_count += 1
+        state.rate = max(state.base_rate / 16, state.rate / 2)
+        delay = self._retry_after(headers) or min(self.max_backoff, 2 ** state.throttle_count)
+        state.blocked_until = max(state.blocked_until, time.monotonic() + min(delay, self.max_backoff))
+        logger.info(f"{urlsplit(url).hostname} answered {status_code}, backing off for {delay:.1f}s")
+        return True
+
+    @staticmethod
+    def _retry_after(headers: Optional[dict]) -> Optional[float]:
+        value = {key.lower(): value for key, value in (headers or {}).items()}.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+_host_scheduler: Optional[HostScheduler] = None
+
+
+def get_host_scheduler() -> HostScheduler:
+    global _host_scheduler
+    if _host_scheduler is None:
+        _host_scheduler = HostScheduler(
+            rate=float(os.getenv("CRAWLER_HOST_RATE", "2")),
+            burst=int(os.getenv("CRAWLER_HOST_BURST", "4")),
+            max_concurrency_per_host=int(os.getenv("CRAWLER_HOST_CONCURRENCY", "2")),
+            respect_robots=os.getenv("CRAWLER_RESPECT_ROBOTS", "true").lower() == "true",
+        )
+    return _host_scheduler
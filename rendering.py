@@ -0,0 +1,198 @@
+import os
+import re
+from typing import Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+from metrics import BROWSER_REQUESTS
+
+RENDER_BROWSER = "browser"
+RENDER_HTTP = "http"
+RENDER_AUTO = "auto"
+RENDER_MODES = (RENDER_BROWSER, RENDER_HTTP, RENDER_AUTO)
+
+WAIT_DOMCONTENTLOADED = "domcontentloaded"
+WAIT_NETWORKIDLE = "networkidle"
+WAIT_SELECTOR = "selector"
+WAIT_DOM_STABLE = "dom_stable"
+WAIT_STRATEGIES = (WAIT_DOMCONTENTLOADED, WAIT_NETWORKIDLE, WAIT_SELECTOR, WAIT_DOM_STABLE)
+
+# Page is considered ready once the number of elements has not changed for DOM_STABLE_MS
+DOM_STABLE_MS = 300
+DOM_STABLE_JS = f"""() => {{
+    const size = document.getElementsByTagName("*").length;
+    const now = Date.now();
+    if (window.__crawlerDomSize !== size) {{
+        window.__crawlerDomSize = size;
+        window.__crawlerDomChangedAt = now;
+        return false;
+    }}
+    return now - window.__crawlerDomChangedAt >= {DOM_STABLE_MS};
+}}"""
+
+_SCRIPT_OR_STYLE = re.compile(r"<(script|style|noscript)\b[^>]*>.*?</\1\s*>", re.I | re.S)
+_SCRIPT_BLOCK = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.I | re.S)
+_TAG = re.compile(r"<[^>]+>")
+_EMPTY_APP_ROOT = re.compile(
+    r"<div[^>]+id=[\"'](root|app|__next|__nuxt|svelte)[\"'][^>]*>\s*</div>", re.I
+)
+_NOSCRIPT_WARNING = re.compile(r"<noscript\b[^>]*>[^<]*(enable|requires?)\s+javascript", re.I)
+
+MIN_STATIC_TEXT_CHARS = 200
+
+PROFILE_FULL = "full"
+PROFILE_BALANCED = "balanced"
+PROFILE_TEXT = "text"
+PROFILE_MINIMAL = "minimal"
+
+# Ad, analytics and tag manager hosts; subdomains are blocked too
+TRACKING_DOMAINS = frozenset({
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "google-analytics.com",
+    "googletagmanager.com", "googletagservices.com", "adservice.google.com", "amazon-adsystem.com",
+    "adnxs.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "scorecardresearch.com",
+    "quantserve.com", "connect.facebook.net", "hotjar.com", "clarity.ms", "mixpanel.com",
+    "cdn.segment.com", "api.segment.io", "amplitude.com", "optimizely.com", "js-agent.newrelic.com",
+    "nr-data.net", "bat.bing.com", "ads.linkedin.com", "static.ads-twitter.com", "pubmatic.com",
+    "rubiconproject.com", "casalemedia.com", "moatads.com", "chartbeat.com", "newrelic.com",
+} | {domain.strip().lower() for domain in os.getenv("CRAWLER_BLOCKED_DOMAINS", "").split(",") if domain.strip()})
+
+
+def _host_matches(host: str, domains: Iterable[str]) -> bool:
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in domains for i in range(len(parts) - 1))
+
+
+def _site(host: str) -> str:
+    # Last two labels; good enough to tell first-party from third-party scripts
+    return ".".join(host.split(".")[-2:])
+
+
+class RenderProfile:
+    """
+    What a browser-rendered page may load. Requests for blocked resource
+    types, tracking domains or (optionally) third-party scripts are aborted
+    before they hit the network; the viewport is applied per page.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        blocked_resource_types: Iterable[str] = (),
+        block_tracking: bool = False,
+        block_third_party_scripts: bool = False,
+        viewport: Optional[Tuple[int, int]] = None,
+    ):
+        self.name = name
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.block_tracking = block_tracking
+        self.block_third_party_scripts = block_third_party_scripts
+        self.viewport = viewport
+
+    @property
+    def blocks_requests(self) -> bool:
+        return bool(self.blocked_resource_types or self.block_tracking or self.block_third_party_scripts)
+
+    def block_reason(self, resource_type: str, url: str, page_host: str) -> Optional[str]:
+        if resource_type == "document":
+            return None
+        if resource_type in self.blocked_resource_types:
+            return "resource_type"
+        host = (urlsplit(url).hostname or "").lower()
+        if self.block_tracking and _host_matches(host, TRACKING_DOMAINS):
+            return "tracking"
+        if self.block_third_party_scripts and resource_type == "script" and _site(host) != _site(page_host):
+            return "third_party_script"
+        return None
+
+
+_MEDIA = ("image", "media", "font")
+_NON_TEXT = _MEDIA + ("stylesheet", "texttrack", "manifest", "eventsource", "websocket")
+
+RENDER_PROFILES = {
+    # Everything loads, as a regular browser would
+    PROFILE_FULL: RenderProfile(PROFILE_FULL),
+    # No images, video or fonts and no trackers; pages still run all their JS
+    PROFILE_BALANCED: RenderProfile(PROFILE_BALANCED, _MEDIA, block_tracking=True),
+    # Text only: no styling and only first-party scripts, in a small viewport
+    PROFILE_TEXT: RenderProfile(
+        PROFILE_TEXT, _NON_TEXT, block_tracking=True, block_third_party_scripts=True, viewport=(800, 600)
+    ),
+    # No script files at all; inline scripts still run. For server-rendered sites.
+    PROFILE_MINIMAL: RenderProfile(PROFILE_MINIMAL, _NON_TEXT + ("script",), block_tracking=True, viewport=(800, 600)),
+}
+RENDER_PROFILE_NAMES = tuple(RENDER_PROFILES)
+
+
+def readiness_config(wait_strategy: str = WAIT_DOM_STABLE, wait_selector: Optional[str] = None) -> dict:
+    if wait_strategy == WAIT_NETWORKIDLE:
+        return {"wait_until": "networkidle"}
+    if wait_strategy == WAIT_SELECTOR:
+        if not wait_selector:
+            raise ValueError("wait_selector is required for the selector wait strategy")
+        return {"wait_until": "domcontentloaded", "wait_for": f"css:{wait_selector}"}
+    if wait_strategy == WAIT_DOM_STABLE:
+        return {"wait_until": "domcontentloaded", "wait_for": f"js:{DOM_STABLE_JS}"}
+    return {"wait_until": "domcontentloaded"}
+
+
+def looks_js_dependent(html: Optional[str]) -> bool:
+    """
+    Guess whether a statically fetched page needs a browser to show its content:
+    an empty SPA mount point, a "please enable JavaScript" notice, or almost no
+    text outside of scripts.
+    """
+    if not html:
+        return True
+    if _EMPTY_APP_ROOT.search(html) or _NOSCRIPT_WARNING.search(html):
+        return True
+    text = _TAG.sub(" ", _SCRIPT_OR_STYLE.sub(" ", html))
+    text_chars = len("".join(text.split()))
+    if text_chars < MIN_STATIC_TEXT_CHARS:
+        return True
+    script_chars = sum(len(block) for block in _SCRIPT_BLOCK.findall(html))
+    return script_chars > 0.8 * len(html) and text_chars < 2000
+
+
+def render_profile_config(profile: str = PROFILE_BALANCED) -> dict:
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Unsupported render profile: {profile}")
+    # shared_data reaches the browser hooks together with the run config
+    return {"shared_data": {"render_profile": profile}}
+
+
+class ProfileRouter:
+    """Playwright route handler enforcing a render profile for one page."""
+
+    def __init__(self, profile: RenderProfile):
+        self.profile = profile
+        self.page_host = ""
+
+    async def __call__(self, route):
+        request = route.request
+        resource_type = request.resource_type
+        if resource_type == "document" and request.frame.parent_frame is None:
+            # Main document (after redirects, the last one): scripts of this site are first-party
+            self.page_host = (urlsplit(request.url).hostname or "").lower()
+        reason = self.profile.block_reason(resource_type, request.url, self.page_host)
+        if reason is None:
+            BROWSER_REQUESTS.inc(outcome="allowed", reason="", resource_type=resource_type)
+            await route.continue_()
+        else:
+            BROWSER_REQUESTS.inc(outcome="blocked", reason=reason, resource_type=resource_type)
+            await route.abort("blockedbyclient")
+
+
+async def _apply_render_profile(page, context=None, config=None, **kwargs):
+    shared_data = getattr(config, "shared_data", None) or {}
+    profile = RENDER_PROFILES.get(shared_data.get("render_profile"))
+    if profile is None:
+        return page
+    if profile.viewport:
+        width, height = profile.viewport
+        await page.set_viewport_size({"width": width, "height": height})
+    if profile.blocks_requests:
+        await page.route("**/*", ProfileRouter(profile))
+    return page
+
+
+def install_render_profiles(crawler_strategy):
+    """Apply each run's render profile to its page through crawl4ai's on_page_context_created hook."""
+    crawler_strategy.set_hook("on_page_context_created", _apply_render_profile)
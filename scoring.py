@@ -0,0 +1,365 @@
+import re
+import math
+from collections import Counter, deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin
+from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer, URLScorer
+
+SCORING_URL = "url"
+SCORING_CONTENT = "content"
+SCORING_MODES = (SCORING_URL, SCORING_CONTENT)
+
+# Below this many keywords, Python's substring search beats walking the automaton
+AUTOMATON_MIN_KEYWORDS = 48
+
+# Upper bound on memoized URL scores before the memo is reset
+SCORE_CACHE_SIZE = 200000
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a keyword list. One pass over a text reports
+    every keyword that occurs in it, however many keywords there are.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = list(keywords)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[Set[int]] = [set()]
+        for index, keyword in enumerate(self.keywords):
+            self._add(keyword, index)
+        self._link()
+
+    def _add(self, keyword: str, index: int):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._out.append(set())
+            state = next_state
+        self._out[state].add(index)
+
+    def _link(self):
+        # Breadth-first pass computing failure links, then resolve them into a
+        # full transition table so matching never has to backtrack.
+        fail = [0] * len(self._goto)
+        order = []
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                target = fail[state]
+                while target and char not in self._goto[target]:
+                    target = fail[target]
+                target = self._goto[target].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                self._out[next_state] |= self._out[fail[next_state]]
+
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])]
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+        for state in order:
+            transitions = dict(self._delta[fail[state]])
+            transitions.update(self._goto[state])
+            self._delta[state] = transitions
+        self._out_tuples = [tuple(out) for out in self._out]
+
+    def matches(self, text: str) -> Set[int]:
+        """Indexes of the keywords occurring in text."""
+        delta, out = self._delta, self._out_tuples
+        found: Set[int] = set()
+        state = 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class BatchKeywordRelevanceScorer(KeywordRelevanceScorer):
+    """
+    KeywordRelevanceScorer with the same scores, plus score_many() for all
+    links of a page at once. Scores are memoized per URL, and large keyword
+    lists are matched with a single automaton pass instead of one substring
+    search per keyword.
+    """
+
+    def __init__(
+        self,
+        keywords: List[str],
+        weight: float = 1.0,
+        case_sensitive: bool = False,
+        cache_size: int = SCORE_CACHE_SIZE,
+    ):
+        super().__init__(keywords, weight=weight, case_sensitive=case_sensitive)
+        self._unique_keywords = list(dict.fromkeys(self._keywords))
+        self._automaton: Optional[KeywordAutomaton] = None
+        if len(self._unique_keywords) >= AUTOMATON_MIN_KEYWORDS:
+            self._automaton = KeywordAutomaton(self._unique_keywords)
+            # Duplicate keywords still count once per occurrence in the list
+            self._keyword_counts = [self._keywords.count(keyword) for keyword in self._unique_keywords]
+        self.cache_size = cache_size
+        self._scores: Dict[str, float] = {}
+
+    def _calculate_score(self, url: str) -> float:
+        if not self._keywords:
+            return 0.0
+        if not self._case_sensitive:
+            url = url.lower()
+        if self._automaton is None:
+            matches = sum(1 for keyword in self._keywords if keyword in url)
+        else:
+            matches = sum(self._keyword_counts[index] for index in self._automaton.matches(url))
+        if not matches:
+            return 0.0
+        if matches == len(self._keywords):
+            return 1.0
+        return matches / len(self._keywords)
+
+    def score(self, url: str) -> float:
+        cached = self._scores.get(url)
+        if cached is not None:
+            return cached
+        score = self._calculate_score(url) * self._weight
+        self._stats.update(score)
+        self._remember(url, score)
+        return score
+
+    def score_many(self, urls: List[str]) -> List[float]:
+        return [self.score(url) for url in urls]
+
+    def _remember(self, url: str, score: float):
+        if len(self._scores) >= self.cache_size:
+            self._scores.clear()
+        self._scores[url] = score
+
+
+# Weights of the signals combined by ContentRelevanceScorer
+CONTENT_SCORE_WEIGHTS = {
+    "url": 0.3,
+    "anchor": 0.25,
+    "context": 0.15,
+    "parent": 0.2,
+    "inherited": 0.1,
+}
+
+# Characters of page text kept on each side of a link
+LINK_CONTEXT_CHARS = 80
+
+# Most anchors examined per page when collecting surrounding text
+MAX_CONTEXT_ANCHORS = 2000
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_ANCHOR = re.compile(r"<a\b[^>]*?\bhref\s*=\s*[\"']([^\"']+)[\"'][^>]*>(.*?)</a\s*>", re.I | re.S)
+_TAG = re.compile(r"<[^>]+>")
+_SPACE = re.compile(r"\s+")
+
+
+def _visible_text(html: str) -> str:
+    return _SPACE.sub(" ", _TAG.sub(" ", html)).strip()
+
+
+def anchor_contexts(
+    html: str,
+    base_url: str,
+    normalizer: Optional[Callable[[str], str]] = None,
+    window: int = LINK_CONTEXT_CHARS,
+) -> Dict[str, str]:
+    """
+    Text around each link of a page, keyed by the (normalized) absolute URL.
+    Only the first occurrence of a URL is kept.
+    """
+    contexts: Dict[str, str] = {}
+    for count, match in enumerate(_ANCHOR.finditer(html or "")):
+        if count >= MAX_CONTEXT_ANCHORS:
+            break
+        url = urljoin(base_url, match.group(1).strip())
+        if normalizer:
+            url = normalizer(url)
+        if url in contexts:
+            continue
+        before = _visible_text(html[max(0, match.start() - window * 5):match.start()])[-window:]
+        after = _visible_text(html[match.end():match.end() + window * 5])[:window]
+        contexts[url] = f"{before} {after}"
+    return contexts
+
+
+class BM25Index:
+    """
+    Incremental BM25 over the pages crawled so far. Only the query terms are
+    tracked, so adding a page costs one tokenization.
+    """
+
+    def __init__(self, terms: Iterable[str], k1: float = 1.2, b: float = 0.75):
+        self.terms = list(dict.fromkeys(terms))
+        self.k1 = k1
+        self.b = b
+        self.documents = 0
+        self.total_length = 0
+        self.document_frequency: Dict[str, int] = {term: 0 for term in self.terms}
+
+    def add(self, text: str) -> Tuple[Dict[str, int], int]:
+        """Index a page and return its query term frequencies and length."""
+        tokens = _TOKEN.findall(text.lower())
+        counts = Counter(token for token in tokens if token in self.document_frequency)
+        self.documents += 1
+        self.total_length += len(tokens)
+        for term in counts:
+            self.document_frequency[term] += 1
+        return counts, len(tokens)
+
+    def score(self, counts: Dict[str, int], length: int) -> float:
+        if not self.documents or not self.terms:
+            return 0.0
+        average_length = self.total_length / self.documents or 1
+        total = 0.0
+        for term in self.terms:
+            frequency = counts.get(term, 0)
+            if not frequency:
+                continue
+            df = self.document_frequency[term]
+            idf = math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+            total += idf * frequency * (self.k1 + 1) / (
+                frequency + self.k1 * (1 - self.b + self.b * length / average_length)
+            )
+        return total
+
+    def relevance(self, text: str) -> float:
+        """Index a page and return its BM25 score squashed into [0, 1)."""
+        score = self.score(*self.add(text))
+        return score / (score + len(self.terms))
+
+
+class ContentRelevanceScorer(URLScorer):
+    """
+    Scores the links of a crawled page with more than the URL string: keyword
+    matches in the anchor text and in the text around the link, the parent
+    page's BM25 relevance, and part of the parent's own score.
+
+    score() rates a bare URL (used for the start URL) by its URL share alone,
+    i.e. on the same scale as a link of score_links() that has no anchor,
+    context or parent signal; score_links() is what the best-first scheduler
+    calls for every crawled page.
+    """
+
+    def __init__(
+        self,
+        keywords: List[str],
+        weight: float = 1.0,
+        weights: Optional[Dict[str, float]] = None,
+        normalizer: Optional[Callable[[str], str]] = None,
+    ):
+        super().__init__(weight=weight)
+        self._keywords = [keyword.lower() for keyword in keywords]
+        self._url_scorer = BatchKeywordRelevanceScorer(keywords)
+        self._weights = {**CONTENT_SCORE_WEIGHTS, **(weights or {})}
+        self._normalizer = normalizer
+        self._index = BM25Index(term for keyword in self._keywords for term in _TOKEN.findall(keyword))
+
+    def _calculate_score(self, url: str) -> float:
+        return self._weights["url"] * self._url_scorer.score(url)
+
+    def _keyword_fraction(self, text: str) -> float:
+        if not text or not self._keywords:
+            return 0.0
+        text = text.lower()
+        return sum(1 for keyword in self._keywords if keyword in text) / len(self._keywords)
+
+    def score_links(self, result, urls: List[str], parent_score: float = 0.0) -> List[float]:
+        markdown = result.markdown
+        page_text = (markdown.fit_markdown or markdown.raw_markdown) if markdown else None
+        parent_relevance = self._index.relevance(page_text or _visible_text(result.html or ""))
+        inherited = parent_score / self._weight if self._weight else 0.0
+
+        anchors: Dict[str, str] = {}
+        for link in (result.links or {}).get("internal", []) + (result.links or {}).get("external", []):
+            href = link.get("href")
+            if not href:
+                continue
+            url = self._normalizer(href) if self._normalizer else href
+            text = f"{link.get('text') or ''} {link.get('title') or ''}".strip()
+            if text and url not in anchors:
+                anchors[url] = text
+        contexts = anchor_contexts(result.html or "", result.url, self._normalizer)
+
+        weights = self._weights
+        scores = []
+        for url, url_score in zip(urls, self._url_scorer.score_many(urls)):
+            score = (
+                weights["url"] * url_score
+                + weights["anchor"] * self._keyword_fraction(anchors.get(url, ""))
+                + weights["context"] * self._keyword_fraction(contexts.get(url, ""))
+                + weights["parent"] * parent_relevance
+                + weights["inherited"] * inherited
+            ) * self._weight
+            self._stats.update(score)
+            scores.append(score)
+        return scores
+
+    def score_seeds(self, parent_url: str, urls: List[str], parent_score: float = 0.0) -> List[float]:
+        """
+        Scores for URLs queued as links of the start page before it is
+        fetched (sitemaps, feeds): the URL share plus the part inherited from
+        the start page, as score_links() would give a link without anchor,
+        context or page text.
+        """
+        inherited = parent_score / self._weight if self._weight else 0.0
+        scores = []
+        for url_score in self._url_scorer.score_many(urls):
+            score = (self._weights["url"] * url_score + self._weights["inherited"] * inherited) * self._weight
+            self._stats.update(score)
+            scores.append(score)
+        return scores
+
+
+class PriorityBoostScorer(URLScorer):
+    """
+    Adds boost(url) to another scorer's scores, e.g. so an incremental crawl
+    fetches new and changed pages before known ones.
+    """
+
+    def __init__(self, scorer: URLScorer, boost: Callable[[str], float]):
+        super().__init__(weight=1.0)
+        self._scorer = scorer
+        self._boost = boost
+
+    def _calculate_score(self, url: str) -> float:
+        return self._scorer.score(url) + self._boost(url)
+
+    def score_many(self, urls: List[str]) -> List[float]:
+        score_many = getattr(self._scorer, "score_many", None)
+        scores = score_many(urls) if score_many is not None else [self._scorer.score(url) for url in urls]
+        return [score + self._boost(url) for url, score in zip(urls, scores)]
+
+    def score_links(self, result, urls: List[str], parent_score: float = 0.0) -> List[float]:
+        score_links = getattr(self._scorer, "score_links", None)
+        if score_links is None:
+            return self.score_many(urls)
+        # The parent's boost is its own, not something its links inherit
+        parent_score -= self._boost(result.url)
+        scores = score_links(result, urls, parent_score)
+        return [score + self._boost(url) for url, score in zip(urls, scores)]
+
+    def score_seeds(self, parent_url: str, urls: List[str], parent_score: float = 0.0) -> List[float]:
+        score_seeds = getattr(self._scorer, "score_seeds", None)
+        if score_seeds is None:
+            return self.score_many(urls)
+        scores = score_seeds(parent_url, urls, parent_score - self._boost(parent_url))
+        return [score + self._boost(url) for url, score in zip(urls, scores)]
+
+
+def create_scorer(
+    keywords: List[str],
+    scoring: str = SCORING_CONTENT,
+    weight: float = 1.0,
+    normalizer: Optional[Callable[[str], str]] = None,
+) -> URLScorer:
+    if scoring == SCORING_CONTENT:
+        return ContentRelevanceScorer(keywords, weight=weight, normalizer=normalizer)
+    if scoring == SCORING_URL:
+        return BatchKeywordRelevanceScorer(keywords, weight=weight)
+    raise ValueError(f"Unsupported scoring mode: {scoring}")
@@ -0,0 +1,501 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import asyncio
+import hashlib
+import threading
+from typing import Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+from log_manager import LoggerUtility
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # only needed for redis:// frontier stores
+    redis_asyncio = None
+
+logger = LoggerUtility().get_logger()
+
+# Number of partitions the URLs of a shared crawl are hashed into
+FRONTIER_PARTITIONS = int(os.getenv("CRAWLER_FRONTIER_PARTITIONS", "64"))
+
+# Seconds a claimed URL stays reserved for its worker; also how long a worker
+# may go without a heartbeat before its partitions are handed to the others
+LEASE_SECONDS = float(os.getenv("CRAWLER_FRONTIER_LEASE_SECONDS", "60"))
+
+PARTITION_BY_HOST = "host"
+PARTITION_BY_URL = "url"
+
+# Hashing by URL spreads even a single-site crawl over all workers, at the
+# price of each node applying its own per-host politeness limits. Hashing by
+# host keeps every host on one worker, so those limits hold across nodes,
+# but a crawl of one site then runs on one worker only.
+PARTITION_BY = os.getenv("CRAWLER_FRONTIER_PARTITION_BY", PARTITION_BY_URL)
+
+QUEUED = 0
+LEASED = 1
+DONE = 2
+
+# (priority, depth, url, parent_url); lower priorities are claimed first
+FrontierItem = Tuple[float, int, str, Optional[str]]
+
+# (partition, priority, depth, url, parent_url) as written to a store
+FrontierRow = Tuple[int, float, int, str, Optional[str]]
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def url_partition(url: str, partitions: int = FRONTIER_PARTITIONS, partition_by: str = PARTITION_BY) -> int:
+    key = url if partition_by == PARTITION_BY_URL else (urlparse(url).hostname or "").lower()
+    return _hash(key) % partitions
+
+
+def assign_partitions(worker_id: str, workers: Iterable[str], partitions: int = FRONTIER_PARTITIONS) -> List[int]:
+    """
+    Partitions owned by worker_id, by rendezvous hashing: each partition goes
+    to the live worker with the highest hash for it, so a worker joining or
+    leaving only moves its own share of partitions.
+    """
+    workers = sorted(set(workers) | {worker_id})
+    return [
+        partition for partition in range(partitions)
+        if max(workers, key=lambda worker: _hash(f"{worker}/{partition}")) == worker_id
+    ]
+
+
+class FrontierStore:
+    """
+    Frontier and visited set of shared crawls, keyed by crawl id. Every URL
+    ever added stays known, so it is never queued twice. Workers claim queued
+    URLs under a lease and complete them; URLs whose lease runs out are
+    handed out again.
+    """
+
+    async def add(self, crawl_id: str, rows: Sequence[FrontierRow]) -> int:
+        """Queue unseen URLs and improve the priority of queued ones; returns how many changed."""
+        raise NotImplementedError
+
+    async def claim(
+        self, crawl_id: str, worker_id: str, partitions: Sequence[int], limit: int, lease_seconds: float,
+    ) -> List[FrontierItem]:
+        """Lease up to limit of the best queued URLs from the given partitions."""
+        raise NotImplementedError
+
+    async def complete(self, crawl_id: str, worker_id: str, url: str, crawled: bool) -> Optional[int]:
+        """
+        Mark a URL leased by worker_id done; returns the pages crawled so far,
+        or None when the worker no longer holds the lease (it expired and the
+        URL was queued again or handed to another worker).
+        """
+        raise NotImplementedError
+
+    async def heartbeat(
+        self, crawl_id: str, worker_id: str, urls: Sequence[str], lease_seconds: float,
+    ) -> List[str]:
+        """Keep a worker and the leases on its URLs alive; returns the live workers."""
+        raise NotImplementedError
+
+    async def leave(self, crawl_id: str, worker_id: str, urls: Sequence[str]):
+        """Unregister a worker and queue its unfinished URLs again."""
+        raise NotImplementedError
+
+    async def counts(self, crawl_id: str) -> Tuple[int, int, int]:
+        """(queued, leased, pages crawled)"""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class SQLiteFrontierStore(FrontierStore):
+    """
+    Frontier in a SQLite file, shared by crawl workers on one machine. Claims
+    run in an immediate transaction, so concurrent processes never lease the
+    same URL.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            "crawl_id TEXT, url TEXT, partition INTEGER, priority REAL, depth INTEGER, parent_url TEXT, "
+            "state INTEGER, worker_id TEXT, lease_expires REAL, PRIMARY KEY (crawl_id, url))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_frontier_queue ON frontier(crawl_id, state, partition, priority)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS workers (crawl_id TEXT, worker_id TEXT, expires REAL, "
+            "PRIMARY KEY (crawl_id, worker_id))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS crawls (crawl_id TEXT PRIMARY KEY, pages_crawled INTEGER)")
+
+    def _transaction(self, work, *args):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(*args)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return result
+
+    def _add(self, crawl_id: str, rows: Sequence[FrontierRow]) -> int:
+        before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT INTO frontier VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL) "
+            "ON CONFLICT (crawl_id, url) DO UPDATE SET "
+            "priority = excluded.priority, depth = excluded.depth, parent_url = excluded.parent_url "
+            "WHERE frontier.state = ? AND excluded.priority < frontier.priority",
+            [(crawl_id, url, partition, priority, depth, parent_url, QUEUED, QUEUED)
+             for partition, priority, depth, url, parent_url in rows],
+        )
+        return self._conn.total_changes - before
+
+    def _claim(self, crawl_id, worker_id, partitions, limit, lease_seconds) -> List[FrontierItem]:
+        now = time.time()
+        self._conn.execute(
+            "UPDATE frontier SET state = ?, worker_id = NULL, lease_expires = NULL "
+            "WHERE crawl_id = ? AND state = ? AND lease_expires < ?",
+            (QUEUED, crawl_id, LEASED, now),
+        )
+        placeholders = ",".join("?" * len(partitions))
+        rows = self._conn.execute(
+            "SELECT priority, depth, url, parent_url FROM frontier "
+            f"WHERE crawl_id = ? AND state = ? AND partition IN ({placeholders}) ORDER BY priority LIMIT ?",
+            (crawl_id, QUEUED, *partitions, limit),
+        ).fetchall()
+        self._conn.executemany(
+            "UPDATE frontier SET state = ?, worker_id = ?, lease_expires = ? WHERE crawl_id = ? AND url = ?",
+            [(LEASED, worker_id, now + lease_seconds, crawl_id, row[2]) for row in rows],
+        )
+        return [tuple(row) for row in rows]
+
+    def _complete(self, crawl_id: str, worker_id: str, url: str, crawled: bool) -> Optional[int]:
+        completed = self._conn.execute(
+            "UPDATE frontier SET state = ?, worker_id = NULL, lease_expires = NULL "
+            "WHERE crawl_id = ? AND url = ? AND worker_id = ? AND state = ?",
+            (DONE, crawl_id, url, worker_id, LEASED),
+        )
+        if not completed.rowcount:
+            return None
+        self._conn.execute(
+            "INSERT INTO crawls VALUES (?, ?) ON CONFLICT (crawl_id) "
+            "DO UPDATE SET pages_crawled = pages_crawled + excluded.pages_crawled",
+            (crawl_id, int(crawled)),
+        )
+        return self._conn.execute("SELECT pages_crawled FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()[0]
+
+    def _heartbeat(self, crawl_id, worker_id, urls, lease_seconds) -> List[str]:
+        now = time.time()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO workers VALUES (?, ?, ?)", (crawl_id, worker_id, now + lease_seconds)
+        )
+        self._conn.executemany(
+            "UPDATE frontier SET lease_expires = ? WHERE crawl_id = ? AND url = ? AND worker_id = ? AND state = ?",
+            [(now + lease_seconds, crawl_id, url, worker_id, LEASED) for url in urls],
+        )
+        self._conn.execute("DELETE FROM workers WHERE crawl_id = ? AND expires < ?", (crawl_id, now))
+        return [row[0] for row in self._conn.execute("SELECT worker_id FROM workers WHERE crawl_id = ?", (crawl_id,))]
+
+    def _leave(self, crawl_id, worker_id, urls):
+        self._conn.executemany(
+            "UPDATE frontier SET state = ?, worker_id = NULL, lease_expires = NULL "
+            "WHERE crawl_id = ? AND url = ? AND worker_id = ? AND state = ?",
+            [(QUEUED, crawl_id, url, worker_id, LEASED) for url in urls],
+        )
+        self._conn.execute("DELETE FROM workers WHERE crawl_id = ? AND worker_id = ?", (crawl_id, worker_id))
+
+    def _counts(self, crawl_id: str) -> Tuple[int, int, int]:
+        states = dict(self._conn.execute(
+            "SELECT state, COUNT(*) FROM frontier WHERE crawl_id = ? AND state != ? GROUP BY state", (crawl_id, DONE)
+        ).fetchall())
+        pages = self._conn.execute("SELECT pages_crawled FROM crawls WHERE crawl_id = ?", (crawl_id,)).fetchone()
+        return states.get(QUEUED, 0), states.get(LEASED, 0), pages[0] if pages else 0
+
+    async def add(self, crawl_id, rows):
+        return await asyncio.to_thread(self._transaction, self._add, crawl_id, rows)
+
+    async def claim(self, crawl_id, worker_id, partitions, limit, lease_seconds):
+        if not partitions or limit <= 0:
+            return []
+        return await asyncio.to_thread(
+            self._transaction, self._claim, crawl_id, worker_id, list(partitions), limit, lease_seconds
+        )
+
+    async def complete(self, crawl_id, worker_id, url, crawled):
+        return await asyncio.to_thread(self._transaction, self._complete, crawl_id, worker_id, url, crawled)
+
+    async def heartbeat(self, crawl_id, worker_id, urls, lease_seconds):
+        return await asyncio.to_thread(self._transaction, self._heartbeat, crawl_id, worker_id, urls, lease_seconds)
+
+    async def leave(self, crawl_id, worker_id, urls):
+        await asyncio.to_thread(self._transaction, self._leave, crawl_id, worker_id, urls)
+
+    async def counts(self, crawl_id):
+        return await asyncio.to_thread(self._transaction, self._counts, crawl_id)
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Queue an unseen URL, or lower the priority of a still queued one.
+# ARGV: queue key prefix, then partition, priority, depth, url, parent_url per URL
+_ADD_SCRIPT = """
+local changed = 0
+for i = 2, #ARGV, 5 do
+    local partition, priority, url = ARGV[i], tonumber(ARGV[i + 1]), ARGV[i + 3]
+    local queue = ARGV[1] .. partition
+    local known = redis.call('HEXISTS', KEYS[1], url) == 1
+    local current = known and redis.call('ZSCORE', queue, url)
+    if not known or (current and priority < tonumber(current)) then
+        redis.call('HSET', KEYS[1], url, cjson.encode({tonumber(partition), priority, tonumber(ARGV[i + 2]), ARGV[i + 4]}))
+        redis.call('ZADD', queue, priority, url)
+        changed = changed + 1
+    end
+end
+return changed
+"""
+
+# Requeue expired leases, then lease the best URLs of the given partitions.
+# ARGV: queue key prefix, worker id, now, lease expiry, limit, partitions...
+_CLAIM_SCRIPT = """
+for _, url in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[3])) do
+    local item = cjson.decode(redis.call('HGET', KEYS[1], url))
+    redis.call('ZADD', ARGV[1] .. item[1], item[2], url)
+    redis.call('ZREM', KEYS[2], url)
+    redis.call('HDEL', KEYS[3], url)
+end
+local limit = tonumber(ARGV[5])
+local candidates = {}
+for i = 6, #ARGV do
+    local entries = redis.call('ZRANGE', ARGV[1] .. ARGV[i], 0, limit - 1, 'WITHSCORES')
+    for j = 1, #entries, 2 do
+        table.insert(candidates, {entries[j], tonumber(entries[j + 1]), ARGV[i]})
+    end
+end
+table.sort(candidates, function(a, b) return a[2] < b[2] end)
+local claimed = {}
+for k = 1, math.min(limit, #candidates) do
+    local url, partition = candidates[k][1], candidates[k][3]
+    redis.call('ZREM', ARGV[1] .. partition, url)
+    redis.call('ZADD', KEYS[2], ARGV[4], url)
+    redis.call('HSET', KEYS[3], url, ARGV[2])
+    table.insert(claimed, redis.call('HGET', KEYS[1], url))
+    table.insert(claimed, url)
+end
+return claimed
+"""
+
+# Finish a URL if the worker still holds its lease; returns the pages crawled,
+# or nil when the lease was lost. ARGV: worker id, url, 1 if crawled else 0
+_COMPLETE_SCRIPT = """
+if redis.call('HGET', KEYS[3], ARGV[2]) ~= ARGV[1] then
+    return false
+end
+redis.call('ZREM', KEYS[2], ARGV[2])
+redis.call('HDEL', KEYS[3], ARGV[2])
+return redis.call('INCRBY', KEYS[4], ARGV[3])
+"""
+
+# Queue a worker's leased URLs again. ARGV: queue key prefix, worker id, urls...
+_RELEASE_SCRIPT = """
+for i = 3, #ARGV do
+    local url = ARGV[i]
+    if redis.call('HGET', KEYS[3], url) == ARGV[2] then
+        local item = cjson.decode(redis.call('HGET', KEYS[1], url))
+        redis.call('ZADD', ARGV[1] .. item[1], item[2], url)
+        redis.call('ZREM', KEYS[2], url)
+        redis.call('HDEL', KEYS[3], url)
+    end
+end
+return 0
+"""
+
+
+class RedisFrontierStore(FrontierStore):
+    """
+    Frontier in Redis (or any server speaking its protocol and Lua scripting)
+    for workers on several machines. The keys of a crawl share a hash tag, so
+    they live in one slot of a Redis cluster.
+    """
+
+    def __init__(
+        self, url: str, prefix: str = "crawler:frontier", partitions: int = FRONTIER_PARTITIONS, client=None,
+    ):
+        if client is None and redis_asyncio is None:
+            raise RuntimeError("The redis package is required for redis:// frontier stores")
+        self.url = url
+        self.prefix = prefix
+        self.partitions = partitions
+        # client: an already connected redis.asyncio client with decode_responses=True
+        self._redis = client or redis_asyncio.from_url(url, decode_responses=True)
+        self._add_script = self._redis.register_script(_ADD_SCRIPT)
+        self._claim_script = self._redis.register_script(_CLAIM_SCRIPT)
+        self._complete_script = self._redis.register_script(_COMPLETE_SCRIPT)
+        self._release_script = self._redis.register_script(_RELEASE_SCRIPT)
+
+    def _key(self, crawl_id: str, name: str) -> str:
+        return f"{self.prefix}:{{{crawl_id}}}:{name}"
+
+    def _lease_keys(self, crawl_id: str) -> List[str]:
+        return [self._key(crawl_id, "items"), self._key(crawl_id, "leases"), self._key(crawl_id, "owners")]
+
+    async def add(self, crawl_id, rows):
+        if not rows:
+            return 0
+        queue = self._key(crawl_id, "queue:")
+        args = [queue]
+        for partition, priority, depth, url, parent_url in rows:
+            args += [partition, priority, depth, url, parent_url or ""]
+        return await self._add_script(keys=[self._key(crawl_id, "items")], args=args)
+
+    async def claim(self, crawl_id, worker_id, partitions, limit, lease_seconds):
+        if not partitions or limit <= 0:
+            return []
+        now = time.time()
+        claimed = await self._claim_script(
+            keys=self._lease_keys(crawl_id),
+            args=[self._key(crawl_id, "queue:"), worker_id, now, now + lease_seconds, limit, *partitions],
+        )
+        items = []
+        for index in range(0, len(claimed), 2):
+            _, priority, depth, parent_url = json.loads(claimed[index])
+            items.append((float(priority), int(depth), claimed[index + 1], parent_url or None))
+        return items
+
+    async def complete(self, crawl_id, worker_id, url, crawled):
+        return await self._complete_script(
+            keys=self._lease_keys(crawl_id) + [self._key(crawl_id, "pages")], args=[worker_id, url, int(crawled)]
+        )
+
+    async def heartbeat(self, crawl_id, worker_id, urls, lease_seconds):
+        now = time.time()
+        workers = self._key(crawl_id, "workers")
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(workers, {worker_id: now + lease_seconds})
+            if urls:
+                pipe.zadd(self._key(crawl_id, "leases"), {url: now + lease_seconds for url in urls}, xx=True)
+            pipe.zremrangebyscore(workers, "-inf", now)
+            pipe.zrange(workers, 0, -1)
+            return (await pipe.execute())[-1]
+
+    async def leave(self, crawl_id, worker_id, urls):
+        if urls:
+            await self._release_script(
+                keys=self._lease_keys(crawl_id), args=[self._key(crawl_id, "queue:"), worker_id, *urls]
+            )
+        await self._redis.zrem(self._key(crawl_id, "workers"), worker_id)
+
+    async def counts(self, crawl_id):
+        queue = self._key(crawl_id, "queue:")
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for partition in range(self.partitions):
+                pipe.zcard(f"{queue}{partition}")
+            pipe.zcard(self._key(crawl_id, "leases"))
+            pipe.get(self._key(crawl_id, "pages"))
+            *queued, leased, pages = await pipe.execute()
+        return sum(queued), leased, int(pages or 0)
+
+    async def close(self):
+        await self._redis.aclose()
+
+
+class SharedFrontier:
+    """
+    One worker's handle on a shared crawl. URLs are hashed into partitions,
+    the live workers split the partitions between them, and each worker only
+    claims URLs from its own partitions.
+    """
+
+    def __init__(
+        self,
+        store: FrontierStore,
+        crawl_id: str,
+        worker_id: Optional[str] = None,
+        partitions: int = FRONTIER_PARTITIONS,
+        lease_seconds: float = LEASE_SECONDS,
+    ):
+        self.store = store
+        self.crawl_id = crawl_id
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.partitions = partitions
+        self.lease_seconds = lease_seconds
+        self.owned: List[int] = []
+        self.workers: List[str] = []
+        self._last_heartbeat = 0.0
+
+    async def heartbeat(self, leased_urls: Sequence[str] = ()):
+        self.workers = await self.store.heartbeat(self.crawl_id, self.worker_id, list(leased_urls), self.lease_seconds)
+        owned = assign_partitions(self.worker_id, self.workers, self.partitions)
+        if len(owned) != len(self.owned):
+            logger.info(
+                f"Worker {self.worker_id} owns {len(owned)}/{self.partitions} partitions "
+                f"of crawl {self.crawl_id} ({len(self.workers)} workers)"
+            )
+        self.owned = owned
+        self._last_heartbeat = time.monotonic()
+
+    async def add(self, items: Iterable[FrontierItem]) -> int:
+        rows = [
+            (url_partition(url, self.partitions), priority, depth, url, parent_url)
+            for priority, depth, url, parent_url in items
+        ]
+        return await self.store.add(self.crawl_id, rows) if rows else 0
+
+    async def keep_alive(self, leased_urls: Sequence[str] = ()):
+        """Heartbeat when one is due, renewing the leases of pages still being fetched."""
+        if time.monotonic() - self._last_heartbeat > self.lease_seconds / 3:
+            await self.heartbeat(leased_urls)
+
+    async def claim(self, limit: int, leased_urls: Sequence[str] = ()) -> List[FrontierItem]:
+        await self.keep_alive(leased_urls)
+        return await self.store.claim(self.crawl_id, self.worker_id, self.owned, limit, self.lease_seconds)
+
+    async def complete(self, url: str, crawled: bool) -> Optional[int]:
+        return await self.store.complete(self.crawl_id, self.worker_id, url, crawled)
+
+    async def finished(self) -> bool:
+        queued, leased, _ = await self.store.counts(self.crawl_id)
+        return queued == 0 and leased == 0
+
+    async def leave(self, leased_urls: Sequence[str] = ()):
+        await self.store.leave(self.crawl_id, self.worker_id, list(leased_urls))
+
+
+_frontier_store: Optional[FrontierStore] = None
+
+
+def get_frontier_store() -> FrontierStore:
+    """
+    The frontier store named by CRAWLER_FRONTIER_STORE: a redis:// (or
+    rediss://) URL, or sqlite:///path/to/file.sqlite (the default).
+    """
+    global _frontier_store
+    if _frontier_store is None:
+        default_path = os.path.join(os.path.expanduser("~"), ".web_crawler", "frontier.sqlite")
+        location = os.getenv("CRAWLER_FRONTIER_STORE", f"sqlite:///{default_path}")
+        if location.startswith(("redis://", "rediss://")):
+            _frontier_store = RedisFrontierStore(location)
+        elif location.startswith("sqlite:///"):
+            _frontier_store = SQLiteFrontierStore(location[len("sqlite:///"):])
+        else:
+            raise RuntimeError(f"Unsupported frontier store: {location}")
+    return _frontier_store
+
+
+async def close_frontier_store():
+    global _frontier_store
+    if _frontier_store is not None:
+        await _frontier_store.close()
+        _frontier_store = None
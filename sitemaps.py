@@ -0,0 +1,225 @@
+import os
+import re
+import zlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+from xml.etree import ElementTree
+import httpx
+from politeness import HostScheduler, get_host_scheduler
+from url_canonicalizer import default_canonicalizer
+from log_manager import LoggerUtility
+
+logger = LoggerUtility().get_logger()
+
+# Sitemap index files can nest; stop following them after this many files
+MAX_SITEMAP_FILES = int(os.getenv("CRAWLER_MAX_SITEMAP_FILES", "50"))
+MAX_SITEMAP_URLS = int(os.getenv("CRAWLER_MAX_SITEMAP_URLS", "200000"))
+
+SitemapEntries = Dict[str, Optional[float]]
+
+_FEED_LINK = re.compile(r"<link\b[^>]*>", re.I)
+_ATTRIBUTE = re.compile(r"([\w-]+)\s*=\s*[\"']([^\"']*)[\"']")
+FEED_TYPES = ("application/rss+xml", "application/atom+xml")
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[float]:
+    """W3C datetime, plain date or RFC 822 date as a POSIX timestamp; naive values are taken as UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip())
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value.strip())
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class SitemapParser:
+    """
+    Incremental parser for sitemaps, sitemap indexes and RSS/Atom feeds. It
+    is fed the document chunk by chunk and drops every entry once read, so
+    memory stays flat however large the file is.
+    """
+
+    def __init__(self):
+        self._parser = ElementTree.XMLPullParser(events=("start", "end"))
+        self.kind: Optional[str] = None
+        self.urls: List[Tuple[str, Optional[float]]] = []
+        self.sitemaps: List[str] = []
+
+    def feed(self, data: bytes):
+        self._parser.feed(data)
+        self._read_events()
+
+    def close(self):
+        self._parser.close()
+        self._read_events()
+
+    def _read_events(self):
+        for event, element in self._parser.read_events():
+            name = _local_name(element.tag)
+            if event == "start":
+                self.kind = self.kind or name
+            elif (self.kind, name) in (("urlset", "url"), ("sitemapindex", "sitemap"), ("rss", "item"),
+                                        ("RDF", "item"), ("feed", "entry")):
+                self._read_entry(name, element)
+                element.clear()
+
+    def _read_entry(self, name: str, element):
+        fields = {}
+        for child in element:
+            child_name = _local_name(child.tag)
+            if child_name == "link" and child.get("href"):
+                # Atom: the entry's own page, not its enclosures or replies
+                if child.get("rel", "alternate") == "alternate":
+                    fields.setdefault("link", child.get("href"))
+            else:
+                fields.setdefault(child_name, (child.text or "").strip())
+        url = fields.get("loc") or fields.get("link")
+        if not url:
+            return
+        if name == "sitemap":
+            self.sitemaps.append(url)
+        else:
+            lastmod = fields.get("lastmod") or fields.get("updated") or fields.get("pubDate") or fields.get("published")
+            self.urls.append((url, parse_lastmod(lastmod)))
+
+
+def parse_sitemap(content: bytes) -> Tuple[List[Tuple[str, Optional[float]]], List[str]]:
+    """Page URLs with their lastmod, and the child sitemaps of a sitemap index."""
+    parser = SitemapParser()
+    parser.feed(content)
+    parser.close()
+    return parser.urls, parser.sitemaps
+
+
+def feed_links(html: str, base_url: str) -> List[str]:
+    """RSS/Atom feeds a page announces with <link rel="alternate">."""
+    feeds = []
+    for tag in _FEED_LINK.findall(html or ""):
+        attributes = {key.lower(): value for key, value in _ATTRIBUTE.findall(tag)}
+        if "alternate" in attributes.get("rel", "").lower().split() and attributes.get("type", "").lower() in FEED_TYPES:
+            if attributes.get("href"):
+                feeds.append(urljoin(base_url, attributes["href"]))
+    return feeds
+
+
+def same_site(url: str, site_url: str) -> bool:
+    host = (urlsplit(url).hostname or "").lower().removeprefix("www.")
+    return host == (urlsplit(site_url).hostname or "").lower().removeprefix("www.")
+
+
+class SitemapReader:
+    """
+    Reads a site's sitemaps (from robots.txt, or /sitemap.xml) and the feeds
+    its start page announces, politely through the host scheduler.
+    """
+
+    def __init__(self, scheduler: Optional[HostScheduler] = None):
+        self.scheduler = scheduler or get_host_scheduler()
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(follow_redirects=True, timeout=30.0)
+        return self._http
+
+    async def _read(self, url: str, limit: int) -> Optional[SitemapParser]:
+        """Stream-parse one sitemap or feed, gzipped or not, stopping after limit URLs."""
+        if not await self.scheduler.allowed(url):
+            logger.info(f"Skipping {url}, disallowed by robots.txt")
+            return None
+        parser = SitemapParser()
+        try:
+            async with self.scheduler.slot(url):
+                async with self._client().stream("GET", url) as response:
+                    self.scheduler.record_response(url, response.status_code, dict(response.headers))
+                    if response.status_code >= 400:
+                        return None
+                    decompressor = None
+                    first = True
+                    async for chunk in response.aiter_bytes():
+                        if first and chunk[:2] == b"\x1f\x8b":
+                            # A .xml.gz file, not a gzip Content-Encoding httpx already undid
+                            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                        first = False
+                        parser.feed(decompressor.decompress(chunk) if decompressor else chunk)
+                        if len(parser.urls) >= limit:
+                            return parser
+            parser.close()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch {url}: {e}")
+            return None
+        except (ElementTree.ParseError, zlib.error) as e:
+            logger.warning(f"Could not parse {url}: {e}")
+            return None
+        return parser
+
+    async def sitemap_urls(self, site_url: str) -> List[str]:
+        listed = await self.scheduler.sitemap_urls(site_url)
+        if listed:
+            return list(listed)
+        parts = urlsplit(site_url)
+        return [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+
+    async def feed_urls(self, site_url: str) -> List[str]:
+        if not await self.scheduler.allowed(site_url):
+            logger.info(f"Skipping feed discovery on {site_url}, disallowed by robots.txt")
+            return []
+        try:
+            async with self.scheduler.slot(site_url):
+                response = await self._client().get(site_url)
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not fetch {site_url} for feed discovery: {e}")
+            return []
+        self.scheduler.record_response(site_url, response.status_code, dict(response.headers))
+        if response.status_code >= 400:
+            return []
+        return feed_links(response.text, str(response.url))
+
+    async def entries(self, site_url: str, include_feeds: bool = True) -> SitemapEntries:
+        """Canonical URL -> lastmod timestamp (None when unknown) of the site's pages."""
+        entries: SitemapEntries = {}
+        pending = await self.sitemap_urls(site_url)
+        if include_feeds:
+            pending += await self.feed_urls(site_url)
+        seen = set()
+        while pending and len(seen) < MAX_SITEMAP_FILES and len(entries) < MAX_SITEMAP_URLS:
+            source_url = pending.pop(0)
+            if source_url in seen:
+                continue
+            seen.add(source_url)
+            parser = await self._read(source_url, MAX_SITEMAP_URLS - len(entries))
+            if parser is None:
+                continue
+            pending.extend(parser.sitemaps)
+            for url, lastmod in parser.urls[:MAX_SITEMAP_URLS - len(entries)]:
+                if same_site(url, site_url):
+                    entries[default_canonicalizer(url)] = lastmod
+        logger.info(f"Read {len(entries)} URLs from {len(seen)} sitemaps and feeds of {urlsplit(site_url).netloc}")
+        return entries
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+_sitemap_reader: Optional[SitemapReader] = None
+
+
+def get_sitemap_reader() -> SitemapReader:
+    global _sitemap_reader
+    if _sitemap_reader is None:
+        _sitemap_reader = SitemapReader()
+    return _sitemap_reader
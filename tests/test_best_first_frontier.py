@@ -0,0 +1,72 @@
+"""
+Deduplication, decrease-key and disk spilling of the best-first frontier.
+"""
+import os
+
+from best_first_strategy import BestFirstFrontier
+
+
+def drain(frontier):
+    items = []
+    while (item := frontier.pop()) is not None:
+        items.append(item)
+    return items
+
+
+def test_queued_url_is_not_added_twice():
+    frontier = BestFirstFrontier()
+    assert frontier.push(-0.5, 1, "https://a.example/1", None)
+    assert not frontier.push(-0.5, 1, "https://a.example/1", None)
+    assert not frontier.push(-0.1, 2, "https://a.example/1", "https://a.example/")
+    assert len(frontier) == 1
+    assert drain(frontier) == [(-0.5, 1, "https://a.example/1", None)]
+
+
+def test_better_score_moves_queued_url_forward():
+    frontier = BestFirstFrontier()
+    frontier.push(-0.2, 1, "https://a.example/1", None)
+    frontier.push(-0.5, 1, "https://a.example/2", None)
+    assert frontier.push(-0.9, 2, "https://a.example/1", "https://a.example/2")
+    assert len(frontier) == 2
+    assert drain(frontier) == [
+        (-0.9, 2, "https://a.example/1", "https://a.example/2"),
+        (-0.5, 1, "https://a.example/2", None),
+    ]
+    assert len(frontier) == 0
+
+
+def test_spilled_urls_come_back_in_priority_order():
+    frontier = BestFirstFrontier(max_size=4, spill_to_disk=True)
+    for page in range(10):
+        frontier.push(-page / 10, 1, f"https://a.example/{page}", None)
+    assert len(frontier) == 10
+    assert frontier._spilled > 0
+    spill_path = frontier._spill_path
+
+    assert "https://a.example/0" in frontier
+    assert not frontier.push(-0.0, 1, "https://a.example/0", None)
+    assert frontier.push(-0.95, 1, "https://a.example/1", None)
+    assert len(frontier) == 10
+
+    urls = [item[2] for item in drain(frontier)]
+    assert urls[:2] == ["https://a.example/1", "https://a.example/9"]
+    assert sorted(urls) == sorted(f"https://a.example/{page}" for page in range(10))
+    frontier.close()
+    assert not os.path.exists(spill_path)
+
+
+def test_snapshot_includes_spilled_urls():
+    frontier = BestFirstFrontier(max_size=4, spill_to_disk=True)
+    for page in range(10):
+        frontier.push(-page / 10, 1, f"https://a.example/{page}", None)
+    assert sorted(item[2] for item in frontier.snapshot()) == sorted(f"https://a.example/{page}" for page in range(10))
+    frontier.close()
+
+
+def test_overflow_drops_lowest_priority_without_spill():
+    frontier = BestFirstFrontier(max_size=4)
+    for page in range(10):
+        frontier.push(-page / 10, 1, f"https://a.example/{page}", None)
+    assert frontier.dropped + len(frontier) == 10
+    urls = [item[2] for item in drain(frontier)]
+    assert urls == [f"https://a.example/{page}" for page in range(9, 9 - len(urls), -1)]
@@ -0,0 +1,83 @@
+"""
+Page, byte and time limits of CrawlBudget and how within_budget ends a
+stream of results.
+"""
+import asyncio
+
+from budgets import STOP_BYTES, STOP_MIN_SCORE, STOP_PAGES, STOP_TIME, CrawlBudget, within_budget
+
+
+def collect(results, budget):
+    async def scenario():
+        return [result async for result in within_budget(results, budget)]
+
+    return asyncio.run(scenario())
+
+
+async def pages(count, delay=0.0, closed=None):
+    try:
+        for page in range(count):
+            if delay:
+                await asyncio.sleep(delay)
+            yield page
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+def test_unlimited_budget_passes_everything():
+    assert collect(pages(5), CrawlBudget()) == [0, 1, 2, 3, 4]
+    assert collect(pages(5), None) == [0, 1, 2, 3, 4]
+
+
+def test_page_limit_stops_and_closes_the_source():
+    budget = CrawlBudget(max_pages=3)
+    closed = []
+
+    async def counted():
+        async for page in pages(10, closed=closed):
+            budget.add_page()
+            yield page
+
+    assert collect(counted(), budget) == [0, 1, 2]
+    assert budget.stop_reason == STOP_PAGES
+    assert closed == [True]
+
+
+def test_byte_limit_stops_the_crawl():
+    budget = CrawlBudget(max_bytes=250)
+
+    async def sized():
+        async for page in pages(10):
+            budget.add_bytes(100)
+            yield page
+
+    assert collect(sized(), budget) == [0, 1, 2]
+    assert budget.stop_reason == STOP_BYTES
+
+
+def test_time_limit_interrupts_a_pending_fetch():
+    budget = CrawlBudget(max_seconds=0.2)
+    closed = []
+    results = collect(pages(10, delay=0.15, closed=closed), budget)
+    assert results == [0]
+    assert budget.stop_reason == STOP_TIME
+    assert closed == [True]
+
+
+def test_first_stop_reason_wins():
+    budget = CrawlBudget(max_pages=1)
+    budget.stop(STOP_MIN_SCORE)
+    budget.add_page()
+    assert budget.exhausted()
+    assert budget.stop_reason == STOP_MIN_SCORE
+    assert budget.summary()["stop_reason"] == STOP_MIN_SCORE
+
+
+def test_defaults_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("CRAWLER_DEFAULT_MAX_PAGES", "50")
+    monkeypatch.setenv("CRAWLER_DEFAULT_MAX_SECONDS", "30")
+    monkeypatch.delenv("CRAWLER_DEFAULT_MAX_BYTES", raising=False)
+    budget = CrawlBudget.with_defaults(max_pages=10, max_fanout_per_depth={0: 5})
+    assert (budget.max_pages, budget.max_seconds, budget.max_bytes) == (10, 30.0, None)
+    assert budget.fanout(0) == 5 and budget.fanout(1) is None
@@ -0,0 +1,128 @@
+"""
+Change classification of incremental crawls: added, changed and removed
+pages, carried-over subtrees and the snapshot stored for the next run.
+"""
+import asyncio
+
+import pytest
+from crawl4ai.models import CrawlResult, MarkdownGenerationResult
+
+from budgets import STOP_PAGES, CrawlBudget
+from incremental import CHANGE_ADDED, CHANGE_CHANGED, CHANGE_REMOVED, IncrementalCrawl, SnapshotStore, content_hash
+
+ROOT = "https://a.example/"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.sqlite"))
+    yield store
+    store.close()
+
+
+def page(url, text):
+    return {"url": url, "fit_markdown": text}
+
+
+def result(url, text="", links=(), success=True, status_code=200):
+    return CrawlResult(
+        url=url,
+        html="",
+        success=success,
+        status_code=status_code,
+        links={"internal": [{"href": link} for link in links]},
+        markdown=MarkdownGenerationResult(
+            raw_markdown=text, markdown_with_citations="", references_markdown="", fit_markdown=text,
+        ),
+    )
+
+
+def previous_run(**pages):
+    """Snapshot of a previous run: path -> (text, parent path)."""
+    return {
+        ROOT + path: (content_hash(text), ROOT + parent if parent is not None else None)
+        for path, (text, parent) in pages.items()
+    }
+
+
+def run_diff(crawl, pages, budget=None):
+    async def scenario():
+        async def stream():
+            for item in pages:
+                yield item
+
+        return [item async for item in crawl.diff(stream(), budget)]
+
+    return asyncio.run(scenario())
+
+
+def test_first_run_adds_every_page(store):
+    crawl = IncrementalCrawl("key", {}, None, store=store)
+    assert crawl.classify(page(ROOT, "home")) == CHANGE_ADDED
+    assert crawl.classify(page(ROOT + "a", "a")) == CHANGE_ADDED
+    assert crawl.counts[CHANGE_ADDED] == 2
+
+
+def test_classify_compares_content_hashes(store):
+    previous = previous_run(**{"": ("home", None), "a": ("a", "")})
+    crawl = IncrementalCrawl("key", previous, 1.0, store=store)
+    assert crawl.classify(page("HTTPS://A.example/#top", "home")) is None
+    assert crawl.classify(page(ROOT + "a", "a, edited")) == CHANGE_CHANGED
+    assert crawl.classify(page(ROOT + "b", "b")) == CHANGE_ADDED
+    assert crawl.counts == {CHANGE_ADDED: 1, CHANGE_CHANGED: 1, "unchanged": 1, CHANGE_REMOVED: 0}
+
+
+def test_diff_yields_changes_and_stores_the_snapshot(store):
+    previous = previous_run(**{"": ("home", None), "a": ("a", ""), "gone": ("gone", "")})
+    crawl = IncrementalCrawl("key", previous, 1.0, store=store)
+    changes = run_diff(crawl, [page(ROOT, "home"), page(ROOT + "a", "a, edited"), page(ROOT + "b", "b")])
+    assert [(item["url"], item["change"]) for item in changes] == [
+        (ROOT + "a", CHANGE_CHANGED), (ROOT + "b", CHANGE_ADDED), (ROOT + "gone", CHANGE_REMOVED),
+    ]
+
+    started_at, snapshot = store.load("key")
+    assert started_at == crawl.started_at
+    assert set(snapshot) == {ROOT, ROOT + "a", ROOT + "b"}
+    assert snapshot[ROOT + "a"][0] == content_hash("a, edited")
+
+
+def test_unchanged_subtrees_are_carried_over(store):
+    previous = previous_run(**{
+        "": ("home", None), "docs": ("docs", ""), "docs/1": ("one", "docs"), "old": ("old", ""),
+    })
+    crawl = IncrementalCrawl("key", previous, 1.0, store=store)
+    home = result(ROOT, "home", links=[ROOT + "docs", ROOT + "old", ROOT + "new"])
+    crawl.observe(home)
+    # Known children of an unchanged page are not followed again
+    assert [link["href"] for link in home.links["internal"]] == [ROOT + "new"]
+    crawl.observe(result(ROOT + "new", "new"))
+
+    changes = run_diff(crawl, [page(ROOT, "home"), page(ROOT + "new", "new")])
+    assert [(item["url"], item["change"]) for item in changes] == [(ROOT + "new", CHANGE_ADDED)]
+    assert crawl.summary()["carried_over"] == 3
+    assert set(store.load("key")[1]) == {ROOT, ROOT + "docs", ROOT + "docs/1", ROOT + "old", ROOT + "new"}
+
+
+def test_gone_pages_are_removed_and_failing_ones_kept(store):
+    previous = previous_run(**{"": ("home", None), "gone": ("gone", ""), "flaky": ("flaky", "")})
+    crawl = IncrementalCrawl("key", previous, 1.0, store=store)
+    crawl.observe(result(ROOT, "home, edited", links=[ROOT + "gone", ROOT + "flaky"]))
+    crawl.observe(result(ROOT + "gone", success=False, status_code=404))
+    crawl.observe(result(ROOT + "flaky", success=False, status_code=503))
+
+    changes = run_diff(crawl, [page(ROOT, "home, edited")])
+    assert [(item["url"], item["change"]) for item in changes] == [
+        (ROOT, CHANGE_CHANGED), (ROOT + "gone", CHANGE_REMOVED),
+    ]
+
+
+@pytest.mark.parametrize("resumed", [False, True])
+def test_incomplete_runs_remove_nothing(store, resumed):
+    previous = previous_run(**{"": ("home", None), "a": ("a", "")})
+    crawl = IncrementalCrawl("key", previous, 1.0, resumed=resumed, store=store)
+    budget = CrawlBudget()
+    if not resumed:
+        budget.stop(STOP_PAGES)
+    assert run_diff(crawl, [page(ROOT, "home")], budget) == []
+    assert not crawl.complete
+    assert set(store.load("key")[1]) == {ROOT, ROOT + "a"}
@@ -0,0 +1,69 @@
+"""
+The Aho-Corasick keyword automaton and the batch keyword scorer must agree
+with crawl4ai's KeywordRelevanceScorer, whichever matching path is taken.
+"""
+import random
+
+import pytest
+from crawl4ai.deep_crawling.scorers import KeywordRelevanceScorer
+
+from scoring import AUTOMATON_MIN_KEYWORDS, BatchKeywordRelevanceScorer, KeywordAutomaton
+
+
+def brute_force(keywords, text):
+    return {index for index, keyword in enumerate(keywords) if keyword in text}
+
+
+def random_texts(alphabet, count, length, seed=7):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, length))) for _ in range(count)]
+
+
+def test_overlapping_keywords():
+    keywords = ["he", "she", "his", "hers", "e", "ushers"]
+    automaton = KeywordAutomaton(keywords)
+    assert automaton.matches("ushers") == {0, 1, 3, 4, 5}
+    assert automaton.matches("this") == {2}
+    assert automaton.matches("") == set()
+
+
+def test_automaton_matches_substring_search():
+    rng = random.Random(3)
+    keywords = list({"".join(rng.choice("abc") for _ in range(rng.randint(1, 5))) for _ in range(80)})
+    automaton = KeywordAutomaton(keywords)
+    for text in random_texts("abcd", 300, 40):
+        assert automaton.matches(text) == brute_force(keywords, text)
+
+
+def url_keywords(count, seed=11):
+    rng = random.Random(seed)
+    words = ["docs", "api", "guide", "Python", "crawl", "news", "blog", "v2", "s", "a"]
+    keywords = [rng.choice(words) + str(rng.randint(0, 30)) for _ in range(count - len(words))] + words
+    # Repeated keywords count once per occurrence in the reference scorer
+    return keywords + keywords[:5]
+
+
+@pytest.mark.parametrize("keyword_count", [5, AUTOMATON_MIN_KEYWORDS + 20])
+@pytest.mark.parametrize("case_sensitive", [False, True])
+def test_batch_scorer_matches_reference(keyword_count, case_sensitive):
+    keywords = url_keywords(keyword_count)
+    reference = KeywordRelevanceScorer(keywords, weight=0.7, case_sensitive=case_sensitive)
+    scorer = BatchKeywordRelevanceScorer(keywords, weight=0.7, case_sensitive=case_sensitive)
+    assert (scorer._automaton is not None) == (len(set(scorer._keywords)) >= AUTOMATON_MIN_KEYWORDS)
+
+    rng = random.Random(keyword_count)
+    urls = [
+        "https://example.com/" + "/".join(rng.choice(keywords) for _ in range(rng.randint(0, 4)))
+        for _ in range(300)
+    ] + ["https://example.com/Docs/API", "https://example.com/"]
+    expected = [reference.score(url) for url in urls]
+    assert scorer.score_many(urls) == pytest.approx(expected)
+    # Memoized scores are the same the second time round
+    assert scorer.score_many(urls) == pytest.approx(expected)
+
+
+def test_all_keywords_score_one():
+    scorer = BatchKeywordRelevanceScorer(["docs", "api"])
+    assert scorer.score("https://example.com/docs/api") == 1.0
+    assert scorer.score("https://example.com/docs") == 0.5
+    assert scorer.score("https://example.com/") == 0.0
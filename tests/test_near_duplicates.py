@@ -0,0 +1,70 @@
+"""
+SimHash fingerprints and the LSH index behind near-duplicate detection.
+"""
+import random
+
+import pytest
+
+from near_duplicates import FINGERPRINT_BITS, MIN_FINGERPRINT_WORDS, NearDuplicateIndex, hamming_distance, simhash
+
+WORDS = (
+    "crawler frontier priority queue robots sitemap politeness budget cache export markdown browser "
+    "render scoring keyword relevance shingle fingerprint duplicate partition lease worker checkpoint"
+).split()
+
+
+def article(seed, length=200):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(length))
+
+
+def flip_bits(fingerprint, count, seed=0):
+    positions = random.Random(seed).sample(range(FINGERPRINT_BITS), count)
+    for position in positions:
+        fingerprint ^= 1 << position
+    return fingerprint
+
+
+def test_short_pages_are_not_fingerprinted():
+    assert simhash(" ".join(WORDS[:MIN_FINGERPRINT_WORDS - 1])) is None
+    assert simhash("") is None
+
+
+def test_small_edits_stay_close_and_other_pages_do_not():
+    text = article(1)
+    edited = text.replace("budget", "limits", 1) + " footer"
+    assert simhash(text) == simhash(text.upper())
+    assert hamming_distance(simhash(text), simhash(edited)) <= 6
+    assert hamming_distance(simhash(text), simhash(article(2))) > 6
+
+
+@pytest.mark.parametrize("max_distance", [3, 6, 10])
+def test_index_finds_every_fingerprint_within_the_threshold(max_distance):
+    index = NearDuplicateIndex(max_distance)
+    rng = random.Random(max_distance)
+    originals = [rng.getrandbits(FINGERPRINT_BITS) for _ in range(200)]
+    for number, fingerprint in enumerate(originals):
+        index.add(fingerprint, f"https://a.example/{number}")
+    for number, fingerprint in enumerate(originals):
+        for seed in range(5):
+            near = flip_bits(fingerprint, max_distance, seed)
+            assert index.find(near) == f"https://a.example/{number}"
+
+
+def test_index_ignores_fingerprints_past_the_threshold():
+    index = NearDuplicateIndex(6)
+    rng = random.Random(5)
+    fingerprint = rng.getrandbits(FINGERPRINT_BITS)
+    index.add(fingerprint, "https://a.example/")
+    for seed in range(50):
+        assert index.find(flip_bits(fingerprint, 7, seed)) is None
+
+
+def test_check_reports_the_first_copy():
+    index = NearDuplicateIndex()
+    text = article(3)
+    assert index.check("https://a.example/1", text) is None
+    assert index.check("https://a.example/2", text + " share") == "https://a.example/1"
+    assert index.check("https://a.example/3", article(4)) is None
+    assert index.check("https://a.example/4", "too short") is None
+    assert (index.pages, index.duplicates) == (2, 1)
@@ -0,0 +1,36 @@
+"""
+How the host scheduler reads robots.txt answers.
+"""
+import asyncio
+
+import httpx
+import pytest
+
+from politeness import HostScheduler
+
+
+def scheduler_for(status_code, text=""):
+    def handler(request):
+        return httpx.Response(status_code, text=text)
+
+    scheduler = HostScheduler()
+    scheduler._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return scheduler
+
+
+@pytest.mark.parametrize("status_code, allowed", [(401, False), (403, False), (404, True), (410, True), (500, False)])
+def test_robots_status_codes(status_code, allowed):
+    scheduler = scheduler_for(status_code)
+    assert asyncio.run(scheduler.allowed("https://a.example/page")) is allowed
+
+
+def test_robots_rules_are_applied():
+    scheduler = scheduler_for(200, "User-agent: *\nDisallow: /private\n")
+
+    async def scenario():
+        return (
+            await scheduler.allowed("https://a.example/page"),
+            await scheduler.allowed("https://a.example/private/page"),
+        )
+
+    assert asyncio.run(scenario()) == (True, False)
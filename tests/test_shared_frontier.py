@@ -0,0 +1,172 @@
+"""
+Claim, complete and lease expiry of the shared frontier stores. The Redis
+store runs against fakeredis (pip install "fakeredis[lua]") and is skipped
+when it is not installed.
+"""
+import asyncio
+
+import pytest
+
+from shared_frontier import (
+    RedisFrontierStore, SharedFrontier, SQLiteFrontierStore, assign_partitions, url_partition,
+)
+
+PARTITIONS = 4
+
+
+def sqlite_store(tmp_path):
+    return SQLiteFrontierStore(str(tmp_path / "frontier.sqlite"))
+
+
+def redis_store(tmp_path):
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    return RedisFrontierStore("redis://fake", partitions=PARTITIONS, client=client)
+
+
+@pytest.fixture(params=[sqlite_store, redis_store], ids=["sqlite", "redis"])
+def store(request, tmp_path):
+    return request.param(tmp_path)
+
+
+def rows(*urls, priority=-1.0):
+    return [(url_partition(url, PARTITIONS), priority, 1, url, None) for url in urls]
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_claims_best_urls_once(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1", "https://a.example/2"))
+        await store.add("crawl", [(url_partition("https://a.example/3", PARTITIONS), -5.0, 1, "https://a.example/3", None)])
+        first = await store.claim("crawl", "w1", range(PARTITIONS), 2, 60)
+        second = await store.claim("crawl", "w2", range(PARTITIONS), 2, 60)
+        return first, second
+
+    first, second = run(scenario())
+    assert first[0][2] == "https://a.example/3"
+    assert len(first) == 2 and len(second) == 1
+    assert not {item[2] for item in first} & {item[2] for item in second}
+
+
+def test_known_urls_are_not_queued_again(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1"))
+        (item,) = await store.claim("crawl", "w1", range(PARTITIONS), 5, 60)
+        await store.complete("crawl", "w1", item[2], True)
+        added = await store.add("crawl", rows("https://a.example/1", priority=-9.0))
+        return added, await store.claim("crawl", "w1", range(PARTITIONS), 5, 60)
+
+    added, claimed = run(scenario())
+    assert added == 0
+    assert claimed == []
+
+
+def test_complete_counts_crawled_pages(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1", "https://a.example/2"))
+        claimed = await store.claim("crawl", "w1", range(PARTITIONS), 5, 60)
+        await store.complete("crawl", "w1", claimed[0][2], True)
+        await store.complete("crawl", "w1", claimed[1][2], False)
+        return await store.counts("crawl")
+
+    assert run(scenario()) == (0, 0, 1)
+
+
+def test_expired_lease_is_claimed_again(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1"))
+        first = await store.claim("crawl", "w1", range(PARTITIONS), 5, 0.05)
+        await asyncio.sleep(0.1)
+        second = await store.claim("crawl", "w2", range(PARTITIONS), 5, 60)
+        return first, second
+
+    first, second = run(scenario())
+    assert [item[2] for item in first] == [item[2] for item in second] == ["https://a.example/1"]
+
+
+def test_expired_lease_cannot_be_completed(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1"))
+        (item,) = await store.claim("crawl", "w1", range(PARTITIONS), 5, 0.05)
+        await asyncio.sleep(0.1)
+        await store.claim("crawl", "w2", range(PARTITIONS), 5, 60)
+        stale = await store.complete("crawl", "w1", item[2], True)
+        counts = await store.counts("crawl")
+        current = await store.complete("crawl", "w2", item[2], True)
+        return stale, counts, current
+
+    stale, counts, current = run(scenario())
+    assert stale is None
+    assert counts == (0, 1, 0)
+    assert current == 1
+
+
+def test_only_the_lease_owner_completes(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1"))
+        (item,) = await store.claim("crawl", "w1", range(PARTITIONS), 5, 60)
+        stranger = await store.complete("crawl", "w2", item[2], True)
+        owner = await store.complete("crawl", "w1", item[2], True)
+        return stranger, owner, await store.counts("crawl")
+
+    assert run(scenario()) == (None, 1, (0, 0, 1))
+
+
+def test_heartbeat_renews_leases(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1"))
+        (item,) = await store.claim("crawl", "w1", range(PARTITIONS), 5, 0.2)
+        await asyncio.sleep(0.1)
+        await store.heartbeat("crawl", "w1", [item[2]], 60)
+        await asyncio.sleep(0.15)
+        return await store.claim("crawl", "w2", range(PARTITIONS), 5, 60)
+
+    assert run(scenario()) == []
+
+
+def test_leave_requeues_unfinished_urls(store):
+    async def scenario():
+        await store.add("crawl", rows("https://a.example/1"))
+        await store.heartbeat("crawl", "w1", [], 60)
+        (item,) = await store.claim("crawl", "w1", range(PARTITIONS), 5, 60)
+        await store.leave("crawl", "w1", [item[2]])
+        return await store.claim("crawl", "w2", range(PARTITIONS), 5, 60)
+
+    assert [item[2] for item in run(scenario())] == ["https://a.example/1"]
+
+
+def test_keep_alive_renews_leases_without_claiming(store):
+    async def scenario():
+        frontier = SharedFrontier(store, "crawl", worker_id="w1", partitions=PARTITIONS, lease_seconds=0.3)
+        await frontier.add([(-1.0, 0, "https://a.example/1", None)])
+        (item,) = await frontier.claim(1)
+        for _ in range(4):
+            await asyncio.sleep(0.15)
+            await frontier.keep_alive([item[2]])
+        return await store.claim("crawl", "w2", range(PARTITIONS), 5, 60)
+
+    assert run(scenario()) == []
+
+
+def test_single_site_spreads_over_workers():
+    workers = ["w1", "w2", "w3"]
+    owners = {
+        worker: set(assign_partitions(worker, workers, PARTITIONS * 4)) for worker in workers
+    }
+    busy = {
+        worker for worker, owned in owners.items()
+        for page in range(200)
+        if url_partition(f"https://a.example/{page}", PARTITIONS * 4) in owned
+    }
+    assert busy == set(workers)
+
+
+def test_partitions_are_split_between_workers():
+    workers = ["w1", "w2", "w3"]
+    owned = [set(assign_partitions(worker, workers, 64)) for worker in workers]
+    assert set().union(*owned) == set(range(64))
+    assert sum(len(partitions) for partitions in owned) == 64
@@ -0,0 +1,95 @@
+"""
+Sitemap, sitemap index and feed parsing, and reading gzipped sitemaps
+through a local httpx transport.
+"""
+import asyncio
+import gzip
+
+import httpx
+
+from politeness import HostScheduler
+from sitemaps import SitemapParser, SitemapReader, parse_lastmod, parse_sitemap
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://a.example/</loc><lastmod>2024-05-01</lastmod></url>
+  <url><loc> https://a.example/docs </loc></url>
+</urlset>"""
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://a.example/sitemap-1.xml.gz</loc><lastmod>2024-05-01</lastmod></sitemap>
+  <sitemap><loc>https://a.example/sitemap-2.xml</loc></sitemap>
+</sitemapindex>"""
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel>
+  <title>News</title><link>https://a.example/</link>
+  <item><title>One</title><link>https://a.example/news/1</link><pubDate>Wed, 01 May 2024 10:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <link href="https://a.example/"/>
+  <entry>
+    <link rel="enclosure" href="https://a.example/audio.mp3"/>
+    <link href="https://a.example/posts/1"/>
+    <updated>2024-05-01T10:00:00Z</updated>
+  </entry>
+</feed>"""
+
+
+def test_urlset_lists_pages_with_lastmod():
+    urls, sitemaps = parse_sitemap(URLSET)
+    assert urls == [("https://a.example/", parse_lastmod("2024-05-01")), ("https://a.example/docs", None)]
+    assert sitemaps == []
+
+
+def test_index_lists_child_sitemaps():
+    urls, sitemaps = parse_sitemap(INDEX)
+    assert urls == []
+    assert sitemaps == ["https://a.example/sitemap-1.xml.gz", "https://a.example/sitemap-2.xml"]
+
+
+def test_feeds_list_item_links():
+    rss_urls, _ = parse_sitemap(RSS)
+    atom_urls, _ = parse_sitemap(ATOM)
+    assert rss_urls == [("https://a.example/news/1", parse_lastmod("Wed, 01 May 2024 10:00:00 GMT"))]
+    assert atom_urls == [("https://a.example/posts/1", parse_lastmod("2024-05-01T10:00:00Z"))]
+
+
+def test_parser_accepts_arbitrary_chunks():
+    parser = SitemapParser()
+    for start in range(0, len(URLSET), 7):
+        parser.feed(URLSET[start:start + 7])
+    parser.close()
+    assert [url for url, _ in parser.urls] == ["https://a.example/", "https://a.example/docs"]
+
+
+def reader(routes, robots="User-agent: *\nAllow: /\n"):
+    def handler(request):
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, text=robots)
+        if request.url.path in routes:
+            return httpx.Response(200, content=routes[request.url.path])
+        return httpx.Response(404)
+
+    scheduler = HostScheduler(rate=1000, burst=1000)
+    scheduler._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    sitemap_reader = SitemapReader(scheduler)
+    sitemap_reader._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return sitemap_reader
+
+
+def test_reader_follows_index_into_gzipped_sitemap():
+    sitemap_reader = reader({
+        "/sitemap.xml": INDEX,
+        "/sitemap-1.xml.gz": gzip.compress(URLSET),
+    })
+    entries = asyncio.run(sitemap_reader.entries("https://a.example/", include_feeds=False))
+    assert set(entries) == {"https://a.example/", "https://a.example/docs"}
+
+
+def test_reader_skips_sitemaps_disallowed_by_robots():
+    sitemap_reader = reader({"/sitemap.xml": URLSET}, robots="User-agent: *\nDisallow: /sitemap\n")
+    assert asyncio.run(sitemap_reader.entries("https://a.example/", include_feeds=False)) == {}
@@ -0,0 +1,66 @@
+"""
+Membership, false-positive rates and checkpoint round trips of the compact
+visited sets used by the best-first strategy.
+"""
+import pytest
+
+from best_first_strategy import (
+    VISITED_BLOOM, VISITED_EXACT, FingerprintVisitedSet, ScalableBloomVisitedSet, create_visited_set,
+    restore_visited_set,
+)
+
+SEEN = [f"https://a.example/page/{page}?ref={page * 7}" for page in range(20000)]
+UNSEEN = [f"https://b.example/other/{page}" for page in range(20000)]
+
+
+def false_positive_rate(visited):
+    return sum(url in visited for url in UNSEEN) / len(UNSEEN)
+
+
+def test_fingerprint_set_is_exact_while_growing():
+    visited = FingerprintVisitedSet(capacity=16)
+    assert all(visited.add(url) for url in SEEN)
+    assert not any(visited.add(url) for url in SEEN[:100])
+    assert len(visited) == len(SEEN)
+    assert all(url in visited for url in SEEN)
+    assert false_positive_rate(visited) == 0
+
+
+@pytest.mark.parametrize("error_rate", [0.01, 0.001])
+def test_bloom_set_stays_below_its_error_rate(error_rate):
+    # A small first filter makes the set add several, stricter ones
+    visited = ScalableBloomVisitedSet(error_rate, initial_capacity=1024)
+    visited.update(SEEN)
+    assert len(visited._filters) > 3
+    assert all(url in visited for url in SEEN)
+    assert false_positive_rate(visited) <= error_rate
+
+
+def test_bloom_set_reports_known_urls():
+    visited = ScalableBloomVisitedSet(0.001)
+    assert visited.add(SEEN[0])
+    assert not visited.add(SEEN[0])
+    assert len(visited) == 1
+
+
+@pytest.mark.parametrize("mode", [VISITED_EXACT, VISITED_BLOOM])
+def test_state_round_trip(mode):
+    visited = create_visited_set(mode, 0.001)
+    visited.update(SEEN[:5000])
+    restored = restore_visited_set(visited.state())
+    assert type(restored) is type(visited)
+    assert len(restored) == len(visited)
+    assert all(url in restored for url in SEEN[:5000])
+    assert restored.add(UNSEEN[0])
+
+
+def test_restores_checkpoints_of_older_formats():
+    visited = FingerprintVisitedSet()
+    visited.update(SEEN[:10])
+    # Checkpoints written before depths were dropped still carry them
+    restored = restore_visited_set({**visited.state(), "depths": ""})
+    assert all(url in restored for url in SEEN[:10])
+
+    from_list = restore_visited_set(SEEN[:10], VISITED_BLOOM)
+    assert isinstance(from_list, ScalableBloomVisitedSet)
+    assert all(url in from_list for url in SEEN[:10])
@@ -0,0 +1,92 @@
+from typing import Optional, Iterable, Dict
+from urllib.parse import urlsplit, urlunsplit, unquote_plus
+
+DEFAULT_TRACKING_PARAMS = (
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "utm_id",
+    "gclid", "dclid", "fbclid", "msclkid", "yclid", "mc_cid", "mc_eid", "_ga", "_gl",
+)
+
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+class URLCanonicalizer:
+    """
+    Canonical form of a URL for deduplication. Crawlers fetch the canonical
+    form, so the default rules never change what a server returns: the query
+    string is kept byte for byte apart from dropped tracking parameters and
+    its order. strip_trailing_slash is lossy (/dir/ and /dir can differ) and
+    only for sites known to serve both alike.
+    """
+
+    def __init__(
+        self,
+        drop_fragment: bool = True,
+        strip_trailing_slash: bool = False,
+        sort_query: bool = True,
+        strip_tracking_params: bool = True,
+        tracking_params: Iterable[str] = DEFAULT_TRACKING_PARAMS,
+        strip_www: bool = False,
+        cache_size: int = 100000,
+    ):
+        self.drop_fragment = drop_fragment
+        self.strip_trailing_slash = strip_trailing_slash
+        self.sort_query = sort_query
+        self.strip_tracking_params = strip_tracking_params
+        self.tracking_params = frozenset(param.lower() for param in tracking_params)
+        self.strip_www = strip_www
+        self.cache_size = cache_size
+        self._cache: Dict[str, str] = {}
+
+    def __call__(self, url: Optional[str]) -> Optional[str]:
+        if not url:
+            return url
+        canonical = self._cache.get(url)
+        if canonical is None:
+            canonical = self.canonicalize(url)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[url] = canonical
+        return canonical
+
+    def canonicalize(self, url: str) -> str:
+        try:
+            parts = urlsplit(url.strip())
+            port = parts.port
+        except ValueError:
+            return url
+        scheme = parts.scheme.lower()
+        host = (parts.hostname or "").lower()
+        if self.strip_www and host.startswith("www."):
+            host = host[4:]
+        netloc = f"[{host}]" if ":" in host else host
+        if port is not None and str(port) != DEFAULT_PORTS.get(scheme):
+            netloc = f"{netloc}:{port}"
+        if parts.username:
+            credentials = parts.username + (f":{parts.password}" if parts.password else "")
+            netloc = f"{credentials}@{netloc}"
+
+        path = parts.path or "/"
+        if self.strip_trailing_slash and len(path) > 1 and path.endswith("/"):
+            path = path.rstrip("/") or "/"
+
+        query = parts.query
+        if query and (self.sort_query or self.strip_tracking_params):
+            # Raw "key=value" pieces, not decoded and re-encoded, so "?flag" and
+            # escaped characters reach the server exactly as linked
+            params = query.split("&")
+            if self.strip_tracking_params:
+                params = [param for param in params if self._param_name(param) not in self.tracking_params]
+            if self.sort_query:
+                # Stable by name, so repeated parameters keep their order
+                params.sort(key=self._param_name)
+            query = "&".join(params)
+
+        fragment = "" if self.drop_fragment else parts.fragment
+        return urlunsplit((scheme, netloc, path, query, fragment))
+
+    @staticmethod
+    def _param_name(param: str) -> str:
+        return unquote_plus(param.split("=", 1)[0]).lower()
+
+
+default_canonicalizer = URLCanonicalizer()